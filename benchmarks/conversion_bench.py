@@ -0,0 +1,368 @@
+"""
+Benchmark of every reader -> writer pair of the parse script on synthetic instances.
+
+Generates a pisinger knapsack file and a sparse model of ROWS x COLS with the given density (every row has
+density * COLS nonzeros) as MPS, LP, fznimf and JSON dump. Every pair of the readers and writers registries is
+converted in a fresh process, which reports the nonzeros, the timings of the phases (see illogic.instrumentation) and
+the peak RSS. The fzn reader is fed the fznimf stream directly, thus gecode isn't needed.
+
+The results are stored as JSON (by default in benchmarks/results/<commit>.json), two result files can be compared
+offline with --compare.
+
+    python benchmarks/conversion_bench.py [-r ROWS] [-c COLS] [-d DENSITY] [-u UB] [--reader R] [--writer W]
+                                          [--repeat N] [--timeout SECONDS] [-o RESULTS.json]
+    python benchmarks/conversion_bench.py --compare OLD.json NEW.json
+"""
+import argparse
+import imp
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, ROOT)
+
+import illogic.instrumentation as instrumentation
+from illogic.ILPParser import ILPParser
+from illogic.Readers.fzn_reader import FZNReader
+
+
+# -- instance generators -----------------------------------------------------------------------------------------------
+
+def sparse_model(rows, cols, density, ub, seed):
+    """
+    Returns the rows (terms, relation, rhs) and the objective of a random sparse model over x1..xCOLS in [0, UB]. The
+    right hand sides are chosen such that a random point satisfies all rows.
+    """
+    rnd = random.Random(seed)
+    k = min(cols, max(1, int(round(density * cols))))
+    point = [rnd.randint(0, ub) for _ in xrange(cols)]
+
+    model = []
+    for _ in xrange(rows):
+        terms = [(j, rnd.choice([-1, 1]) * rnd.randint(1, 9)) for j in sorted(rnd.sample(xrange(cols), k))]
+        value = sum([w * point[j] for j, w in terms])
+        relation = rnd.choice('LLLGGGE')
+        model.append((terms, relation, value + rnd.randint(0, ub) * (relation == 'L') -
+                      rnd.randint(0, ub) * (relation == 'G')))
+
+    objective = [(j, rnd.randint(-9, 9)) for j in xrange(cols)]
+    return model, [(j, w) for j, w in objective if w != 0]
+
+
+def write_pisinger(path, cols, seed):
+    rnd = random.Random(seed)
+    items = [(rnd.randint(1, 1000), rnd.randint(1, 1000)) for _ in xrange(cols)]
+    with open(path, 'w') as f:
+        f.write('knapPI_bench_%d\nn %d\nc %d\nz 0\ntime 0.00\n' % (cols, cols, sum([w for _, w in items]) / 2))
+        for i, (profit, weight) in enumerate(items):
+            f.write('%d,%d,%d,0\n' % (i + 1, profit, weight))
+        f.write('-----\n\n')
+
+
+def write_mps(path, model, objective, cols, ub):
+    columns = [[] for _ in xrange(cols)]
+    for j, w in objective:
+        columns[j].append(('COST', w))
+    for i, (terms, _, _) in enumerate(model):
+        for j, w in terms:
+            columns[j].append(('R%d' % (i + 1), w))
+
+    with open(path, 'w') as f:
+        f.write('NAME          BENCH\nROWS\n N  COST\n')
+        for i, (_, relation, _) in enumerate(model):
+            f.write(' %s  R%d\n' % (relation, i + 1))
+        f.write('COLUMNS\n')
+        for j, entries in enumerate(columns):
+            for row, w in entries:
+                f.write('    X%-8d  %-8s  %d\n' % (j + 1, row, w))
+        f.write('RHS\n')
+        for i, (_, _, rhs) in enumerate(model):
+            f.write('    RHS       R%-8d  %d\n' % (i + 1, rhs))
+        f.write('BOUNDS\n')
+        for j in xrange(cols):
+            f.write(' UP BND       X%-8d  %d\n' % (j + 1, ub))
+        f.write('ENDATA\n')
+
+
+def lp_terms(terms):
+    return ' '.join(['%s %d x%d' % ('-' if w < 0 else '+', abs(w), j + 1) for j, w in terms])
+
+
+def write_lp(path, model, objective, cols, ub):
+    relations = {'L': '<=', 'G': '>=', 'E': '='}
+    with open(path, 'w') as f:
+        f.write('Minimize\n obj: %s\nSubject To\n' % lp_terms(objective))
+        for i, (terms, relation, rhs) in enumerate(model):
+            f.write(' r%d: %s %s %d\n' % (i + 1, lp_terms(terms), relations[relation], rhs))
+        f.write('Bounds\n')
+        for j in xrange(cols):
+            f.write(' 0 <= x%d <= %d\n' % (j + 1, ub))
+        # all variables are integers for the converter, thus no General section is needed
+        f.write('End\n')
+
+
+def write_fznimf(path, model, objective, cols, ub):
+    relations = {'L': '<=', 'G': '>=', 'E': '='}
+    with open(path, 'w') as f:
+        for j in xrange(cols):
+            f.write('[INT] X_%d [0..%d]\n' % (j + 1, ub))
+        for terms, relation, rhs in model:
+            f.write('[CONSTRAINT] %s %s %d\n' % (' '.join(['%+dX_%d' % (w, j + 1) for j, w in terms]),
+                                                 relations[relation], rhs))
+        # the fznimf objective is a single variable
+        if objective:
+            f.write('[OPTIMIZATION] minimize X_%d\n' % (objective[0][0] + 1))
+
+
+def write_json(path, model, objective, cols, ub):
+    constraints = []
+    for terms, relation, rhs in model:
+        terms = [('x%d' % (j + 1), w) for j, w in terms]
+        if relation in 'GE':
+            constraints.append([terms, rhs, None])
+        if relation in 'LE':
+            constraints.append([[(var, -w) for var, w in terms], -rhs, None])
+
+    with open(path, 'w') as f:
+        json.dump({
+            'booleans': ['1'],
+            'clauses': [['1']],
+            'bool_to_int': [],
+            'bounds': dict([('x%d' % (j + 1), ['ContiguousDomain', [0, ub, 1]]) for j in xrange(cols)]),
+            'constraints': constraints,
+            'opt_vector': [('x%d' % (j + 1), w) for j, w in objective]
+        }, f)
+
+
+def generate(directory, args):
+    """
+    Writes an instance for every reader into directory and returns reader -> path.
+    """
+    model, objective = sparse_model(args.rows, args.cols, args.density, args.ub, args.seed)
+    paths = {
+        'pisinger': os.path.join(directory, 'bench.pis'),
+        'mps': os.path.join(directory, 'bench.mps'),
+        'lp': os.path.join(directory, 'bench.lp'),
+        'fzn': os.path.join(directory, 'bench.fznimf'),
+        'json': os.path.join(directory, 'bench.json')
+    }
+
+    write_pisinger(paths['pisinger'], args.cols, args.seed)
+    write_mps(paths['mps'], model, objective, args.cols, args.ub)
+    write_lp(paths['lp'], model, objective, args.cols, args.ub)
+    write_fznimf(paths['fzn'], model, objective, args.cols, args.ub)
+    write_json(paths['json'], model, objective, args.cols, args.ub)
+
+    return paths
+
+
+# -- measurement -------------------------------------------------------------------------------------------------------
+
+def load_registries():
+    """
+    Returns the readers and writers registries of the parse script.
+    """
+    parse = imp.load_source('parse_script', os.path.join(ROOT, 'parse'))
+    return parse.readers, parse.writers
+
+
+class FZNIMFReader(FZNReader):
+    """
+    Reads a textual fznimf stream as produced by gecode/fz (without -b).
+    """
+
+    def parse(self, input_file, **kwargs):
+        self.converter.set_instance_name(os.path.basename(os.path.splitext(input_file)[0]))
+        with open(input_file) as f:
+            self.parse_instance(f)
+        return True
+
+
+def convert(reader_name, writer_name, path):
+    """
+    Converts path in the current process and returns the measurements as a dict.
+    """
+    readers, writers = load_registries()
+    reader = FZNIMFReader() if reader_name == 'fzn' else readers[reader_name]()
+    converter = ILPParser(reader, writers[writer_name]())
+
+    instrumentation.enable()
+    outdir = tempfile.mkdtemp()
+    try:
+        converter.parse_input(path)
+        nnz = converter.constraint_matrix.nnz()
+        converter.write_output(outdir, name='instance')
+    finally:
+        shutil.rmtree(outdir)
+
+    phases = dict([(name, instrumentation.phases[name]) for name in instrumentation.phase_order])
+    wall = sum([phases[name][1] for name in ('read', 'write') if name in phases])
+    cpu = sum([phases[name][2] for name in ('read', 'write') if name in phases])
+
+    return {
+        'nnz': nnz,
+        'read': phases['read'][1],
+        'write': phases['write'][1],
+        'wall': wall,
+        'cpu': cpu,
+        'nnz_per_s': nnz / wall if wall > 0 else None,
+        'peak_rss': instrumentation.peak_rss(),
+        'counters': instrumentation.counters
+    }
+
+
+def measure(reader_name, writer_name, path, timeout):
+    """
+    Converts path in a fresh process, thus the peak RSS isn't inflated by earlier conversions. The process is killed
+    after timeout seconds, e.g. the order encoding of a knapsack constraint (dimacs) grows exponentially.
+    """
+    sub = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--run', reader_name, writer_name, path],
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    timer = threading.Timer(timeout, sub.kill)
+    timer.start()
+    try:
+        out, err = sub.communicate()
+    finally:
+        timer.cancel()
+
+    if sub.returncode == -signal.SIGKILL:
+        return {'error': 'timeout after %ds' % timeout}
+    elif sub.returncode != 0:
+        lines = [line for line in err.splitlines() if line.strip()]
+        return {'error': lines[-1] if lines else 'exit code %d' % sub.returncode}
+    return json.loads(out.splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# -- reports -----------------------------------------------------------------------------------------------------------
+
+def format_number(value, fmt):
+    return fmt % value if value is not None else '-'
+
+
+def print_results(results):
+    print '%-10s %-10s %8s %10s %10s %12s %10s' % ('reader', 'writer', 'nnz', 'read [s]', 'write [s]', 'nnz/s',
+                                                   'RSS [KiB]')
+    for result in results:
+        if 'error' in result:
+            print '%-10s %-10s  failed: %s' % (result['reader'], result['writer'], result['error'])
+            continue
+        print '%-10s %-10s %8d %10.3f %10.3f %12s %10s' % (result['reader'], result['writer'], result['nnz'],
+                                                           result['read'], result['write'],
+                                                           format_number(result['nnz_per_s'], '%.0f'),
+                                                           format_number(result['peak_rss'], '%d'))
+
+
+def compare(old_path, new_path):
+    """
+    Prints the throughput and peak RSS of the pairs of two result files, a ratio above 1 means the new one is faster
+    or uses more memory.
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    if old['parameters'] != new['parameters']:
+        sys.stderr.write('WARNING: the results were measured with different parameters\n')
+
+    old_results = dict([((r['reader'], r['writer']), r) for r in old['results'] if 'error' not in r])
+
+    print '%s -> %s' % (old['commit'], new['commit'])
+    print '%-10s %-10s %12s %12s %8s %10s %10s %8s' % ('reader', 'writer', 'old nnz/s', 'new nnz/s', 'ratio',
+                                                       'old RSS', 'new RSS', 'ratio')
+    for result in new['results']:
+        key = result['reader'], result['writer']
+        if 'error' in result or key not in old_results:
+            continue
+        before = old_results[key]
+        speed = result['nnz_per_s'] / before['nnz_per_s'] if result['nnz_per_s'] and before['nnz_per_s'] else None
+        rss = float(result['peak_rss']) / before['peak_rss'] if result['peak_rss'] and before['peak_rss'] else None
+        print '%-10s %-10s %12s %12s %8s %10s %10s %8s' % (
+            key[0], key[1], format_number(before['nnz_per_s'], '%.0f'), format_number(result['nnz_per_s'], '%.0f'),
+            format_number(speed, '%.2fx'), format_number(before['peak_rss'], '%d'),
+            format_number(result['peak_rss'], '%d'), format_number(rss, '%.2fx'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times every reader -> writer pair of parse on synthetic instances.')
+    parser.add_argument('--rows', '-r', type=int, default=200, help='number of rows of the sparse model')
+    parser.add_argument('--cols', '-c', type=int, default=100, help='number of columns (knapsack items)')
+    parser.add_argument('--density', '-d', type=float, default=0.05, help='fraction of nonzeros per row')
+    parser.add_argument('--ub', '-u', type=int, default=3, help='upper bound of the domains [0, UB]')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--timeout', '-t', type=int, default=60, help='seconds per conversion')
+    parser.add_argument('--repeat', type=int, default=3, help='conversions per pair, the fastest is kept')
+    parser.add_argument('--reader', action='append', help='only benchmark the given reader(s)')
+    parser.add_argument('--writer', action='append', help='only benchmark the given writer(s)')
+    parser.add_argument('--output', '-o', help='result file, default is benchmarks/results/<commit>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files')
+    parser.add_argument('--run', nargs=3, metavar=('READER', 'WRITER', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print json.dumps(convert(*args.run))
+        return
+    elif args.compare:
+        compare(*args.compare)
+        return
+
+    readers, writers = load_registries()
+    directory = tempfile.mkdtemp()
+    try:
+        paths = generate(directory, args)
+        results = []
+        for reader_name in sorted(readers):
+            if args.reader and reader_name not in args.reader:
+                continue
+            for writer_name in sorted(writers):
+                if args.writer and writer_name not in args.writer:
+                    continue
+                # the fastest of the repeated conversions is kept
+                result = measure(reader_name, writer_name, paths[reader_name], args.timeout)
+                for _ in xrange(args.repeat - 1):
+                    if 'error' in result:
+                        break
+                    result = min(result, measure(reader_name, writer_name, paths[reader_name], args.timeout),
+                                 key=lambda r: r.get('wall', float('inf')))
+                result.update(reader=reader_name, writer=writer_name)
+                results.append(result)
+    finally:
+        shutil.rmtree(directory)
+
+    print_results(results)
+
+    commit = git_revision()
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', '%s.json' % commit)
+    if not os.path.isdir(os.path.dirname(os.path.abspath(output))):
+        os.makedirs(os.path.dirname(os.path.abspath(output)))
+
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': sys.version.split()[0],
+            'parameters': {'rows': args.rows, 'cols': args.cols, 'density': args.density, 'ub': args.ub,
+                           'seed': args.seed, 'repeat': args.repeat},
+            'results': results
+        }, f, indent=1, sort_keys=True)
+    sys.stderr.write('results written to %s\n' % output)
+
+
+if __name__ == '__main__':
+    main()
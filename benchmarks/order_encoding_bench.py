@@ -0,0 +1,71 @@
+"""
+Microbenchmark of OrderEncoding.encode on linear constraints of growing length.
+
+Compares the precomputed suffix bound sums against re-summing the bounds of the remaining views at every recursion
+level and loop iteration, as OrderEncoding did before.
+
+    python benchmarks/order_encoding_bench.py [-r REPEAT] [LENGTH ...]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from illogic.domains.closed_domain import ClosedDomain
+from illogic.order_encoding.constraint import Constraint
+from illogic.order_encoding.order_encoding import OrderEncoding
+
+
+class ResummedBounds(object):
+    """
+    Drop-in for the suffix sum lists which sums the bounds of views[i:] on every access.
+    """
+
+    def __init__(self, bound, views):
+        self.bound = bound
+        self.views = views
+
+    def __getitem__(self, i):
+        return sum([self.bound(v) for v in self.views[i:]])
+
+
+class ResummingOrderEncoding(OrderEncoding):
+    def _build_views(self, views):
+        variables, weights, _, _ = OrderEncoding._build_views(self, views)
+        return variables, weights, ResummedBounds(self.lb, views), ResummedBounds(self.ub, views)
+
+
+def instance(length, size):
+    """
+    Builds sum(x_i) >= length * (size - 1) - 1 over x_i in [0, size), which needs every suffix of the constraint.
+    """
+    variables = ['x%d' % i for i in xrange(length)]
+    dom = {var: ClosedDomain(range(size)) for var in variables}
+    lb = dict.fromkeys(variables, 0)
+    ub = dict.fromkeys(variables, size - 1)
+    return dom, lb, ub, Constraint([(var, 1) for var in variables], length * (size - 1) - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times OrderEncoding.encode on constraints of the given lengths.')
+    parser.add_argument('lengths', type=int, nargs='*', default=[5, 10, 20, 30, 40, 50])
+    parser.add_argument('--size', '-s', type=int, default=4, help='domain size of each variable')
+    parser.add_argument('--repeat', '-r', type=int, default=5)
+    args = parser.parse_args()
+
+    print '%8s %10s %14s %14s %8s' % ('length', 'clauses', 'resummed [ms]', 'suffix [ms]', 'speedup')
+    for length in args.lengths:
+        dom, lb, ub, constraint = instance(length, args.size)
+        times = []
+        for cls in (ResummingOrderEncoding, OrderEncoding):
+            encoder = cls(dom, lb, ub)
+            times.append(min(timeit.repeat(lambda: encoder.encode(constraint), number=1, repeat=args.repeat)))
+        clauses = len(OrderEncoding(dom, lb, ub).encode(constraint))
+        print '%8d %10d %14.2f %14.2f %7.1fx' % (length, clauses, times[0] * 1000, times[1] * 1000,
+                                                 times[0] / times[1])
+
+
+if __name__ == '__main__':
+    main()
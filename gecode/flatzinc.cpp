@@ -64,19 +64,27 @@ void IntVar::printDefinition(FlatZincModel& m) const
             m.addInteger(p->min);
             m.addInteger(p->max);
             unsigned int comp = m.getNewTerm();
-            std::cout << "[INT] x" << id_ << " [" << p->min << ".." << p->max << "]\n";
+            Fznimf::text() << "[INT] x" << id_ << " [" << p->min << ".." << p->max << "]\n";
+            if (Fznimf::binary) {
+                Fznimf::record(Fznimf::INT, {int(id_), p->min, p->max});
+            }
         }
         else
         {
-            std::cout << "[INT] x" << id_;
+            Fznimf::text() << "[INT] x" << id_;
             for (unsigned int i = 0; i < p->s.size(); ++i)
             {
                 elems.emplace_back(m.getNewElement());
                 unsigned int e = m.addInteger(p->s[i]);
-                std::cout << p->s[i] << ",";
+                Fznimf::text() << p->s[i] << ",";
             }
 
-            std::cout << "\n";
+            Fznimf::text() << "\n";
+            if (Fznimf::binary) {
+                std::vector<int> values{int(id_)};
+                values.insert(values.end(), p->s.begin(), p->s.end());
+                Fznimf::record(Fznimf::INT_SET, values);
+            }
         }
      }
 }
@@ -245,7 +253,10 @@ void IntVar::printDefinition(FlatZincModel& m) const
 //    std::cout << THEORY << " " << ELEMENT << " " << elem << " 1 " << id << " 0\n";
 //    std::cout << THEORY << " " << ATOM << " 0 0 " << getSymbolUid("minimize") << " ";
 //    std::cout << "1" << " " << elem << "\n";
-    std::cout << "[OPTIMIZATION] minimize x" << id << "\n";
+    Fznimf::text() << "[OPTIMIZATION] minimize x" << id << "\n";
+    if (Fznimf::binary) {
+      Fznimf::record(Fznimf::OPTIMIZATION, {0, int(id)});
+    }
 
     //std::cout << "TODO: minimize" << std::endl;
     //iv[var]
@@ -279,7 +290,10 @@ void IntVar::printDefinition(FlatZincModel& m) const
 //      std::cout << THEORY << " " << ELEMENT << " " << elem << " 1 " << term << " 0\n";
 //      std::cout << THEORY << " " << ATOM << " 0 0 " << getSymbolUid("minimize") << " ";
 //      std::cout << "1" << " " << elem << "\n";
-      std::cout << "[OPTIMIZATION] maximize x" << id << "\n";
+      Fznimf::text() << "[OPTIMIZATION] maximize x" << id << "\n";
+      if (Fznimf::binary) {
+        Fznimf::record(Fznimf::OPTIMIZATION, {1, int(id)});
+      }
       
 //    _method = MAX;
 //    _optVar = var;
@@ -46,6 +46,7 @@
 #include "conexpr.hh"
 #include "ast.hh"
 #include "varspec.hh"
+#include "fznimf.hh"
 
 /**
  * \namespace FlatZinc
@@ -119,7 +120,10 @@ const int ATOMWITHBOUND = 6;
       void printDefinition(FlatZincModel &m) const {
           assert(!vs_->alias);
           /// {x}
-          std::cout << "[BOOL] b" << id_ << "\n";
+          Fznimf::text() << "[BOOL] b" << id_ << "\n";
+          if (Fznimf::binary) {
+              Fznimf::record(Fznimf::BOOL, {int(id_)});
+          }
           /*if (vs_->assigned) {
               /// :- x or :- not x
               std::cout << "1 0 0 0 1 ";
@@ -44,12 +44,17 @@ using namespace std;
 
 int main(int argc, char** argv) {
 
-  if (argc!=2) {
-    cerr << "Usage: " << argv[0] << " <file>" << endl;
+  bool binary = argc==3 && !strcmp(argv[1], "-b");
+  if (argc!=2 && !binary) {
+    cerr << "Usage: " << argv[0] << " [-b] <file>" << endl;
+    cerr << "  -b  write the binary fznimf format" << endl;
     exit(EXIT_FAILURE);
   }
   
-  const char* filename = argv[1];
+  const char* filename = argv[argc-1];
+  if (binary) {
+    FlatZinc::Fznimf::setBinary();
+  }
   
   FlatZinc::Printer p;
   FlatZinc::FlatZincModel* fg = NULL;
@@ -0,0 +1,71 @@
+#include "fznimf.hh"
+
+#include <cstdlib>
+#include <iostream>
+
+namespace FlatZinc {
+
+  namespace Fznimf {
+
+    bool binary = false;
+
+    namespace {
+
+      /// the relations of LINEAR and REIFIED records, encoded by their index
+      const char* relations[] = {"=", "!=", "<", ">", "<=", ">="};
+
+      std::ostream discard(NULL);
+
+      int relation(const std::string& op) {
+        for (int i = 0; i < 6; ++i) {
+          if (op == relations[i]) {
+            return i;
+          }
+        }
+        std::cerr << "Error: unknown relation " << op << "\n";
+        std::exit(1);
+      }
+
+      void put(unsigned int v) {
+        char bytes[4] = {char(v & 0xff), char((v >> 8) & 0xff), char((v >> 16) & 0xff), char((v >> 24) & 0xff)};
+        std::cout.write(bytes, 4);
+      }
+
+    }
+
+    void setBinary(void) {
+      binary = true;
+      std::cout.write("FZNIMFB1", 8);
+    }
+
+    std::ostream& text(void) {
+      return binary ? discard : std::cout;
+    }
+
+    void record(Record kind, const std::vector<int>& values) {
+      std::cout.put(char(kind));
+      put(values.size());
+      for (int v : values) {
+        put(static_cast<unsigned int>(v));
+      }
+    }
+
+    void linear(const std::string& op, int rhs, const std::vector<int>& coeffs,
+                const std::vector<int>& ids) {
+      std::vector<int> values{relation(op), rhs};
+      values.insert(values.end(), coeffs.begin(), coeffs.end());
+      values.insert(values.end(), ids.begin(), ids.end());
+      record(LINEAR, values);
+    }
+
+    void reified(const std::string& op, int rhs, int b, const std::vector<int>& coeffs,
+                 const std::vector<int>& ids) {
+      std::vector<int> values{relation(op), rhs, b};
+      values.insert(values.end(), coeffs.begin(), coeffs.end());
+      values.insert(values.end(), ids.begin(), ids.end());
+      record(REIFIED, values);
+    }
+
+  }
+
+}
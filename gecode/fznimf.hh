@@ -0,0 +1,60 @@
+/*
+ *  Output of the fznimf records, see fznimf_syntax.txt.
+ *
+ *  The records are printed as text by the constraint posters via text(). If binary mode is selected
+ *  (fz -b), text() discards its input and the posters write the records with record() instead:
+ *
+ *    header  ::= "FZNIMFB1"
+ *    record  ::= kind:uint8 n:uint32 value:int32*n     (little endian)
+ *
+ *  The kinds and their values are listed in Fznimf::Record.
+ */
+
+#ifndef __FLATZINC_FZNIMF_HH__
+#define __FLATZINC_FZNIMF_HH__
+
+#include <ostream>
+#include <string>
+#include <vector>
+
+namespace FlatZinc {
+
+  namespace Fznimf {
+
+    enum Record {
+      INT = 1,          ///< id, lb, ub
+      INT_SET,          ///< id, values of the domain
+      BOOL,             ///< id
+      LINEAR,           ///< relation, rhs, coefficients, ids
+      REIFIED,          ///< relation, rhs, bool id, coefficients, ids
+      ALLDIFFERENT,     ///< ids
+      OPTIMIZATION,     ///< 0 (minimize) or 1 (maximize), id
+      DISJUNCTION,      ///< literals: bool ids, negative if negated, without constants
+      BOOL2INT          ///< bool id (1 true, 2 false), int id
+    };
+
+    /// whether the records are written in the binary format
+    extern bool binary;
+
+    /// selects the binary format and writes its header
+    void setBinary(void);
+
+    /// stream of the textual records, discards everything in binary mode
+    std::ostream& text(void);
+
+    /// writes a binary record
+    void record(Record kind, const std::vector<int>& values);
+
+    /// writes a binary LINEAR record
+    void linear(const std::string& op, int rhs, const std::vector<int>& coeffs,
+                const std::vector<int>& ids);
+
+    /// writes a binary REIFIED record
+    void reified(const std::string& op, int rhs, int b, const std::vector<int>& coeffs,
+                 const std::vector<int>& ids);
+
+  }
+
+}
+
+#endif
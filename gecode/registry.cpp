@@ -42,6 +42,7 @@
 #include "registry.hh"
 #include "flatzinc.hh"
 #include "ast.hh"
+#include "fznimf.hh"
 
 const bool debug = false;
 
@@ -72,7 +73,7 @@ namespace FlatZinc {
 
         void print2var(FlatZincModel &s, const ConExpr &ce, AST::Node *ann, const std::string &op) {
             if (debug) {
-                std::cout << "print2var";
+                Fznimf::text() << "print2var";
             }
 
             s.addSymbol(op);
@@ -106,17 +107,26 @@ namespace FlatZinc {
             }
 
             if (var_only) {
-                std::cout << "[CONSTRAINT] x" << id1 << " - x" << id2 << " " << op << "0\n";
+                Fznimf::text() << "[CONSTRAINT] x" << id1 << " - x" << id2 << " " << op << "0\n";
+                if (Fznimf::binary) {
+                    Fznimf::linear(op, 0, {1, -1}, {int(id1), int(id2)});
+                }
             } else if (ce[0]->isInt()) {
-                std::cout << "[CONSTRAINT] -x" << id2 << " " << op << " -" << v1 << "\n";
+                Fznimf::text() << "[CONSTRAINT] -x" << id2 << " " << op << " -" << v1 << "\n";
+                if (Fznimf::binary) {
+                    Fznimf::linear(op, -v1, {-1}, {int(id2)});
+                }
             } else {
-                std::cout << "[CONSTRAINT] x" << id1 << " " << op << " " << v2 << "\n";
+                Fznimf::text() << "[CONSTRAINT] x" << id1 << " " << op << " " << v2 << "\n";
+                if (Fznimf::binary) {
+                    Fznimf::linear(op, v2, {1}, {int(id1)});
+                }
             }
         }
 
         void print2var_reif(FlatZincModel &s, const ConExpr &ce, AST::Node *ann, const std::string &op) {
             if (debug) {
-                std::cout << "print2varreif";
+                Fznimf::text() << "print2varreif";
             }
 
             s.addSymbol(op);
@@ -164,43 +174,72 @@ namespace FlatZinc {
             }
 
             if (var_only) {
-                std::cout << "[REIFIED] x" << id1 << " - x" << id2 << " " << op << " 0 <-> b" << id3 << "\n";
+                Fznimf::text() << "[REIFIED] x" << id1 << " - x" << id2 << " " << op << " 0 <-> b" << id3 << "\n";
+                if (Fznimf::binary) {
+                    Fznimf::reified(op, 0, id3, {1, -1}, {int(id1), int(id2)});
+                }
             } else if (ce[0]->isInt()) {
-                std::cout << "[REIFIED] -x" << id2 << " " << op << " -" << v1 << " <-> b" << id3 << "\n";
+                Fznimf::text() << "[REIFIED] -x" << id2 << " " << op << " -" << v1 << " <-> b" << id3 << "\n";
+                if (Fznimf::binary) {
+                    Fznimf::reified(op, -v1, id3, {-1}, {int(id2)});
+                }
             } else {
-                std::cout << "[REIFIED] x" << id1 << " " << op << " " << v2 << " <-> b" << id3 << "\n";
+                Fznimf::text() << "[REIFIED] x" << id1 << " " << op << " " << v2 << " <-> b" << id3 << "\n";
+                if (Fznimf::binary) {
+                    Fznimf::reified(op, v2, id3, {1}, {int(id1)});
+                }
             }
         }
 
         void print_clause(std::vector<int> &pos, std::vector<int> &neg, FlatZincModel &s) {
             int i;
 
-            std::cout << "[DISJUNCTION] ";
+            Fznimf::text() << "[DISJUNCTION] ";
 
             for (i = 0; i < pos.size(); i++) {
                 if (pos[i] == s.getFalseUid() || pos[i] == -s.getTrueUid()) {
-                    std::cout << "0 ";
+                    Fznimf::text() << "0 ";
                 } else if (pos[i] == s.getTrueUid()) {
-                    std::cout << "1 ";
+                    Fznimf::text() << "1 ";
                 } else {
-                    std::cout << "b" << pos[i] << " ";
+                    Fznimf::text() << "b" << pos[i] << " ";
                 }
             }
             for (i = 0; i < neg.size(); i++) {
                 if (neg[i] == s.getTrueUid()) {
-                    std::cout << "0 ";
+                    Fznimf::text() << "0 ";
                 } else if (neg[i] == s.getFalseUid()) {
-                    std::cout << "1 ";
+                    Fznimf::text() << "1 ";
                 } else {
-                    std::cout << "-b" << neg[i] << " ";
+                    Fznimf::text() << "-b" << neg[i] << " ";
                 }
             }
 
-            std::cout << "\n";
+            Fznimf::text() << "\n";
+
+            if (Fznimf::binary) {
+                // satisfied clauses are dropped, like false literals
+                std::vector<int> literals;
+                for (i = 0; i < pos.size(); i++) {
+                    if (pos[i] == s.getTrueUid()) {
+                        return;
+                    } else if (pos[i] != s.getFalseUid() && pos[i] != -s.getTrueUid()) {
+                        literals.push_back(pos[i]);
+                    }
+                }
+                for (i = 0; i < neg.size(); i++) {
+                    if (neg[i] == s.getFalseUid()) {
+                        return;
+                    } else if (neg[i] != s.getTrueUid()) {
+                        literals.push_back(-neg[i]);
+                    }
+                }
+                Fznimf::record(Fznimf::DISJUNCTION, literals);
+            }
         }
 
         void print_fact(int fact) {
-            std::cout << "[FACT] " << fact << "\n";
+            Fznimf::text() << "[FACT] " << fact << "\n";
         }
 
         /// a = b
@@ -273,7 +312,7 @@ namespace FlatZinc {
 
         void print_int_lin(FlatZincModel &s, const ConExpr &ce, AST::Node *ann, const std::string &op) {
             if (debug) {
-                std::cout << "print_int_lin";
+                Fznimf::text() << "print_int_lin";
             }
             const auto &coeffs = ce[0]->getArray()->a;
             const auto &vars   = ce[1]->getArray()->a;
@@ -281,11 +320,12 @@ namespace FlatZinc {
                 std::cerr << (*ce[0]) << " has not the same size as " << (*ce[1]) << std::endl;
             }
             std::vector<unsigned int> uids;
+            std::vector<int>          term_coeffs, term_ids;
             s.addSymbol("*");
             s.addSymbol("sum");
             s.addSymbol(op);
 
-            std::cout << "[CONSTRAINT] ";
+            Fznimf::text() << "[CONSTRAINT] ";
 
             int               rhs = ce[2]->getInt();
             for (unsigned int i   = 0; i != vars.size(); ++i) {
@@ -298,11 +338,13 @@ namespace FlatZinc {
 
                     // terms in constraint
                     // std::cout << coeffs[i]->getInt() << "x" << vars[i]->getIntVar() << " ";
-                    std::cout << coeffs[i]->getInt() << "x" << s.getIntVariableUid(vars[i]->getIntVar()) << " ";
+                    Fznimf::text() << coeffs[i]->getInt() << "x" << s.getIntVariableUid(vars[i]->getIntVar()) << " ";
+                    term_coeffs.push_back(coeffs[i]->getInt());
+                    term_ids.push_back(s.getIntVariableUid(vars[i]->getIntVar()));
                     uids.emplace_back(s.getNewElement());
 
                     if (vars.size() > i + 1) {
-                        std::cout << "+ ";
+                        Fznimf::text() << "+ ";
                     }
                 }
             }
@@ -313,13 +355,16 @@ namespace FlatZinc {
 //            std::cout << uid << " "; // TODO
             }
 
-            std::cout << op << " " << rhs << "\n";
+            Fznimf::text() << op << " " << rhs << "\n";
+            if (Fznimf::binary) {
+                Fznimf::linear(op, rhs, term_coeffs, term_ids);
+            }
         }
 
 
         void print_int_lin_reif(FlatZincModel &s, const ConExpr &ce, AST::Node *ann, const std::string &op) {
             if (debug) {
-                std::cout << "print_int_lin_reif";
+                Fznimf::text() << "print_int_lin_reif";
             }
             const auto &coeffs = ce[0]->getArray()->a;
             const auto &vars   = ce[1]->getArray()->a;
@@ -327,11 +372,12 @@ namespace FlatZinc {
                 std::cerr << (*ce[0]) << " has not the same size as " << (*ce[1]) << std::endl;
             }
             std::vector<unsigned int> uids;
+            std::vector<int>          term_coeffs, term_ids;
             s.addSymbol("*");
             s.addSymbol("sum");
             s.addSymbol(op);
 
-            std::cout << "[REIFIED] ";
+            Fznimf::text() << "[REIFIED] ";
 
             int               rhs = ce[2]->getInt();
             for (unsigned int i   = 0; i != vars.size(); ++i) {
@@ -344,11 +390,13 @@ namespace FlatZinc {
 
                     // terms in constraint
                     // std::cout << coeffs[i]->getInt() << "x" << vars[i]->getIntVar() << " ";
-                    std::cout << coeffs[i]->getInt() << "x" << s.getIntVariableUid(vars[i]->getIntVar());
+                    Fznimf::text() << coeffs[i]->getInt() << "x" << s.getIntVariableUid(vars[i]->getIntVar());
+                    term_coeffs.push_back(coeffs[i]->getInt());
+                    term_ids.push_back(s.getIntVariableUid(vars[i]->getIntVar()));
 
                     uids.emplace_back(s.getNewElement());
                     if (i != vars.size() - 1) {
-                        std::cout << " + ";
+                        Fznimf::text() << " + ";
                     }
                 }
             }
@@ -368,8 +416,11 @@ namespace FlatZinc {
                 id3 = s.getBoolVariableUid(ce[3]->getBoolVar());
             }
 
-            std::cout << " " << op << " " << rhs << " <-> b" << id3;
-            std::cout << "\n";
+            Fznimf::text() << " " << op << " " << rhs << " <-> b" << id3;
+            Fznimf::text() << "\n";
+            if (Fznimf::binary) {
+                Fznimf::reified(op, rhs, id3, term_coeffs, term_ids);
+            }
         }
 
 
@@ -450,7 +501,7 @@ namespace FlatZinc {
 
         void p_int_plus(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
             if (debug) {
-                std::cout << "print_int_plus";
+                Fznimf::text() << "print_int_plus";
             }
 
             s.addSymbol("=");
@@ -458,6 +509,7 @@ namespace FlatZinc {
             unsigned int elem1 = s.getNewElement();
             unsigned int id1;
             int          rhs   = 0;
+            std::vector<int> term_coeffs, term_ids;
 
             if (ce[0]->isInt() && ce[1]->isInt() && ce[2]->isInt()) {
                 std::cerr << "Error: variable free constraints are not supported \n";
@@ -465,14 +517,16 @@ namespace FlatZinc {
                 exit(1);
             }
 
-            std::cout << "[CONSTRAINT] ";
+            Fznimf::text() << "[CONSTRAINT] ";
 
             if (ce[0]->isInt()) {
                 rhs -= ce[0]->getInt();
                 id1 = s.addInteger(ce[0]->getInt());
             } else {
                 id1 = s.getIntVariableUid(ce[0]->getIntVar());
-                std::cout << "+ x" << id1 << " ";
+                Fznimf::text() << "+ x" << id1 << " ";
+                term_coeffs.push_back(1);
+                term_ids.push_back(id1);
             }
             unsigned int elem2 = s.getNewElement();
             unsigned int id2;
@@ -481,7 +535,9 @@ namespace FlatZinc {
                 id2 = s.addInteger(ce[1]->getInt());
             } else {
                 id2 = s.getIntVariableUid(ce[1]->getIntVar());
-                std::cout << "+ x" << id2 << " ";
+                Fznimf::text() << "+ x" << id2 << " ";
+                term_coeffs.push_back(1);
+                term_ids.push_back(id2);
             }
 
             unsigned int id3;
@@ -490,15 +546,20 @@ namespace FlatZinc {
                 id3 = s.addInteger(ce[2]->getInt());
             } else {
                 id3 = s.getIntVariableUid(ce[2]->getIntVar());
-                std::cout << "- x" << id3 << " ";
+                Fznimf::text() << "- x" << id3 << " ";
+                term_coeffs.push_back(-1);
+                term_ids.push_back(id3);
             }
 
-            std::cout << "= " << rhs << "\n";
+            Fznimf::text() << "= " << rhs << "\n";
+            if (Fznimf::binary) {
+                Fznimf::linear("=", rhs, term_coeffs, term_ids);
+            }
         }
 
         void p_int_minus(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
             if (debug) {
-                std::cout << "print_int_plus";
+                Fznimf::text() << "print_int_plus";
             }
 
             s.addSymbol("=");
@@ -506,6 +567,7 @@ namespace FlatZinc {
             unsigned int elem1 = s.getNewElement();
             unsigned int id1;
             int          rhs   = 0;
+            std::vector<int> term_coeffs, term_ids;
 
             if (ce[0]->isInt() && ce[1]->isInt() && ce[2]->isInt()) {
                 std::cerr << "Error: variable free constraints are not supported \n";
@@ -513,14 +575,16 @@ namespace FlatZinc {
                 exit(1);
             }
 
-            std::cout << "[CONSTRAINT] ";
+            Fznimf::text() << "[CONSTRAINT] ";
 
             if (ce[0]->isInt()) {
                 rhs -= ce[0]->getInt();
                 id1 = s.addInteger(ce[0]->getInt());
             } else {
                 id1 = s.getIntVariableUid(ce[0]->getIntVar());
-                std::cout << "+ x" << id1 << " ";
+                Fznimf::text() << "+ x" << id1 << " ";
+                term_coeffs.push_back(1);
+                term_ids.push_back(id1);
             }
             unsigned int elem2 = s.getNewElement();
             unsigned int id2;
@@ -529,7 +593,9 @@ namespace FlatZinc {
                 id2 = s.addInteger(ce[1]->getInt());
             } else {
                 id2 = s.getIntVariableUid(ce[1]->getIntVar());
-                std::cout << "- x" << id2 << " ";
+                Fznimf::text() << "- x" << id2 << " ";
+                term_coeffs.push_back(-1);
+                term_ids.push_back(id2);
             }
 
             unsigned int id3;
@@ -538,10 +604,15 @@ namespace FlatZinc {
                 id3 = s.addInteger(ce[2]->getInt());
             } else {
                 id3 = s.getIntVariableUid(ce[2]->getIntVar());
-                std::cout << "- x" << id3 << " ";
+                Fznimf::text() << "- x" << id3 << " ";
+                term_coeffs.push_back(-1);
+                term_ids.push_back(id3);
             }
 
-            std::cout << "= " << rhs << "\n";
+            Fznimf::text() << "= " << rhs << "\n";
+            if (Fznimf::binary) {
+                Fznimf::linear("=", rhs, term_coeffs, term_ids);
+            }
         }
 
         void p_int_times(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
@@ -581,7 +652,7 @@ namespace FlatZinc {
 
         void p_bool_eq(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
             if (debug) {
-                std::cout << "p_bool_eq";
+                Fznimf::text() << "p_bool_eq";
             }
 
             int id1;
@@ -613,7 +684,7 @@ namespace FlatZinc {
 
         void p_bool_eq_reif(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
             if (debug) {
-                std::cout << "p_bool_eq_reif";
+                Fznimf::text() << "p_bool_eq_reif";
             }
 
             int id1;
@@ -664,7 +735,7 @@ namespace FlatZinc {
 
         void p_bool_ne(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
             if (debug) {
-                std::cout << "p_bool_ne";
+                Fznimf::text() << "p_bool_ne";
             }
             //std::cerr << "bool_ne("<<(*ce[0])<<","<<(*ce[1])
             //  <<")::"<<(*ann)<<"\n";
@@ -689,13 +760,13 @@ namespace FlatZinc {
                 id2 = s.getBoolVariableUid(ce[1]->getBoolVar());
             }
 
-            std::cout << "1 0 0 0 2 " << id1 << " " << id2 << "\n";
-            std::cout << "1 0 0 0 2 " << -id1 << " " << -id2 << "\n";
+            Fznimf::text() << "1 0 0 0 2 " << id1 << " " << id2 << "\n";
+            Fznimf::text() << "1 0 0 0 2 " << -id1 << " " << -id2 << "\n";
         }
 
         void p_bool_ne_reif(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
             if (debug) {
-                std::cout << "p_bool_ne_reif";
+                Fznimf::text() << "p_bool_ne_reif";
             }
             //std::cerr << "bool_ne_reif("<<(*ce[0])<<","<<(*ce[1])<<","<<(*ce[2])
             //  <<")::"<<(*ann)<<"\n";
@@ -731,10 +802,10 @@ namespace FlatZinc {
                 id3 = s.getBoolVariableUid(ce[2]->getBoolVar());
             }
 
-            std::cout << "1 0 0 0 3 " << id1 << " " << id2 << " " << id3 << "\n";
-            std::cout << "1 0 0 0 3 " << -id1 << " " << -id2 << " " << id3 << "\n";
-            std::cout << "1 0 0 0 3 " << id1 << " " << -id2 << " " << -id3 << "\n";
-            std::cout << "1 0 0 0 3 " << -id1 << " " << id2 << " " << -id3 << "\n";
+            Fznimf::text() << "1 0 0 0 3 " << id1 << " " << id2 << " " << id3 << "\n";
+            Fznimf::text() << "1 0 0 0 3 " << -id1 << " " << -id2 << " " << id3 << "\n";
+            Fznimf::text() << "1 0 0 0 3 " << id1 << " " << -id2 << " " << -id3 << "\n";
+            Fznimf::text() << "1 0 0 0 3 " << -id1 << " " << id2 << " " << -id3 << "\n";
         }
     }
 
@@ -777,7 +848,7 @@ namespace FlatZinc {
 
     void p_bool_le_reif(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_bool_le_reif";
+            Fznimf::text() << "p_bool_le_reif";
         }
 
         int id1;
@@ -860,7 +931,7 @@ namespace FlatZinc {
 
     void p_bool_lt_reif(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_bool_lt_reif";
+            Fznimf::text() << "p_bool_lt_reif";
         }
 
         int id1;
@@ -911,7 +982,7 @@ namespace FlatZinc {
 
     void p_bool_or(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_bool_or";
+            Fznimf::text() << "p_bool_or";
         }
         //std::cerr << "bool_or("<<(*ce[0])<<","<<(*ce[1])<<","<<(*ce[2])
         //  <<")::"<<(*ann)<<"\n";
@@ -946,14 +1017,14 @@ namespace FlatZinc {
         } else {
             id3 = s.getBoolVariableUid(ce[2]->getBoolVar());
         }
-        std::cout << "1 0 0 0 2 " << id1 << " " << -id3 << "\n";
-        std::cout << "1 0 0 0 2 " << id2 << " " << -id3 << "\n";
-        std::cout << "1 0 0 0 3 " << -id1 << " " << -id2 << " " << id3 << "\n";
+        Fznimf::text() << "1 0 0 0 2 " << id1 << " " << -id3 << "\n";
+        Fznimf::text() << "1 0 0 0 2 " << id2 << " " << -id3 << "\n";
+        Fznimf::text() << "1 0 0 0 3 " << -id1 << " " << -id2 << " " << id3 << "\n";
     }
 
     void p_bool_and(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_bool_and";
+            Fznimf::text() << "p_bool_and";
         }
 
         int id1, id2, id3;
@@ -998,7 +1069,7 @@ namespace FlatZinc {
 
     void p_array_bool_and(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_array_bool_and";
+            Fznimf::text() << "p_array_bool_and";
         }
 
         int idreif;
@@ -1012,28 +1083,28 @@ namespace FlatZinc {
             idreif = s.getBoolVariableUid(ce[1]->getBoolVar());
         }
 
-        std::cout << "1 0 0 0 " << ce[0]->getArray()->a.size() + 1 << " ";
+        Fznimf::text() << "1 0 0 0 " << ce[0]->getArray()->a.size() + 1 << " ";
         for (const auto &i : ce[0]->getArray()->a) {
             if (i->isBool()) {
                 if (i->getBool()) {
-                    std::cout << s.getTrueUid() << " ";
+                    Fznimf::text() << s.getTrueUid() << " ";
                 } else {
-                    std::cout << s.getFalseUid() << " ";
+                    Fznimf::text() << s.getFalseUid() << " ";
                 }
             } else {
-                std::cout << s.getBoolVariableUid(i->getBoolVar()) << " ";
+                Fznimf::text() << s.getBoolVariableUid(i->getBoolVar()) << " ";
             }
         }
-        std::cout << -(int) (idreif) << "\n";
+        Fznimf::text() << -(int) (idreif) << "\n";
         for (const auto &i : ce[0]->getArray()->a) {
             if (i->isBool()) {
                 if (i->getBool()) {
-                    std::cout << "1 0 0 0 2 " << s.getFalseUid() << " " << idreif << "\n";
+                    Fznimf::text() << "1 0 0 0 2 " << s.getFalseUid() << " " << idreif << "\n";
                 } else {
-                    std::cout << "1 0 0 0 2 " << s.getTrueUid() << " " << idreif << "\n";
+                    Fznimf::text() << "1 0 0 0 2 " << s.getTrueUid() << " " << idreif << "\n";
                 }
             } else {
-                std::cout << "1 0 0 0 2 " << -(int) (s.getBoolVariableUid(i->getBoolVar())) << " " << idreif << "\n";
+                Fznimf::text() << "1 0 0 0 2 " << -(int) (s.getBoolVariableUid(i->getBoolVar())) << " " << idreif << "\n";
             }
         }
     }
@@ -1070,10 +1141,10 @@ namespace FlatZinc {
 
     void p_array_bool_clause(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_array_bool_clause";
+            Fznimf::text() << "p_array_bool_clause";
         }
 
-        std::cout << "[DISJUNCTION] ";
+        Fznimf::text() << "[DISJUNCTION] ";
 
         unsigned int    offby = 0;
         // can also have boolLits, which is true/false
@@ -1096,17 +1167,23 @@ namespace FlatZinc {
             }
         }
 
+        std::vector<int> literals;
         for (const auto &i : ce[0]->getArray()->a) {
             if (!i->isBool()) {
-                std::cout << "b" << s.getBoolVariableUid(i->getBoolVar()) << " ";
+                Fznimf::text() << "b" << s.getBoolVariableUid(i->getBoolVar()) << " ";
+                literals.push_back(s.getBoolVariableUid(i->getBoolVar()));
             }
         }
         for (const auto &i : ce[1]->getArray()->a) {
             if (!i->isBool()) {
-                std::cout << "-b" << s.getBoolVariableUid(i->getBoolVar()) << " ";
+                Fznimf::text() << "-b" << s.getBoolVariableUid(i->getBoolVar()) << " ";
+                literals.push_back(-s.getBoolVariableUid(i->getBoolVar()));
             }
         }
-        std::cout << "\n";
+        Fznimf::text() << "\n";
+        if (Fznimf::binary) {
+            Fznimf::record(Fznimf::DISJUNCTION, literals);
+        }
     }
 
 //    void p_array_bool_clause_reif(FlatZincModel &s, const ConExpr &ce,
@@ -1117,7 +1194,7 @@ namespace FlatZinc {
 
     void p_bool_xor(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_bool_xor";
+            Fznimf::text() << "p_bool_xor";
         }
         //std::cerr << "bool_xor("<<(*ce[0])<<","<<(*ce[1])<<","<<(*ce[2])
         //  <<")::"<<(*ann)<<"\n";
@@ -1152,10 +1229,10 @@ namespace FlatZinc {
         } else {
             id3 = s.getBoolVariableUid(ce[2]->getBoolVar());
         }
-        std::cout << "1 0 0 0 3 " << id1 << " " << -(int) id2 << " " << -(int) id3 << "\n";
-        std::cout << "1 0 0 0 3 " << -(int) (id1) << " " << id2 << " " << -(int) id3 << "\n";
-        std::cout << "1 0 0 0 3 " << id1 << " " << id2 << " " << id3 << "\n";
-        std::cout << "1 0 0 0 3 " << -(int) id1 << " " << -(int) id2 << " " << id3 << "\n";
+        Fznimf::text() << "1 0 0 0 3 " << id1 << " " << -(int) id2 << " " << -(int) id3 << "\n";
+        Fznimf::text() << "1 0 0 0 3 " << -(int) (id1) << " " << id2 << " " << -(int) id3 << "\n";
+        Fznimf::text() << "1 0 0 0 3 " << id1 << " " << id2 << " " << id3 << "\n";
+        Fznimf::text() << "1 0 0 0 3 " << -(int) id1 << " " << -(int) id2 << " " << id3 << "\n";
     }
 
     void p_bool_l_imp(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
@@ -1170,7 +1247,7 @@ namespace FlatZinc {
 
     void p_bool_not(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_bool_not";
+            Fznimf::text() << "p_bool_not";
         }
 
         int id1, id2;
@@ -1199,7 +1276,7 @@ namespace FlatZinc {
     /* coercion constraints */
     void p_bool2int(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_bool2int";
+            Fznimf::text() << "p_bool2int";
         }
 
         std::string bid;
@@ -1218,13 +1295,18 @@ namespace FlatZinc {
         if ((dom->interval && dom->min == 0 && dom->max == 1) ||
             (dom->s.size() == 2 && ((dom->s[0] == 0 && dom->s[1] == 1) || (dom->s[1] == 0 && dom->s[0] == 1)))) {
 
-            std::cout << "[BOOL2INT] " << bid << " x" << s.getIntVariableUid(ce[1]->getIntVar());
+            Fznimf::text() << "[BOOL2INT] " << bid << " x" << s.getIntVariableUid(ce[1]->getIntVar());
+            if (Fznimf::binary) {
+                int b = ce[0]->isBool() ? (ce[0]->getBool() ? s.getTrueUid() : s.getFalseUid())
+                                        : s.getBoolVariableUid(ce[0]->getBoolVar());
+                Fznimf::record(Fznimf::BOOL2INT, {b, int(s.getIntVariableUid(ce[1]->getIntVar()))});
+            }
         } else {
             std::cerr << "Error: int variable in bool2int must have the domain 0..1\n";
             std::exit(1);
         }
 
-        std::cout << "\n";
+        Fznimf::text() << "\n";
     }
 
     void p_int_in(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
@@ -1255,24 +1337,29 @@ namespace FlatZinc {
     /// accepts an array of integer variables
     void myalldiff(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_myalldiff";
+            Fznimf::text() << "p_myalldiff";
         }
 
-        std::cout << "[ALLDIFFERENT] ";
+        Fznimf::text() << "[ALLDIFFERENT] ";
         s.addSymbol("distinct");
         const auto                &a = ce[0]->getArray()->a;
         std::vector<unsigned int> elems;
+        std::vector<int>          ids;
         for (const auto           &i :a) {
             elems.emplace_back(s.getNewElement());
-            std::cout << "x" << s.getIntVariableUid(i->getIntVar()) << " ";
+            Fznimf::text() << "x" << s.getIntVariableUid(i->getIntVar()) << " ";
+            ids.push_back(s.getIntVariableUid(i->getIntVar()));
+        }
+        Fznimf::text() << "\n";
+        if (Fznimf::binary) {
+            Fznimf::record(Fznimf::ALLDIFFERENT, ids);
         }
-        std::cout << "\n";
     }
 
     /// accepts an array of integer variables, and a boolean variable
     void myalldiff_reif(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
         if (debug) {
-            std::cout << "p_myalldiff_reif";
+            Fznimf::text() << "p_myalldiff_reif";
         }
         s.addSymbol("distinct");
         const auto                &a = ce[0]->getArray()->a;
@@ -1285,7 +1372,7 @@ namespace FlatZinc {
             } else {
                 id = s.getIntVariableUid(i->getIntVar());
             }
-            std::cout << THEORY << " " << ELEMENT << " " << elems.back() << " 1 " << id << " 0\n";
+            Fznimf::text() << THEORY << " " << ELEMENT << " " << elems.back() << " 1 " << id << " 0\n";
         }
         int                       idreif;
         if (ce[1]->isBool()) {
@@ -1297,12 +1384,12 @@ namespace FlatZinc {
         } else {
             idreif = s.getBoolVariableUid(ce[1]->getBoolVar());
         }
-        std::cout << THEORY << " " << ATOM << " " << idreif << " 1 " << s.getSymbolUid("distinct") << " "
+        Fznimf::text() << THEORY << " " << ATOM << " " << idreif << " 1 " << s.getSymbolUid("distinct") << " "
                   << elems.size() << " ";
         for (const auto &i :elems) {
-            std::cout << i << " ";
+            Fznimf::text() << i << " ";
         }
-        std::cout << "\n";
+        Fznimf::text() << "\n";
     }
 
     void p_abs(FlatZincModel &s, const ConExpr &ce, AST::Node *ann) {
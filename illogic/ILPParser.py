@@ -1,10 +1,18 @@
 import os.path
 import sys
+from array import array
+from bisect import bisect_left
 from datetime import datetime
-from math import log10, ceil
 
 from Readers import InputReader
 from Writers import OutputWriter
+import instrumentation
+import pseudo_boolean
+from constraint_store import ConstraintStore
+from presolve.aggregation import VariableAggregator
+from presolve.bound_propagation import BoundPropagator
+from presolve.normalization import RowNormalizer
+from symbol_table import SymbolTable
 from domains.contiguous.contiguous_domain import ContiguousDomain
 from domains.domain import *
 from domains.domain_by_enum import DomainByEnum
@@ -17,7 +25,18 @@ class ILPParser:
         "maximize"
     ]
 
-    max_num_digests = 1
+    # literal of the boolean constant true, its negation is the constant false
+    TRUE = 0
+    FALSE = 1
+
+    # limits of the exact computation of sumsets in merge_dom
+    SUMSET_MAX_SPAN = 1 << 24
+    SUMSET_MAX_WORK = 1 << 30
+
+    # maximal number of domain values of an alldifferent constraint which is decomposed by values
+    ALLDIFF_MAX_VALUES = 1 << 16
+    # at-most-one constraints over more literals are encoded sequentially instead of pairwise
+    AMO_PAIRWISE_MAX = 5
 
     def __init__(self, input_reader, output_writer, **options):
         if not isinstance(input_reader, InputReader.InputReader):
@@ -34,59 +53,176 @@ class ILPParser:
         self.inf_dom = False
 
         self.opt_vector = []
+        self.opt_offset = 0
         self.opt_strategy = 'minimize'
-        self.constraint_matrix = []
-        self.variables = {}
-        self.bool_variables = {"1"}
-        self.clauses = [["1"]]
+        self.constraint_matrix = ConstraintStore()
+        self.int_symbols = SymbolTable('x', 's', first=1)
+        self.variables = []
+        self.bool_symbols = ILPParser._new_bool_symbols()
+        self.clauses = [[ILPParser.TRUE]]
         self.bool_to_int = []
+        self.partial_sums = {}
+        self.presolver = None
+        self.normalizer = None
+        self.aggregator = None
+        self.order_literals = {}
+        self.alldiff_decompositions = dict.fromkeys(('pairwise', 'values', 'pigeonhole'), 0)
 
         self.instance_name = ''
 
         self.options = options
-        self.stats = {
-            'constr_len': []
-        }
+
+        # clauses, constraints and bool2int constraints are passed to the writer as soon as they are added
+        self.streaming = 'stream' in self.options and self.options['stream']
+        self.streamed_len = array('l')
+        if self.streaming and not self.writer.streamable:
+            sys.stderr.write('WARNING: %s doesn\'t support streaming, the instance is buffered\n' %
+                             self.writer.__class__.__name__)
+            self.streaming = False
+        if self.streaming and any([option in self.options and self.options[option]
+                                   for option in ('presolve', 'normalize', 'aggregate')]):
+            sys.stderr.write('WARNING: presolving requires the whole instance, the instance is buffered\n')
+            self.streaming = False
 
     def parse_input(self, input_file, **kwargs):
         self.reset()
-        r = self.reader.parse(input_file, **kwargs)
+        with instrumentation.phase('read'):
+            r = self.reader.parse(input_file, **kwargs)
+        passes = [option for option in ('normalize', 'aggregate', 'presolve')
+                  if option in self.options and self.options[option]]
+        if passes:
+            with instrumentation.phase('presolve'):
+                for option in passes:
+                    getattr(self, option)()
         if 'stats' in self.options and self.options['stats']:
             self.print_stats()
         return r
 
     def print_stats(self):
-        max_digit = max(
-            [len(self.variables.keys()), len(self.bool_variables), len(self.constraint_matrix), len(self.clauses)])
+        streamed = self.writer.streamed if self.streaming else dict.fromkeys(self.writer.stream_sections, 0)
+        n_constraints = len(self.constraint_matrix) + streamed['constraints']
+        n_clauses = len(self.clauses) + streamed['clauses']
+
+        max_digit = max([len(self.variables), len(self.bool_symbols), n_constraints, n_clauses])
         max_digit = str(len(str(max_digit)))
 
-        sys.stderr.write('int variables:           %~d\n'.replace('~', max_digit) % len(self.variables.keys()))
+        sys.stderr.write('int variables:           %~d\n'.replace('~', max_digit) % len(self.variables))
         if not self.inf_dom:
             avg, median = self.avg_domain_len()
             sys.stderr.write('  avg domain size:       %~.2f\n'.replace('~', max_digit) % avg)
             sys.stderr.write('  median domain size:    %~.0f\n'.replace('~', max_digit) % median)
-        sys.stderr.write('bool variables:          %~d\n'.replace('~', max_digit) % len(self.bool_variables))
+        sys.stderr.write('bool variables:          %~d\n'.replace('~', max_digit) % len(self.bool_symbols))
         sys.stderr.write('inf domains (y/n):       %~s\n'.replace('~', max_digit) % ('y' if self.inf_dom else 'n'))
 
-        constr_len = sorted(self.stats['constr_len'])
+        constr_len = sorted(self.constraint_matrix.row_lengths() + self.streamed_len.tolist())
         constr_median = constr_len[len(constr_len) / 2]
-        sys.stderr.write('int constraints:         %~d\n'.replace('~', max_digit) % len(self.constraint_matrix))
+        sys.stderr.write('int constraints:         %~d\n'.replace('~', max_digit) % n_constraints)
         sys.stderr.write(
-            '  avg len:               %~.2f\n'.replace('~', max_digit) % (sum(constr_len) / float(len(
-                self.constraint_matrix))))
+            '  avg len:               %~.2f\n'.replace('~', max_digit) % (sum(constr_len) / float(n_constraints)))
         sys.stderr.write('  max len:               %~d\n'.replace('~', max_digit) % constr_len[-1])
         sys.stderr.write('  median len:            %~d\n'.replace('~', max_digit) % constr_median)
 
-        sys.stderr.write('clauses:                 %~d\n'.replace('~', max_digit) % len(self.clauses))
-        sys.stderr.write('bool to int:             %~d\n'.replace('~', max_digit) % len(self.bool_to_int))
+        sys.stderr.write('clauses:                 %~d\n'.replace('~', max_digit) % n_clauses)
+        sys.stderr.write('bool to int:             %~d\n'.replace('~', max_digit) % (len(self.bool_to_int) +
+                                                                                      streamed['b2i']))
         sys.stderr.write('opt vector:              %~d\n'.replace('~', max_digit) % len(self.opt_vector))
 
+        pb_kinds = dict.fromkeys(pseudo_boolean.KINDS, 0)
+        for variables, weights, b, reified, upper in self.constraint_matrix.ranged_rows():
+            kind = pseudo_boolean.classify(self.variables, variables, weights, b, upper) if reified is None else None
+            if kind is not None:
+                pb_kinds[kind] += 1
+
+        if any(pb_kinds.values()):
+            sys.stderr.write('pseudo-boolean constraints:\n')
+            for kind in pseudo_boolean.KINDS:
+                sys.stderr.write('  %-22s %~d\n'.replace('~', max_digit) % (kind + ':', pb_kinds[kind]))
+
+        if any(self.alldiff_decompositions.values()):
+            sys.stderr.write('alldifferent:\n')
+            for decomposition in ('pairwise', 'values', 'pigeonhole'):
+                sys.stderr.write('  %-22s %~d\n'.replace('~', max_digit) %
+                                 (decomposition + ':', self.alldiff_decompositions[decomposition]))
+
+        if self.normalizer is not None:
+            normalizer = self.normalizer
+            sys.stderr.write('normalize:\n')
+            sys.stderr.write('  removed constraints:   %~d\n'.replace('~', max_digit) % normalizer.n_rows_removed)
+            sys.stderr.write('  removed nonzeros:      %~d\n'.replace('~', max_digit) % normalizer.n_nonzeros_removed)
+
+        if self.aggregator is not None:
+            aggregator = self.aggregator
+            sys.stderr.write('aggregate:\n')
+            sys.stderr.write('  eliminated variables:  %~d\n'.replace('~', max_digit) % aggregator.n_eliminated)
+            sys.stderr.write('  removed constraints:   %~d\n'.replace('~', max_digit) % aggregator.n_rows_removed)
+            sys.stderr.write('  objective offset:      %~d\n'.replace('~', max_digit) % aggregator.objective_offset)
+
+        if self.presolver is not None:
+            presolver = self.presolver
+            sys.stderr.write('presolve:\n')
+            sys.stderr.write('  tightened domains:     %~d\n'.replace('~', max_digit) % presolver.n_tightened)
+            sys.stderr.write('  fixed variables:       %~d\n'.replace('~', max_digit) % presolver.n_fixed)
+            sys.stderr.write('  removed constraints:   %~d\n'.replace('~', max_digit) % presolver.n_rows_removed)
+            sys.stderr.write('  removed nonzeros:      %~d\n'.replace('~', max_digit) % presolver.n_nonzeros_removed)
+
+    def normalize(self):
+        """
+        Merges duplicate terms, divides the constraints by the GCD of their weights and drops duplicate and dominated
+        constraints.
+        """
+        self.normalizer = RowNormalizer(self.constraint_matrix)
+        self.constraint_matrix = self.normalizer.normalize()
+
+    def aggregate(self):
+        """
+        Eliminates variables x by equalities a1 * x + a2 * y = b, see VariableAggregator. The eliminated variables are
+        skipped by the writers, aggregator.mapping maps them back onto the remaining variables.
+        """
+        aggregator = VariableAggregator(self.variables, self.constraint_matrix, self.opt_vector, self.bool_to_int)
+        self.constraint_matrix = aggregator.aggregate()
+        self.variables = aggregator.domains
+        self.opt_vector = aggregator.opt_vector
+        self.bool_to_int = aggregator.bool_to_int
+        self.opt_offset += aggregator.objective_offset
+        self.aggregator = aggregator
+
+    def objective_offset(self):
+        """
+        Returns the constant which is added to the minimized objective of the written instance to get the objective
+        value of the input, e.g. the value of the variables substituted by aggregate().
+        """
+        return self.opt_offset if self.opt_strategy == 'minimize' else -self.opt_offset
+
+    def is_eliminated(self, var):
+        return self.aggregator is not None and var in self.aggregator.mapping
+
+    def presolve(self):
+        """
+        Tightens the domains by bound propagation over the linear constraints, substitutes fixed variables and drops
+        constraints which are satisfied by the tightened domains. The instance is left unchanged if the propagation
+        proves it infeasible.
+        """
+        presolver = BoundPropagator(self.variables, self.constraint_matrix)
+
+        if not presolver.propagate():
+            sys.stderr.write('WARNING: presolving detected an infeasible constraint, the instance is not modified\n')
+            return
+
+        self.variables = presolver.tightened_domains()
+        self.constraint_matrix = presolver.reduced_store()
+        self.inf_dom = any([dom.has_open_bound() for dom in self.variables])
+        self.presolver = presolver
+
     def avg_domain_len(self):
-        _sum = sorted([dom.len() for v, dom in self.variables.items()])
+        _sum = sorted([dom.len() for dom in self.variables])
         median = _sum[len(_sum) / 2]
         return float(sum(_sum)) / float(len(self.variables)), median
 
-    def write_output(self, output):
+    def write_output(self, output, name=None):
+        """
+        Writes the instance to stdout ('-') or into the directory output. The file is named after the instance unless
+        a name is given.
+        """
         if self.instance_name == '':
             sys.stderr.write('an instance name must be given before writing\n')
             sys.exit(1)
@@ -94,7 +230,7 @@ class ILPParser:
         if output == '-':
             output = sys.stdout
         elif os.path.isdir(output):
-            output = output + '/' + self.instance_name
+            output = output + '/' + (name if name is not None else self.instance_name)
         else:
             sys.stderr.write('Error: output isn\'t writeable\n')
             sys.exit(1)
@@ -105,33 +241,34 @@ class ILPParser:
         # only minimization is supported
         opt_vector = self.opt_vector if self.opt_strategy == "minimize" else [(var, -w) for var, w in self.opt_vector]
 
-        self.writer.write(output, self.variables, self.bool_variables, opt_vector, self.constraint_matrix, self.clauses,
-                          self.bool_to_int)
+        with instrumentation.phase('write'):
+            self.writer.write(output, self.variables, self.bool_symbols, opt_vector, self.constraint_matrix,
+                              self.clauses, self.bool_to_int)
+
+        if self.streaming:
+            self.writer.close_stream()
 
-    def new_int_variable(self, domain, internal=False):
+    def new_int_variable(self, domain, internal=False, name=None):
+        """
+        Creates a new integer variable and returns its id. Names are rendered by int_symbols at write time.
+        """
         if not isinstance(domain, Domain):
             raise TypeError("domain is not of type Domain")
 
-        var = ('x' if not internal else 's') + str(len(self.variables) + 1)
-        self.variables[var] = domain
-
-        ILPParser.max_num_digests = max(1, int(ceil(log10(len(self.variables)))))
-
-        return var
+        self.variables.append(domain)
+        return self.int_symbols.add(internal=internal, name=name)
 
-    def new_bool_variable(self, internal=False):
-        var = ('b' if not internal else '_b') + str(len(self.bool_variables))
-        self.bool_variables.add(var)
-
-        # ILPParser.max_num_digests = max(1, int(ceil(log10(len(self.variables)))))
-
-        return var
+    def new_bool_variable(self, internal=False, name=None):
+        """
+        Creates a new boolean variable and returns its id. Use ILPParser.literal to refer to it in clauses.
+        """
+        return self.bool_symbols.add(internal=internal, name=name)
 
     def add_to_opt_vector(self, var, weight=1):
-        if var in self.variables:
+        if var in self.int_symbols:
             self.opt_vector.append((var, weight))
         else:
-            raise Exception(var + " isn't a known variable")
+            raise Exception(str(var) + " isn't a known variable")
 
     def set_opt_strategy(self, strategy):
         if strategy.lower() in ILPParser.opt_strategies:
@@ -156,28 +293,85 @@ class ILPParser:
 
         self.add_ge_constraint([(s, 1)], b, split=False, reified_var=reified)
 
-    def _constraint_split_eq(self, terms, b, reified=None):
-        if len(terms) > 3:
+    def _split_eq(self, terms):
+        """
+        Replaces the last two terms by an auxiliary sum variable defined by an equality until three terms are left.
+        Returns the remaining terms.
+        """
+        while len(terms) > 3:
             dom1 = ILPParser.term_domain(self.variables[terms[-2][0]], terms[-2][1])
             dom2 = ILPParser.term_domain(self.variables[terms[-1][0]], terms[-1][1])
             new_dom = ILPParser.merge_dom(dom1, dom2)
             s = self.new_int_variable(new_dom, internal=True)
             self.add_eq_constraint(terms[-2:] + [(s, -1)], 0)
-            self._constraint_split_eq(terms[:-2] + [(s, 1)], b, reified=reified)
-        else:
-            self.add_ge_constraint(terms, b, reified_var=reified)
+            terms = terms[:-2] + [(s, 1)]
+
+        return terms
+
+    def _split_tree(self, terms):
+        """
+        Splits the terms into a balanced adder tree of auxiliary sum variables and returns the two terms of its root,
+        which add up the two halves of the terms (sorted by variable). Every auxiliary variable s = t1 + t2 is defined
+        by an equality and shared by all constraints containing the same weighted sub-sum (see _partial_sum).
+        """
+        terms = sorted(terms)
+        half = len(terms) / 2
+        return [self._partial_sum(terms[:half]), self._partial_sum(terms[half:])]
+
+    def _partial_sum(self, terms):
+        """
+        Returns a term (s, w) with w * s = sum(terms). The sub-sums are hash-consed in partial_sums with the weights
+        normalized to a positive leading weight, thus sub-sums and their negations share the same variable s.
+        :type terms: list[(int, int)]
+        """
+        if len(terms) == 1:
+            return terms[0]
+
+        sign = 1 if terms[0][1] > 0 else -1
+        key = tuple([(var, sign * w) for var, w in terms])
+
+        s = self.partial_sums.get(key)
+        if s is None:
+            half = len(key) / 2
+            left, right = self._partial_sum(list(key[:half])), self._partial_sum(list(key[half:]))
+            dom = ILPParser.merge_dom(ILPParser.term_domain(self.variables[left[0]], left[1]),
+                                      ILPParser.term_domain(self.variables[right[0]], right[1]))
+            s = self.new_int_variable(dom, internal=True)
+            self.add_eq_constraint([left, right, (s, -1)], 0)
+            self.partial_sums[key] = s
+
+        return s, sign
 
     def add_ge_constraint(self, terms, b, reified_var=None, split=True):
+        self.add_range_constraint(terms, b, None, reified_var=reified_var, split=split)
+
+    def add_range_constraint(self, terms, lb, ub, reified_var=None, split=True):
+        """
+        Adds the constraint lb <= terms <= ub, which is stored as a single row. If ub is None, terms >= lb is added.
+        """
         self._check_variables(terms)
 
-        if len(terms) > 3 and split and "split" in self.options and self.options["split"] == 1:
-            self._constraint_split_eq(terms, b, reified=reified_var)
-        elif len(terms) > 3 and split and "split" in self.options and self.options["split"] == 2:
-            self._constraint_split_le(terms, b, reified=reified_var)
-        else:
+        split_mode = self.options["split"] if len(terms) > 3 and split and "split" in self.options else 0
+
+        if split_mode:
+            with instrumentation.phase('split'):
+                if split_mode == 2:
+                    # the chain of partial sums only bounds the sum from above, thus both sides are split on their own
+                    self._constraint_split_le(terms, lb, reified=reified_var)
+                    if ub is not None:
+                        self._constraint_split_le(ILPParser.inverse_terms(terms), -ub, reified=reified_var)
+                    return
+                elif split_mode == 1:
+                    terms = self._split_eq(terms)
+                elif split_mode == 3:
+                    terms = self._split_tree(terms)
+
+        if self.streaming:
+            self.writer.stream_constraint([v for v, _ in terms], [w for _, w in terms], lb, reified_var, upper=ub)
             if 'stats' in self.options and self.options['stats']:
-                self.stats['constr_len'].append(len(terms))
-            self.constraint_matrix.append((terms, b, reified_var))
+                self.streamed_len.append(len(terms))
+        else:
+            self.constraint_matrix.append(terms, lb, reified_var, upper=ub)
 
     def add_le_constraint(self, vars_with_weights, b, reified_var=None):
         return self.add_ge_constraint(ILPParser.inverse_terms(vars_with_weights), -b, reified_var=reified_var)
@@ -189,8 +383,7 @@ class ILPParser:
         return self.add_ge_constraint(ILPParser.inverse_terms(vars_with_weights), -b + 1, reified_var=reified_var)
 
     def add_eq_constraint(self, vars_with_weights, b, reified_var=None):
-        self.add_ge_constraint(vars_with_weights, b, reified_var=reified_var)
-        self.add_le_constraint(vars_with_weights, b, reified_var=reified_var)
+        self.add_range_constraint(vars_with_weights, b, b, reified_var=reified_var)
 
         return len(self.constraint_matrix) - 1
 
@@ -198,41 +391,167 @@ class ILPParser:
         inverse_terms = ILPParser.inverse_terms(terms)
         r = self.new_bool_variable(internal=True)
 
-        self.add_ge_constraint(terms, b + 1, reified_var=(r, True))
-        self.add_ge_constraint(inverse_terms, 1 - b, reified_var=(r, False))
+        self.add_ge_constraint(terms, b + 1, reified_var=ILPParser.literal(r))
+        self.add_ge_constraint(inverse_terms, 1 - b, reified_var=ILPParser.literal(r, False))
 
         return len(self.constraint_matrix) - 1
 
     def add_alldiff_constraint(self, *variables):
+        """
+        Adds the constraint that all variables take pairwise different values. The decomposition with the smaller
+        estimated size is chosen, the size is estimated as the number of clauses of the order encoding:
+
+        * pairwise: a reified pair of inequalities x_i > x_j or x_j > x_i for every pair of variables, each one costs
+          about as many clauses as the smaller domain has values
+        * values: every value shared by two or more variables can be taken by at most one of them, the literals
+          x_i = v are defined over order literals x_i >= v which are shared by all alldifferent constraints
+        * pigeonhole: if there are as many values as variables, the variables form a permutation of the values, thus
+          every value is additionally taken by at least one variable. With fewer values than variables the constraint
+          is unsatisfiable.
+        """
         if len(variables) < 2:
             raise Exception('alldifferent expects at least two variables')
 
+        domains = [self.variables[var] for var in variables]
+        if any([dom.has_open_bound() for dom in domains]) or \
+                sum([dom.len() for dom in domains]) > ILPParser.ALLDIFF_MAX_VALUES:
+            return self._alldiff_pairwise(variables)
+
+        lengths = sorted([dom.len() for dom in domains])
+        size_pairwise = sum([2 * (len(lengths) - k - 1) * n for k, n in enumerate(lengths)])
+
+        values = [ILPParser._domain_values(dom) for dom in domains]
+        holders = {}
+        for k, var in enumerate(variables):
+            for v in values[k]:
+                holders.setdefault(v, []).append(k)
+
+        if len(holders) < len(variables):
+            # more variables than values
+            self.alldiff_decompositions['pigeonhole'] += 1
+            self.add_clause(ILPParser.FALSE)
+            return len(self.constraint_matrix) - 1
+
+        permutation = len(holders) == len(variables)
+        if not permutation:
+            holders = {v: ks for v, ks in holders.iteritems() if len(ks) > 1}
+
+        # estimated size of the decomposition by values
+        order_literals = set()
+        size = 0
+        for v, ks in holders.iteritems():
+            for k in ks:
+                j = bisect_left(values[k], v)
+                order_literals.update([(variables[k], values[k][i]) for i in (j, j + 1) if 0 < i < len(values[k])])
+                size += 3
+            size += len(ks) * (len(ks) - 1) / 2 if len(ks) <= ILPParser.AMO_PAIRWISE_MAX else 3 * len(ks)
+        size += len(order_literals.difference(self.order_literals))
+        if permutation:
+            size += len(holders)
+
+        if size >= size_pairwise:
+            return self._alldiff_pairwise(variables)
+
+        for v in sorted(holders):
+            literals = [self._value_literal(variables[k], values[k], v) for k in holders[v]]
+            self._add_at_most_one(literals)
+            if permutation:
+                self.add_clause(*literals)
+
+        if permutation:
+            self.alldiff_decompositions['pigeonhole'] += 1
+        else:
+            self.alldiff_decompositions['values'] += 1
+
+        return len(self.constraint_matrix) - 1
+
+    def _alldiff_pairwise(self, variables):
         index = 1
         for var1 in variables:
             for var2 in variables[index:]:
                 r_var = self.new_bool_variable(internal=True)
-                self.add_ge_constraint([(var1, 1), (var2, -1)], 1, reified_var=(r_var, True))
-                self.add_ge_constraint([(var1, -1), (var2, 1)], 1, reified_var=(r_var, False))
+                self.add_ge_constraint([(var1, 1), (var2, -1)], 1, reified_var=ILPParser.literal(r_var))
+                self.add_ge_constraint([(var1, -1), (var2, 1)], 1, reified_var=ILPParser.literal(r_var, False))
             index += 1
 
+        self.alldiff_decompositions['pairwise'] += 1
         return len(self.constraint_matrix) - 1
 
+    def _order_literal(self, var, v):
+        """
+        Returns the literal of var >= v. The literals are created once per variable and value.
+        """
+        lit = self.order_literals.get((var, v))
+        if lit is None:
+            lit = ILPParser.literal(self.new_bool_variable(internal=True))
+            self.add_ge_constraint([(var, 1)], v, reified_var=lit)
+            self.order_literals[(var, v)] = lit
+        return lit
+
+    def _value_literal(self, var, values, v):
+        """
+        Returns a literal of var = v, which is defined by var >= v and not var >= v', v' the successor of v in values.
+        """
+        j = bisect_left(values, v)
+        conditions = []
+        if j > 0:
+            conditions.append(self._order_literal(var, v))
+        if j + 1 < len(values):
+            conditions.append(ILPParser.negate(self._order_literal(var, values[j + 1])))
+
+        if not conditions:
+            return ILPParser.TRUE
+        elif len(conditions) == 1:
+            return conditions[0]
+
+        lit = ILPParser.literal(self.new_bool_variable(internal=True))
+        for condition in conditions:
+            self.add_clause(ILPParser.negate(lit), condition)
+        self.add_clause(lit, *[ILPParser.negate(condition) for condition in conditions])
+        return lit
+
+    def _add_at_most_one(self, literals):
+        """
+        Adds clauses allowing at most one of the literals to be true. Short lists are encoded pairwise, longer ones by
+        the sequential counter with the auxiliary literals s_k <-> (literals[0] or ... or literals[k]).
+        """
+        if len(literals) <= ILPParser.AMO_PAIRWISE_MAX:
+            for k, lit1 in enumerate(literals):
+                for lit2 in literals[k + 1:]:
+                    self.add_clause(ILPParser.negate(lit1), ILPParser.negate(lit2))
+            return
+
+        s = literals[0]
+        for lit in literals[1:-1]:
+            sn = ILPParser.literal(self.new_bool_variable(internal=True))
+            self.add_clause(ILPParser.negate(lit), ILPParser.negate(s))
+            self.add_clause(ILPParser.negate(s), sn)
+            self.add_clause(ILPParser.negate(lit), sn)
+            s = sn
+        self.add_clause(ILPParser.negate(literals[-1]), ILPParser.negate(s))
+
     def add_clause(self, *literals):
         for lit in literals:
-            if lit.replace("-", "") not in self.bool_variables:
-                raise Exception(lit + " isn't a known boolean variable")
+            if ILPParser.lit_var(lit) not in self.bool_symbols:
+                raise Exception(str(lit) + " isn't a literal of a known boolean variable")
 
-        self.clauses.append(literals)
+        if self.streaming:
+            self.writer.stream_clause(*literals)
+        else:
+            self.clauses.append(literals)
 
-    def add_bool2int(self, b_var, i_var):
-        if b_var not in self.bool_variables and b_var != '0':
-            sys.stderr.write("Error: Unknown boolean variable %s\n" % b_var)
+    def add_bool2int(self, b_lit, i_var):
+        if ILPParser.lit_var(b_lit) not in self.bool_symbols:
+            sys.stderr.write("Error: Unknown boolean literal %s\n" % b_lit)
             sys.exit(1)
-        if i_var not in self.variables:
+        if i_var not in self.int_symbols:
             sys.stderr.write("Error: Unknown integer variable %s\n" % i_var)
             sys.exit(1)
 
-        self.bool_to_int.append((b_var, i_var))
+        if self.streaming:
+            self.writer.stream_b2i(b_lit, i_var)
+        else:
+            self.bool_to_int.append((b_lit, i_var))
 
     def set_instance_name(self, name):
         self.instance_name = name
@@ -248,24 +567,74 @@ class ILPParser:
         self.inf_dom = False
 
         self.opt_vector = []
+        self.opt_offset = 0
         self.opt_strategy = 'minimize'
-        self.constraint_matrix = []
-        self.variables = {}
+        self.constraint_matrix = ConstraintStore()
+        self.int_symbols = SymbolTable('x', 's', first=1)
+        self.variables = []
+        self.bool_symbols = ILPParser._new_bool_symbols()
+        self.clauses = [[ILPParser.TRUE]]
+        self.bool_to_int = []
+        self.partial_sums = {}
+        self.presolver = None
+        self.normalizer = None
+        self.aggregator = None
+        self.order_literals = {}
+        self.alldiff_decompositions = dict.fromkeys(('pairwise', 'values', 'pigeonhole'), 0)
+
+        if self.streaming:
+            self.writer.open_stream()
+            self.streamed_len = array('l')
 
         self.instance_name = ''
 
+    def int_name(self, var):
+        return self.int_symbols.name(var)
+
+    def bool_name(self, var):
+        return self.bool_symbols.name(var)
+
+    def literal_name(self, lit):
+        """
+        Renders a literal as the name of its variable, prefixed with '-' if negative. The constant false is '0'.
+        """
+        if lit == ILPParser.FALSE:
+            return '0'
+        name = self.bool_symbols.name(lit >> 1)
+        return '-' + name if lit & 1 else name
+
     def _check_variables(self, vars_with_weights):
+        n = len(self.variables)
         for v, w in vars_with_weights:
-            if v not in self.variables:
+            if type(v) not in (int, long) or not 0 <= v < n:
                 raise Exception(str(v) + " isn't a known variable")
             elif not isinstance(w, (int, long)):
-                raise Exception("weight for %s must be an integer" % v)
+                raise Exception("weight for %s must be an integer" % self.int_name(v))
 
     @staticmethod
-    def cmp_vars(var):
-        if len(var) == 1:
-            return str(var)
-        return ('%%.%dd' % ILPParser.max_num_digests) % int(var[1:])
+    def _new_bool_symbols():
+        symbols = SymbolTable('b', '_b', first=0)
+        symbols.add(name='1')
+        return symbols
+
+    @staticmethod
+    def literal(var, sign=True):
+        """
+        Returns the literal of a boolean variable id, negative if sign is False.
+        """
+        return var << 1 | (not sign)
+
+    @staticmethod
+    def negate(lit):
+        return lit ^ 1
+
+    @staticmethod
+    def lit_var(lit):
+        return lit >> 1
+
+    @staticmethod
+    def lit_sign(lit):
+        return not lit & 1
 
     @staticmethod
     def inverse_terms(terms):
@@ -273,34 +642,142 @@ class ILPParser:
 
     @staticmethod
     def merge_dom(dom1, dom2):
-        domains = [dom1, dom2]
-        domain_classes = {dom1.__class__, dom2.__class__}
-        open_bounds = dom1.has_open_bound() or dom2.has_open_bound()
-
-        if not open_bounds and dom1.len() * dom2.len() <= 10000 and domain_classes != {ContiguousDomain}:
-            # closed and enumerable domains are merged by computing all combinations
-            dom = sorted(ILPParser._recursive_dom_merge(domains))
-            if abs(dom[-1] - dom[0]) == len(dom) - 1:
-                # detect and prefer a contiguous domain
-                return ContiguousDomain(dom[0], dom[-1])
-            else:
-                return DomainByEnum(dom)
-        else:
-            lb = sum([d.lb() for d in domains])
-            ub = sum([d.ub() for d in domains])
+        """
+        Returns the domain of all sums d1 + d2 of values d1 in dom1 and d2 in dom2. The sumset is computed exactly with
+        bitsets (bit i represents the value lb + i) if it spans at most SUMSET_MAX_SPAN values and the work of shifting
+        the bitset along the runs of consecutive values stays below SUMSET_MAX_WORK bits. Otherwise (and for open
+        bounds) the contiguous domain of the sum of the bounds is returned.
+        """
+        if instrumentation.enabled:
+            instrumentation.count(instrumentation.DOMAIN_MERGES)
+
+        lb = dom1.lb() + dom2.lb()
+        ub = dom1.ub() + dom2.ub()
+
+        if dom1.has_open_bound() or dom2.has_open_bound() or type(lb) not in (int, long) or \
+                type(ub) not in (int, long) or ub - lb > ILPParser.SUMSET_MAX_SPAN:
             return ContiguousDomain(lb, ub)
 
+        runs1, runs2 = ILPParser._domain_runs(dom1), ILPParser._domain_runs(dom2)
+        if len(runs1) > len(runs2):
+            dom1, dom2, runs1, runs2 = dom2, dom1, runs2, runs1
+
+        if len(runs1) * (ub - lb + 1) > ILPParser.SUMSET_MAX_WORK:
+            return ContiguousDomain(lb, ub)
+
+        # shift the bitset of dom2 along every run of dom1
+        bits2 = ILPParser._runs_to_bits(runs2, dom2.lb())
+        bits = 0
+        for start, n, stride in runs1:
+            bits |= ILPParser._smear(bits2, n, stride) << (start - dom1.lb())
+
+        return ILPParser._bits_to_domain(bits, lb)
+
     @staticmethod
-    def _recursive_dom_merge(domains, index=0):
-        if len(domains) - 1 == index:
-            return domains[index].get_values()
-        else:
-            values = set()
-            for v in ILPParser._recursive_dom_merge(domains, index + 1):
-                for d in domains[index].get_values():
-                    values.add(d + v)
+    def sumset_runs(domains):
+        """
+        Returns the sums of one value of every domain as ascending intervals (a, b) of consecutive values. The sumset is
+        computed like in merge_dom but never enumerated, the interval of the sum of the bounds is returned if it
+        exceeds the limits of merge_dom.
+        """
+        lb = sum([dom.lb() for dom in domains])
+        ub = sum([dom.ub() for dom in domains])
+
+        if any([dom.has_open_bound() for dom in domains]) or type(lb) not in (int, long) or \
+                type(ub) not in (int, long) or ub - lb > ILPParser.SUMSET_MAX_SPAN:
+            return [(lb, ub)]
+
+        runs = [ILPParser._domain_runs(dom) for dom in domains]
+        if sum([len(r) for r in runs]) * (ub - lb + 1) > ILPParser.SUMSET_MAX_WORK:
+            return [(lb, ub)]
+
+        # the bitset of the sums of the domains added so far, bit i represents the value sum_lb + i
+        bits, sum_lb = 1, 0
+        for dom, dom_runs in zip(domains, runs):
+            shifted = 0
+            for start, n, stride in dom_runs:
+                shifted |= ILPParser._smear(bits, n, stride) << (start - dom.lb())
+            bits = shifted
+            sum_lb += dom.lb()
+
+        return ILPParser._bits_to_runs(bits, sum_lb)
 
-            return values
+    @staticmethod
+    def _domain_runs(dom):
+        """
+        Returns the values of a closed domain as ascending runs (start, n, stride) of n values start + k * stride.
+        """
+        if isinstance(dom, ContiguousDomain):
+            return [(dom.lb(), dom.len(), abs(dom.multiplier))]
+
+        runs = []
+        for v in sorted(set(dom.get_values())):
+            if runs and runs[-1][0] + runs[-1][1] == v:
+                runs[-1][1] += 1
+            else:
+                runs.append([v, 1])
+
+        return [(start, n, 1) for start, n in runs]
+
+    @staticmethod
+    def _domain_values(dom):
+        """
+        Returns the ascending list of the values of a closed domain.
+        """
+        return [start + k * stride for start, n, stride in ILPParser._domain_runs(dom) for k in xrange(n)]
+
+    @staticmethod
+    def _runs_to_bits(runs, lb):
+        bits = 0
+        for start, n, stride in runs:
+            bits |= ILPParser._smear(1, n, stride) << (start - lb)
+        return bits
+
+    @staticmethod
+    def _smear(bits, n, stride=1):
+        """
+        Returns the union of bits << (k * stride) for k = 0, ..., n - 1 with O(log n) shifts.
+        """
+        width = 1
+        while width < n:
+            step = min(width, n - width)
+            bits |= bits << (step * stride)
+            width += step
+        return bits
+
+    @staticmethod
+    def _bits_to_domain(bits, lb):
+        """
+        Converts a bitset into a ContiguousDomain if its values form a single run and into a DomainByEnum otherwise.
+        """
+        runs = ILPParser._bits_to_runs(bits, lb)
+
+        if len(runs) == 1:
+            return ContiguousDomain(*runs[0])
+
+        values = []
+        for a, b in runs:
+            values.extend(xrange(a, b + 1))
+
+        return DomainByEnum(values)
+
+    @staticmethod
+    def _bits_to_runs(bits, lb):
+        """
+        Returns the values of a bitset as ascending intervals (a, b) of consecutive values.
+        """
+        digits = bin(bits)[:1:-1]
+
+        runs = []
+        start = digits.find('1')
+        while start >= 0:
+            end = digits.find('0', start)
+            if end < 0:
+                end = len(digits)
+            runs.append((lb + start, lb + end - 1))
+            start = digits.find('1', end)
+
+        return runs
 
     @staticmethod
     def term_domain(domain, w):
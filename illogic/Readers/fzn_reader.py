@@ -1,12 +1,18 @@
-import gzip
+import errno
 import os.path
 import os
 import re
+import shutil
+import struct
 import sys
 import subprocess
-import tempfile
+import threading
+from array import array
+from itertools import izip
 
 from InputReader import InputReader
+from input_stream import open_input, is_compressed
+from ..domains.closed_domain import ClosedDomain
 from ..domains.contiguous.contiguous_domain import ContiguousDomain
 
 re_int_interval = re.compile('\[(-?\d+)\.\.(-?\d+)\]')
@@ -22,55 +28,204 @@ rel_map = {
     '>=': 'add_ge_constraint'
 }
 
+# binary fznimf (fz -b), see gecode/fznimf.hh: a header followed by records of a kind (uint8), a count n (uint32) and n
+# int32 values, all little endian
+BINARY_HEADER = 'FZNIMFB1'
+record_header = struct.Struct('<BI')
+INT, INT_SET, BOOL, LINEAR, REIFIED, ALLDIFFERENT, OPTIMIZATION, DISJUNCTION, BOOL2INT = range(1, 10)
+# relations of LINEAR and REIFIED records by their code
+relations = ['=', '!=', '<', '>', '<=', '>=']
+# the bool ids of the constants
+TRUE_ID, FALSE_ID = 1, 2
+
+CHUNK_SIZE = 1 << 16
+
 
 class FZNReader(InputReader):
     def __init__(self, **options):
         super(FZNReader, self).__init__(**options)
         self.var_table = {}
+        # the variables of the binary format by their ids
+        self.int_vars = {}
+        self.bool_vars = {}
 
-    def parse(self, input_file, **kwargs):
-        if type(input_file) == str and input_file[-2:] == 'gz':
-            sys.stderr.write('WARNING: gzip files not supported by FZN reader\n')
-
-        if input_file == sys.stdin:
-            tmp = tempfile.NamedTemporaryFile('w', delete=False)
-            name = tmp.name
-            file_name = input_file.name
-
-            for l in iter(sys.stdin.readline, ''):
-                tmp.write(l)
-
-            tmp.close()
-        else:
-            name = input_file
-            file_name = input_file
+        # fz writes binary fznimf unless fznimf=text is given
+        self.binary = options.get('fznimf', 'binary') != 'text'
 
+    def parse(self, input_file, **kwargs):
         fzn_path = os.path.split(__file__)[0] + '/../../gecode/fz'
 
         if not os.path.isfile(fzn_path):
             sys.stderr.write('ERROR: ./gecode/fz not found. Build first...\n')
             sys.exit(1)
 
-        sub = subprocess.Popen([fzn_path, name], stdout=subprocess.PIPE, universal_newlines=True)
+        # fz reads plain files itself, stdin and compressed files are piped into it by a thread, thus fz parses while
+        # its output is read
+        piped = input_file == sys.stdin or is_compressed(input_file)
+        if piped:
+            file_name = input_file.name if input_file == sys.stdin else os.path.splitext(input_file)[0]
+            sub = subprocess.Popen(self.fz_command(fzn_path, '-'), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   universal_newlines=not self.binary)
+            errors = []
+            feeder = threading.Thread(target=FZNReader.feed, args=(input_file, sub.stdin, errors))
+            feeder.daemon = True
+            feeder.start()
+        else:
+            file_name = input_file
+            sub = subprocess.Popen(self.fz_command(fzn_path, input_file), stdout=subprocess.PIPE,
+                                   universal_newlines=not self.binary)
 
         self.converter.set_instance_name(os.path.basename(os.path.splitext(file_name)[0]))
-        self.parse_instance(sub.stdout)
+        if self.binary:
+            error = self.parse_binary(sub.stdout)
+        else:
+            error = self.parse_instance(sub.stdout)
 
-        if input_file == sys.stdin:
-            os.remove(name)
+        if piped:
+            feeder.join()
+            if errors:
+                sub.wait()
+                exc_type, exc_value, exc_traceback = errors[0]
+                raise exc_type, exc_value, exc_traceback
 
         if sub.wait() != 0:
             sys.stderr.write('ERROR: fzn parsing aborted\n')
             sys.exit(sub.returncode)
 
+        if error is not None:
+            sys.stderr.write('ERROR: %s\n' % error)
+            sys.exit(1)
+
         return True
 
+    def fz_command(self, fzn_path, name):
+        return [fzn_path, '-b', name] if self.binary else [fzn_path, name]
+
+    @staticmethod
+    def feed(input_file, pipe, errors):
+        """
+        Copies the (decompressed) input into pipe, the stdin of fz, and closes it in any case. Errors of the input (e.g.
+        corrupt compressed files) are appended to errors as exc_info and re-raised by parse.
+        """
+        f = None
+        try:
+            f = open_input(input_file)
+            shutil.copyfileobj(f, pipe)
+        except IOError as e:
+            # a broken pipe means fz terminated early, its exit status is reported by parse
+            if e.errno != errno.EPIPE:
+                errors.append(sys.exc_info())
+        except BaseException:
+            errors.append(sys.exc_info())
+        finally:
+            try:
+                pipe.close()
+            except IOError:
+                pass
+            if f is not None and input_file != sys.stdin:
+                f.close()
+
     def parse_instance(self, f):
         for line in iter(f.readline, b''):
             self.parse_line(line.rstrip())
 
         return None
 
+    def parse_binary(self, f):
+        """
+        Reads the records of the binary fznimf format in chunks, the values of a record are decoded into an array at
+        once. Records of unknown kinds are skipped. Returns an error message if the header is missing or the output
+        ends within a record, None otherwise.
+        """
+        if f.read(len(BINARY_HEADER)) != BINARY_HEADER:
+            # fz has to terminate for its exit status, thus its output is drained
+            for _ in iter(lambda: f.read(CHUNK_SIZE), ''):
+                pass
+            return 'fz output doesn\'t start with the binary fznimf header'
+
+        handlers = {
+            INT: self.read_int_variable,
+            INT_SET: self.read_int_set_variable,
+            BOOL: self.read_bool_variable,
+            LINEAR: self.read_linear,
+            REIFIED: self.read_reified,
+            ALLDIFFERENT: self.read_alldiff,
+            OPTIMIZATION: self.read_optimization,
+            DISJUNCTION: self.read_disjunction,
+            BOOL2INT: self.read_bool2int
+        }
+        swap = sys.byteorder == 'big'
+        buf, pos = '', 0
+
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+            buf = buf[pos:] + chunk
+            pos, size = 0, len(buf)
+
+            while pos + record_header.size <= size:
+                kind, n = record_header.unpack_from(buf, pos)
+                start = pos + record_header.size
+                end = start + 4 * n
+                if end > size:
+                    break
+
+                values = array('i', buf[start:end])
+                if swap:
+                    values.byteswap()
+                if kind in handlers:
+                    handlers[kind](values)
+                pos = end
+
+        if pos < len(buf):
+            return 'fz output ends within a binary fznimf record'
+
+        return None
+
+    def read_int_variable(self, values):
+        self.int_vars[values[0]] = self.converter.new_int_variable(ContiguousDomain(values[1], values[2]))
+
+    def read_int_set_variable(self, values):
+        self.int_vars[values[0]] = self.converter.new_int_variable(ClosedDomain(sorted(set(values[1:]))))
+
+    def read_bool_variable(self, values):
+        self.bool_vars[values[0]] = self.converter.new_bool_variable()
+
+    def read_terms(self, values, start):
+        """
+        Returns the terms of the coefficients and the ids following values[start:].
+        """
+        n = (len(values) - start) // 2
+        int_vars = self.int_vars
+        return [(int_vars[x], w) for w, x in izip(values[start:start + n], values[start + n:])]
+
+    def read_linear(self, values):
+        fn = getattr(self.converter, rel_map[relations[values[0]]])
+        fn(self.read_terms(values, 2), values[1])
+
+    def read_reified(self, values):
+        fn = getattr(self.converter, rel_map[relations[values[0]]])
+        fn(self.read_terms(values, 3), values[1], reified_var=self.converter.literal(self.bool_vars[values[2]]))
+
+    def read_alldiff(self, values):
+        self.converter.add_alldiff_constraint(*[self.int_vars[x] for x in values])
+
+    def read_optimization(self, values):
+        self.converter.set_opt_strategy('maximize' if values[0] else 'minimize')
+        self.converter.add_to_opt_vector(self.int_vars[values[1]])
+
+    def read_disjunction(self, values):
+        self.converter.add_clause(*[self.converter.literal(self.bool_vars[abs(lit)], lit > 0) for lit in set(values)])
+
+    def read_bool2int(self, values):
+        b = values[0]
+        if b == TRUE_ID:
+            b = self.converter.TRUE
+        elif b == FALSE_ID:
+            b = self.converter.FALSE
+        else:
+            b = self.converter.literal(self.bool_vars[b])
+
+        self.converter.add_bool2int(b, self.int_vars[values[1]])
+
     def parse_line(self, line):
         split = line.find(' ')
         token = line[:split]
@@ -137,7 +292,7 @@ class FZNReader(InputReader):
         line = line.replace(' ', '')
         constraint, reified_var = line.split('<->')
         terms, rel, c, fn = self.parse_constraint(constraint, True)
-        fn(terms, c, reified_var=self.var_table[reified_var])
+        fn(terms, c, reified_var=self.converter.literal(self.var_table[reified_var]))
 
     def parse_optimization(self, line):
         strategy, var = line.strip().split()
@@ -158,13 +313,17 @@ class FZNReader(InputReader):
 
     def parse_bool2int(self, line):
         b, i = line.strip().split()
-        if b != '1' and b != '0':
-            b = self.var_table[b]
+        if b == '1':
+            b = self.converter.TRUE
+        elif b == '0':
+            b = self.converter.FALSE
+        else:
+            b = self.converter.literal(self.var_table[b])
 
         self.converter.add_bool2int(b, self.var_table[i])
 
     def _get_bool_var(self, b):
         if b[0] == '-':
-            return '-' + self.var_table[b[1:]]
+            return self.converter.literal(self.var_table[b[1:]], False)
         else:
-            return self.var_table[b]
+            return self.converter.literal(self.var_table[b])
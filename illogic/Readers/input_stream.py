@@ -0,0 +1,231 @@
+import bz2
+import io
+import shutil
+import sys
+import tempfile
+import zlib
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# the compression formats detected by their magic bytes: name, magic bytes, decompressor factory or None if the module
+# isn't available
+GZIP = 'gzip'
+BZIP2 = 'bzip2'
+XZ = 'xz'
+ZSTD = 'zstd'
+
+formats = [
+    (GZIP, '\x1f\x8b', lambda: zlib.decompressobj(16 + zlib.MAX_WBITS)),
+    (BZIP2, 'BZh', bz2.BZ2Decompressor),
+    (XZ, '\xfd7zXZ\x00', lzma.LZMADecompressor if lzma is not None else None),
+    (ZSTD, '\x28\xb5\x2f\xfd',
+     (lambda: zstandard.ZstdDecompressor().decompressobj()) if zstandard is not None else None)
+]
+
+CHUNK_SIZE = 1 << 16
+
+# buffered streams of stdin, a reader may open stdin several times (e.g. the pisinger reader once per instance)
+_stdin_streams = {}
+
+
+def open_input(input_file):
+    """
+    Returns a buffered binary stream of the path or file object input_file. Compressed inputs (gzip, bzip2 and, if the
+    lzma/zstandard modules are available, xz and zstd) are detected by their magic bytes and decompressed on the fly.
+    The stream of stdin is shared by all calls. Streams of stdin and compressed inputs can seek forward, seeking
+    backwards restarts the decompression of a compressed file and isn't supported for stdin.
+    """
+    if type(input_file) == str:
+        source = io.open(input_file, 'rb')
+    elif input_file in _stdin_streams:
+        return _stdin_streams[input_file]
+    else:
+        source = io.open(input_file.fileno(), 'rb', closefd=False)
+
+    new_decompressor = _detect(source)
+
+    if type(input_file) == str:
+        if new_decompressor is None:
+            return source
+        return io.BufferedReader(DecompressedStream(source, new_decompressor), CHUNK_SIZE)
+
+    stream = io.BufferedReader(DecompressedStream(source, new_decompressor or _Identity), CHUNK_SIZE)
+    _stdin_streams[input_file] = stream
+    return stream
+
+
+def open_seekable(input_file):
+    """
+    Returns a seekable binary file of input_file: an uncompressed file is opened directly, stdin and compressed inputs
+    are decompressed into a temporary file first.
+    """
+    if type(input_file) == str and not is_compressed(input_file):
+        return open(input_file, 'rb')
+
+    f = open_input(input_file)
+    spool = tempfile.TemporaryFile('w+b')
+    shutil.copyfileobj(f, spool, CHUNK_SIZE)
+    if type(input_file) == str:
+        f.close()
+    spool.seek(0)
+    return spool
+
+
+def is_compressed(path):
+    """
+    Returns True if the file path starts with the magic bytes of a supported compression format.
+    """
+    with io.open(path, 'rb') as f:
+        return _detect(f) is not None
+
+
+def _detect(source):
+    head = source.peek(8)[:8]
+
+    for name, magic, new_decompressor in formats:
+        if head.startswith(magic):
+            if new_decompressor is None:
+                sys.stderr.write('ERROR: %s compressed input requires the %s module\n' %
+                                 (name, 'lzma' if name == XZ else 'zstandard'))
+                sys.exit(1)
+            return new_decompressor
+
+    return None
+
+
+def _finished(decompressor):
+    """
+    Returns True if decompressor reached the end of its stream.
+    """
+    if hasattr(decompressor, 'eof'):
+        return decompressor.eof
+    elif hasattr(decompressor, 'copy'):
+        # zlib on Python 2: data after the end of the stream is left in unused_data
+        probe = decompressor.copy()
+        try:
+            probe.decompress('\x00')
+        except zlib.error:
+            return False
+        return bool(probe.unused_data)
+
+    # bz2 on Python 2 raises EOFError once the end of the stream was found
+    try:
+        decompressor.decompress('')
+    except EOFError:
+        return True
+    return False
+
+
+class _Identity(object):
+    unused_data = ''
+
+    def decompress(self, data):
+        return data
+
+
+class DecompressedStream(io.RawIOBase):
+    """
+    Raw stream of the decompressed data of source. Concatenated streams (e.g. of multiple gzip members) are
+    decompressed one after another. tell is the position in the decompressed data. An IOError is raised if the source
+    ends within a compressed stream.
+    """
+
+    def __init__(self, source, new_decompressor):
+        super(DecompressedStream, self).__init__()
+        self.source = source
+        self.start = source.tell() if source.seekable() else None
+        self.new_decompressor = new_decompressor
+        self._reset()
+
+    def _reset(self):
+        self.decompressor = self.new_decompressor()
+        self.pending = ''
+        self.buffer = ''
+        self.offset = 0
+        self.pos = 0
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence != io.SEEK_SET:
+            raise IOError('only seeking from the start or the current position is supported')
+
+        if offset < self.pos:
+            if self.start is None:
+                raise IOError('can\'t seek backwards in a stream')
+            self.source.seek(self.start)
+            self._reset()
+
+        while self.pos < offset and self._fill():
+            n = min(offset - self.pos, len(self.buffer) - self.offset)
+            self.offset += n
+            self.pos += n
+
+        return self.pos
+
+    def readinto(self, b):
+        if not self._fill():
+            return 0
+
+        n = min(len(b), len(self.buffer) - self.offset)
+        b[:n] = self.buffer[self.offset:self.offset + n]
+        self.offset += n
+        self.pos += n
+        return n
+
+    def _fill(self):
+        """
+        Decompresses the next chunk if the buffer is exhausted, returns False at the end of the stream.
+        """
+        while self.offset == len(self.buffer):
+            if self.eof:
+                return False
+
+            data = self.pending or self.source.read(CHUNK_SIZE)
+            self.pending = ''
+            if not data:
+                self.eof = True
+                if self.new_decompressor is not _Identity and not _finished(self.decompressor):
+                    raise IOError('compressed input is truncated')
+                return False
+
+            try:
+                self.buffer = self.decompressor.decompress(data)
+            except EOFError:
+                # the previous stream is complete, the data starts a new one
+                self.decompressor = self.new_decompressor()
+                self.buffer = self.decompressor.decompress(data)
+            self.offset = 0
+
+            unused = getattr(self.decompressor, 'unused_data', '')
+            if unused:
+                self.pending = unused
+                self.decompressor = self.new_decompressor()
+
+        return True
+
+    def close(self):
+        if not self.closed:
+            self.source.close()
+        super(DecompressedStream, self).close()
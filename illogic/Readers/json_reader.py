@@ -23,7 +23,7 @@ class JSONReader(InputReader):
         def dummy_logger(*args, **kwargs):
             pass
 
-        booleans, clauses, bool2int, domains, constraints, opt = json_reader.read(input_file, dummy_logger)
+        booleans, clauses, bool2int, domains, constraints, opt, opt_offset = json_reader.read(input_file, dummy_logger)
 
         bounds_override = 'lb' in self.options or 'ub' in self.options
         if bounds_override:
@@ -31,15 +31,34 @@ class JSONReader(InputReader):
                 if dom.has_open_bound():
                     sys.stderr.write('ERROR: overriding bounds is not supported in INC-reader\n')
                     sys.exit(1)
-                else:
-                    self.converter.variables[var] = dom
-        else:
-            self.converter.variables = domains
 
-        self.converter.bool_variables = booleans
-        self.converter.clauses = clauses
-        self.converter.bool_to_int = bool2int
-        self.converter.opt_vector = [(var, w) for var, w in opt.iteritems()]
+        # the names of the dump are kept, ids are handed out in the original variable order
+        var_table = {}
+        for var in sorted(domains.iterkeys(), key=JSONReader._natural_key):
+            var_table[var] = self.converter.new_int_variable(domains[var], name=var)
+
+        bool_table = {'1': self.converter.TRUE >> 1}
+        for var in sorted(booleans, key=JSONReader._natural_key):
+            if var not in bool_table:
+                bool_table[var] = self.converter.new_bool_variable(name=var)
+
+        def literal(name, sign=True):
+            if name == '0':
+                return self.converter.FALSE if sign else self.converter.TRUE
+            elif name[0] == '-':
+                return self.converter.literal(bool_table[name[1:]], not sign)
+            return self.converter.literal(bool_table[name], sign)
+
+        self.converter.clauses = [[literal(lit) for lit in clause] for clause in clauses]
+        self.converter.bool_to_int = [(literal(b), var_table[i]) for b, i in bool2int]
+        self.converter.opt_vector = [(var_table[var], w) for var, w in opt.iteritems()]
+        self.converter.opt_offset = opt_offset
 
         for c in constraints:
-            self.converter.add_ge_constraint(c.terms, c.b, c.reified)
+            r = literal(*c.reified) if c.reified is not None else None
+            self.converter.add_range_constraint([(var_table[var], w) for var, w in c.terms], c.b, c.upper, r)
+
+    @staticmethod
+    def _natural_key(name):
+        prefix = name.rstrip('0123456789')
+        return (int(name[len(prefix):]) if len(prefix) < len(name) else -1), prefix
@@ -1,8 +1,7 @@
-import collections
 import re
-import sys
 
 from InputReader import InputReader
+from input_stream import open_seekable
 from ..domains.contiguous.contiguous_domain import ContiguousDomain
 
 keywords_max = ['MAXIMIZE', 'MAXIMUM', 'MAX']
@@ -18,155 +17,244 @@ keywords = ['END'] + keywords_obj + keywords_con + keywords_var
 INF = float('inf')
 
 
-def tokenize(s):
-    Token = collections.namedtuple('Token', ['typ', 'value', 'line', 'column'])
-
-    token_specification = [
-        ('KEYWORD', '|'.join('(^%s)' % kw for kw in keywords)),
-        ('CONST', '(-?(infinity|inf))|free'),
-        ('LABEL', r'\w+:'),
-        ('NUMBER', r'\d+(\.\d*)?'),
-        ('ARITHMETIC', r'[*+-]'),
-        ('OPERATOR', r'(?:<=)|(=<)|<|(>=)|(=>)|>|=|\[|\]'),
-        ('ID', r'\w+'),
-        ('NEWLINE', r'\n'),
-        ('SKIP', r'[ \t]'),
-        ('COMMENT', r'\\[^\n]*'),
-    ]
-    tok_regex = '|'.join('(?P<%s>%s)' % pair for pair in token_specification)
-    get_token = re.compile(tok_regex, flags=re.I | re.M).match
-    line = 1
-    pos = line_start = 0
-
-    mo = get_token(s)
-    while mo is not None:
+# token types of tokenize
+KEYWORD = 'KEYWORD'
+CONST = 'CONST'
+LABEL = 'LABEL'
+NUMBER = 'NUMBER'
+ARITHMETIC = 'ARITHMETIC'
+OPERATOR = 'OPERATOR'
+ID = 'ID'
+
+# whitespace separated tokens which are recognized by a dict lookup, relations are normalized to <=, >= and =
+simple_tokens = {
+    '+': (ARITHMETIC, '+'),
+    '-': (ARITHMETIC, '-'),
+    '*': (ARITHMETIC, '*'),
+    '<=': (OPERATOR, '<='),
+    '=<': (OPERATOR, '<='),
+    '<': (OPERATOR, '<='),
+    '>=': (OPERATOR, '>='),
+    '=>': (OPERATOR, '>='),
+    '>': (OPERATOR, '>='),
+    '=': (OPERATOR, '='),
+    '[': (OPERATOR, '['),
+    ']': (OPERATOR, ']')
+}
+constants = ('inf', 'infinity', 'free')
+
+re_keyword = re.compile('(%s)(?!\w)' % '|'.join([re.escape(kw) for kw in keywords]), flags=re.I)
+re_token = re.compile('|'.join([
+    '(?P<CONST>-?(?:infinity|inf)(?!\w)|free(?!\w))',
+    '(?P<LABEL>\w+:)',
+    '(?P<NUMBER>\d+(?:\.\d*)?)',
+    '(?P<ARITHMETIC>[*+-])',
+    '(?P<OPERATOR><=|=<|>=|=>|<|>|=|\[|\])',
+    '(?P<ID>\w+)'
+]), flags=re.I)
+
+
+def tokenize(lines, first_line=1):
+    """
+    Scans the lines of an LP file (starting at line number first_line) and yields (type, value, line number) tuples.
+    Comments are cut off, keywords are only recognized at the beginning of a line. Every line is split at whitespace
+    first, only parts which aren't a single token (e.g. '3x', 'c1:-x') are scanned by a regex.
+    """
+    for line_no, line in enumerate(lines, first_line):
+        comment = line.find('\\')
+        if comment >= 0:
+            line = line[:comment]
+
+        chunks = line.split()
+        if not chunks:
+            continue
+
+        if not line[0].isspace():
+            mo = re_keyword.match(line)
+            if mo is not None:
+                yield KEYWORD, mo.group(), line_no
+                chunks = line[mo.end():].split()
+
+        for chunk in chunks:
+            token = simple_tokens.get(chunk)
+            if token is not None:
+                yield token[0], token[1], line_no
+            elif chunk.isdigit():
+                yield NUMBER, chunk, line_no
+            elif chunk[0].isalpha() and chunk.isalnum():
+                yield (CONST if chunk.lower() in constants else ID), chunk, line_no
+            else:
+                for token in _scan(chunk, line_no):
+                    yield token
+
+
+def _scan(chunk, line_no):
+    pos = 0
+    while pos < len(chunk):
+        mo = re_token.match(chunk, pos)
+        if mo is None:
+            raise RuntimeError('Unexpected character %r on line %d' % (chunk[pos], line_no))
+
         typ = mo.lastgroup
-        if typ == 'NEWLINE':
-            line_start = pos
-            line += 1
-        elif typ != 'SKIP' and typ != 'COMMENT':
-            val = mo.group(typ)
-            # if typ == 'ID' and val.upper() in keywords:
-            #     typ = 'KEYWORD'
-            yield Token(typ, val, line, mo.start() - line_start)
+        if typ == OPERATOR:
+            yield simple_tokens[mo.group()] + (line_no,)
+        else:
+            yield typ, mo.group(), line_no
         pos = mo.end()
-        mo = get_token(s, pos)
-    if pos != len(s):
-        raise RuntimeError('Unexpected character %r on line %d' % (s[pos], line))
 
 
 class LPReader(InputReader):
+    """
+    Reads LP files in two passes. The first pass indexes the byte offsets of the sections, then the variable sections
+    (bounds, binaries, generals) are read, thus the domains are known when the variables are created. Finally the
+    objective and the constraints are streamed into the converter, without holding the tokens or the constraints in
+    memory. stdin and compressed files are spooled into a temporary file first.
+    """
+
     def __init__(self, **options):
         super(LPReader, self).__init__(**options)
-        self.tokens = None
         self.var_table = {}
         self.op_map = None
-        self.constraints = {}
+
+        # name -> [lb, ub] of the variables declared in the variable sections, in the order of their declaration
+        self.domains = {}
+        self.declared = []
 
         # default domain
         self.d_lb = -float('inf') if 'lb' not in options else options['lb']
         self.d_ub = float('inf') if 'ub' not in options else options['ub']
         self.default_dom = ContiguousDomain(0, self.d_ub)
-        self.free_dom = ContiguousDomain(self.d_lb, self.d_ub)
         self.convert_float = 'convert_float' in options and options['convert_float'] is not False
 
     def set_converter(self, converter):
         super(LPReader, self).set_converter(converter)
         self.op_map = {
             '=': self.converter.add_eq_constraint,
-            '!=': self.converter.add_ne_constraint,
-            '<': self.converter.add_le_constraint,
-            '>': self.converter.add_ge_constraint,
             '<=': self.converter.add_le_constraint,
-            '>=': self.converter.add_ge_constraint,
-            '=<': self.converter.add_le_constraint,
-            '=>': self.converter.add_ge_constraint
+            '>=': self.converter.add_ge_constraint
         }
 
     def parse(self, input_file, **kwargs):
         self.converter.set_instance_name(input_file)
+        self.var_table = {}
+        self.domains = {}
+        self.declared = []
 
-        # TODO gzip
-        if type(input_file) == str:
-            with open(input_file) as inst:
-                s = inst.read()
-        elif type(input_file) == file:
-            s = input_file.read()
-        else:
-            sys.stderr.write("Error: input no readable\n")
-            sys.exit(1)
-
-        self.tokens = tokenize(s)
-
-        section = self.tokens.next().value
-        self.dispatch_section(section)
-
-        for op, constraints in self.constraints.items():
-            for c in constraints:
-                op(*c)
+        f = open_seekable(input_file)
 
-        for var, dom in self.converter.variables.items():
+        try:
+            sections = LPReader.index_sections(f)
+
+            for kw, start, end, line_no in sections:
+                if kw.upper() in keywords_var:
+                    self.parse_variable_section(kw, tokenize(LPReader.section_lines(f, start, end), line_no))
+
+            for kw, start, end, line_no in sections:
+                tokens = tokenize(LPReader.section_lines(f, start, end), line_no)
+                if kw.upper() in keywords_obj:
+                    self.parse_obj_section(kw, tokens)
+                elif kw.upper() in keywords_con:
+                    self.parse_constraints_section(tokens)
+        finally:
+            f.close()
+
+        # variables which only occur in the variable sections
+        for name in self.declared:
+            self.get_var(name)
+
+        for dom in self.converter.variables:
             if dom.len() == INF:
                 self.converter.set_inf_bounds()
                 break
 
-    def parse_obj_section(self, kw):
+    @staticmethod
+    def index_sections(f):
+        """
+        Returns (keyword, start, end, line number) for every section of the file, start and end are the byte offsets of
+        its content, which starts right after the keyword.
+        """
+        sections = []
+        pos = 0
+        f.seek(0)
+
+        for line_no, line in enumerate(f, 1):
+            if line[0] not in ' \t\r\n\\':
+                mo = re_keyword.match(line)
+                if mo is not None:
+                    if sections:
+                        sections[-1][2] = pos
+                    sections.append([mo.group(), pos + mo.end(), None, line_no])
+            pos += len(line)
+
+        if sections:
+            sections[-1][2] = pos
+        return sections
+
+    @staticmethod
+    def section_lines(f, start, end):
+        f.seek(start)
+        pos = start
+        for line in f:
+            if pos >= end:
+                break
+            pos += len(line)
+            yield line
+
+    def parse_variable_section(self, kw, tokens):
+        kw = kw.upper()
+        if kw in keywords_bnd:
+            self.parse_bounds_section(tokens)
+        elif kw in keywords_bin or kw in keywords_gen:
+            self.parse_binaries_section(kw, tokens)
+        else:
+            raise Exception('section not supported: %s' % kw)
+
+    def parse_obj_section(self, kw, tokens):
         n = None
         minus = False
 
         if kw.upper()[0:3] == 'MAX':
             self.converter.set_opt_strategy('maximize')
 
-        for token in self.tokens:
-            if token.typ == 'KEYWORD':
-                self.dispatch_section(token.value)
-                return
-
-            if token.typ == 'NUMBER':
-                n = self._convert_float(token.value)
-            elif token.typ == 'ARITHMETIC':
-                minus = token.value == '-'
-            elif token.typ == 'ID':
+        for typ, value, line_no in tokens:
+            if typ == NUMBER:
+                n = self._convert_float(value)
+            elif typ == ARITHMETIC:
+                minus = value == '-'
+            elif typ == ID:
                 if n is None:
                     n = 1
-                var = self.get_var(token.value)
+                var = self.get_var(value)
                 self.converter.add_to_opt_vector(var, n * (-1 if minus else 1))
                 n = None
                 minus = False
 
-    def parse_constraints_section(self):
+    def parse_constraints_section(self, tokens):
         terms = []
         n = op = None
         minus = False
 
-        for token in self.tokens:
-            if token.typ == 'KEYWORD':
-                self.dispatch_section(token.value)
-                return
-
-            if token.typ == 'ID':
-                var = self.get_var(token.value)
+        for typ, value, line_no in tokens:
+            if typ == ID:
+                var = self.get_var(value)
                 if n is None:
                     n = 1
                 terms.append((var, n * (-1 if minus else 1)))
                 n, minus = None, False
-            elif token.typ == 'ARITHMETIC':
-                minus = token.value == '-'
-            elif token.typ == 'NUMBER':
+            elif typ == ARITHMETIC:
+                minus = value == '-'
+            elif typ == NUMBER:
                 if op is None:
-                    n = self._convert_float(token.value)
+                    n = self._convert_float(value)
                 else:
-                    # delay constraints registration for more domain knowledge
-                    if op in self.constraints:
-                        self.constraints[op].append((terms, self._convert_float(token.value)))
-                    else:
-                        self.constraints[op] = [(terms, self._convert_float(token.value))]
+                    op(terms, self._convert_float(value) * (-1 if minus else 1))
                     n = op = None
+                    minus = False
                     terms = []
-            elif token.typ == 'OPERATOR':
-                if token.value == '[' or token.value == ']':
+            elif typ == OPERATOR:
+                if value == '[' or value == ']':
                     raise Exception("quadratic expressions not supported")
-                op = self.op_map[token.value]
+                op = self.op_map[value]
 
     def _convert_float(self, n):
         try:
@@ -177,78 +265,90 @@ class LPReader(InputReader):
             else:
                 raise
 
-    def parse_bounds_section(self):
-        lb = ub = var = op = None
-        line = -1
-
-        for token in self.tokens:
-            if token.typ == 'KEYWORD':
-                var = self.get_var(var)
-                self.converter.variables[var] = ContiguousDomain(lb if lb is not None else 0,
-                                                                 ub if ub is not None else self.d_ub)
-                self.dispatch_section(token.value)
-                return
-
-            if token.line > line and var is not None:
-                var = self.var_table[var]
-                dom = ContiguousDomain(lb if lb is not None else 0, ub if ub is not None else self.d_ub)
-                self.converter.variables[var] = dom
-                lb = ub = var = None
-
-            line = token.line
-
-            if token.typ == 'ID':
-                var = token.value
-            elif token.typ == 'NUMBER':
+    def parse_bounds_section(self, tokens):
+        line = []
+        for token in tokens:
+            if line and token[2] != line[0][2]:
+                self.parse_bound(line)
+                line = []
+            line.append(token)
+
+        if line:
+            self.parse_bound(line)
+
+    def parse_bound(self, tokens):
+        """
+        Parses the bound of a single line, e.g. 'x <= 5', '-3 <= x <= 5', 'x = 2', 'x >= -inf' or 'x free'. Only the
+        given sides of the domain are changed.
+        """
+        var = op = value = lower = upper = None
+        minus = False
+
+        for typ, token, line_no in tokens:
+            if typ == ARITHMETIC:
+                minus = token == '-'
+            elif typ == NUMBER or typ == CONST and token.lower() != 'free':
+                if typ == NUMBER:
+                    n = self._convert_float(token) * (-1 if minus else 1)
+                else:
+                    n = self.d_lb if minus or token[0] == '-' else self.d_ub
+                minus = False
+
                 if var is None:
-                    lb = self._convert_float(token.value)
+                    value = n
                 elif op == '<=':
-                    ub = self._convert_float(token.value)
+                    upper = n
                 elif op == '>=':
-                    lb = self._convert_float(token.value)
-            elif token.typ == 'CONST':
-                if token.value == 'free':
-                    lb, ub = self.d_lb, self.d_ub
-                elif token.value.upper()[0:3] == 'INF' or token.value.upper()[0:4] == '-INF':
-                    if op == '<=' and token.value[0] != '-':
-                        ub = self.d_ub
-                    elif op == '>=' and token.value[0] == '-':
-                        lb = self.d_lb
-                    else:
-                        raise Exception('corrupt bounds in line %d' % token.line)
-            elif token.typ == 'OPERATOR':
-                op = token.value
-
-    def parse_binaries_section(self, kw):
-        if kw.upper()[0:3] == 'BIN':
-            dom = ContiguousDomain(0, 1)
-        elif kw.upper()[0:3] == 'GEN':
-            dom = self.free_dom
-        else:
-            raise Exception('section not supported: %s' % kw)
-
-        for token in self.tokens:
-            if token.typ == 'KEYWORD':
-                self.dispatch_section(token.value)
-                return
-
-            if token.typ == 'ID':
-                var = self.get_var(token.value)
-                self.converter.variables[var] = dom
-
-    def get_var(self, id):
-        if id in self.var_table:
-            return self.var_table[id]
+                    lower = n
+                elif op == '=':
+                    lower = upper = n
+            elif typ == CONST:
+                lower, upper = self.d_lb, self.d_ub
+            elif typ == OPERATOR:
+                op = token
+                # the constant is given in front of the variable
+                if var is None and value is not None:
+                    if op == '<=' or op == '=':
+                        lower = value
+                    if op == '>=' or op == '=':
+                        upper = value
+                    value = None
+            elif typ == ID:
+                var = token
+
+        if var is None or value is not None:
+            raise Exception('corrupt bounds in line %d' % tokens[0][2])
+
+        dom = self.declare(var)
+        if lower is not None:
+            dom[0] = lower
+        if upper is not None:
+            dom[1] = upper
+
+    def parse_binaries_section(self, kw, tokens):
+        for typ, value, line_no in tokens:
+            if typ == ID:
+                dom = self.declare(value)
+                if kw[0:3] == 'BIN':
+                    dom[0], dom[1] = 0, 1
+
+    def declare(self, name):
+        """
+        Returns the bounds [lb, ub] of a variable of the variable sections. All variables are integers, thus general
+        variables are only declared.
+        """
+        if name not in self.domains:
+            self.domains[name] = [0, self.d_ub]
+            self.declared.append(name)
+        return self.domains[name]
+
+    def get_var(self, name):
+        if name in self.var_table:
+            return self.var_table[name]
+
+        if name in self.domains:
+            dom = ContiguousDomain(*self.domains[name])
         else:
-            self.var_table[id] = self.converter.new_int_variable(self.default_dom)
-            return self.var_table[id]
-
-    def dispatch_section(self, section):
-        if section.upper() in keywords_obj:
-            self.parse_obj_section(section)
-        elif section.upper() in keywords_con:
-            self.parse_constraints_section()
-        elif section.upper() in keywords_bnd:
-            self.parse_bounds_section()
-        elif section.upper() in keywords_bin or section.upper() in keywords_gen:
-            self.parse_binaries_section(section)
+            dom = self.default_dom
+        self.var_table[name] = self.converter.new_int_variable(dom)
+        return self.var_table[name]
@@ -1,6 +1,9 @@
+import sys
+
 from InputReader import InputReader
+from input_stream import open_input
+from mps_stream import MPSStreamParser
 from ..domains.contiguous.contiguous_domain import ContiguousDomain
-from ..vendor.mps_parser import Parser as MPSParser
 
 
 class MPSReader(InputReader):
@@ -9,59 +12,81 @@ class MPSReader(InputReader):
     def __init__(self, **options):
         super(MPSReader, self).__init__(**options)
 
-        self.mps_parser = MPSParser()
-        self.mps_parser.convert_float = 'convert_float' in options
+        self.mps_parser = MPSStreamParser(convert_float='convert_float' in options)
         self.var_table = {}
 
         self.options = options
 
     def parse(self, input_file, **kwargs):
-        is_gzip = (input_file[-2:] == 'gz') if type(input_file) == str else False
+        f = open_input(input_file)
+
+        try:
+            self.mps_parser.parse(f)
+        finally:
+            if input_file != sys.stdin:
+                f.close()
 
-        self.mps_parser.parse_mps(input_file, is_gzip)
-        self.mps_parser.set_bounds()
-        self.mps_parser.sort_vars()
+        self.mps_parser.infer_upper_bounds()
 
-        # weights, profits, capacity, instance_name = self.parse_one_instance(input_file)
-        self.define_variables(self.mps_parser.vars, self.mps_parser.lo, self.mps_parser.up, self.mps_parser.freeLo)
-        self.get_constraints(self.mps_parser.cond, self.mps_parser.rel, self.mps_parser.rhs)
-        self.get_optimization_vector(self.mps_parser.opt.values()[0])
+        self.define_variables(self.mps_parser)
+        self.get_constraints(self.mps_parser)
+        self.get_optimization_vector(self.mps_parser.objective)
+        if self.mps_parser.maximize:
+            self.converter.set_opt_strategy('maximize')
         self.converter.set_instance_name(self.mps_parser.name)
 
-    def define_variables(self, variables, lower_bounds, upper_bounds, free_bounds):
-        for var in variables:
-            if var in lower_bounds:
-                lb = lower_bounds[var]
-            else:
-                lb = 0
+    def define_variables(self, mps):
+        """
+        Creates the integer variables ordered by the size of their domains, columns without an upper bound last.
+        """
+        self.var_table = {}
+
+        def size(col):
+            return mps.up[col] - mps.lo[col] if col in mps.up and col in mps.lo else MPSReader.INF
+
+        for col in sorted(xrange(len(mps.columns)), key=size):
+            lb = mps.lo[col] if col in mps.lo else 0
 
-            if var in upper_bounds:
-                ub = int(upper_bounds[var])
+            if col in mps.up:
+                ub = int(mps.up[col])
             else:
                 ub = self.INF if 'ub' not in self.options else self.options['ub']
                 if ub == self.INF:
                     self.converter.set_inf_bounds()
 
-            self.var_table[var] = self.converter.new_int_variable(ContiguousDomain(lb, ub))
-
-    def get_constraints(self, constraints, relations, b_vector):
-        for constraint_id, weighted_vars in constraints.iteritems():
-            if relations[constraint_id] == 'G':
-                constraint = [(self.var_table[v], w) for v, w in constraints[constraint_id].iteritems()]
-                b_value = 0 if constraint_id not in b_vector else b_vector[constraint_id]
-                self.converter.add_ge_constraint(constraint, b_value)
-            elif relations[constraint_id] == 'L':
-                constraint = [(self.var_table[v], w) for v, w in constraints[constraint_id].iteritems()]
-                # use 0 as default value if no value is given (according to the MPS specs)
-                b_value = 0 if constraint_id not in b_vector else b_vector[constraint_id]
-                self.converter.add_le_constraint(constraint, b_value)
-            elif relations[constraint_id] == 'E':
-                constraint = [(self.var_table[v], w) for v, w in constraints[constraint_id].iteritems()]
-                b_value = 0 if constraint_id not in b_vector else b_vector[constraint_id]
-                self.converter.add_eq_constraint(constraint, b_value)
+            self.var_table[col] = self.converter.new_int_variable(ContiguousDomain(lb, ub))
+
+    def get_constraints(self, mps):
+        """
+        Passes the rows to the converter one at a time. Ranged rows (RANGES section) become a single range constraint.
+        """
+        add = {
+            'G': self.converter.add_ge_constraint,
+            'L': self.converter.add_le_constraint,
+            'E': self.converter.add_eq_constraint
+        }
+
+        for row, typ in enumerate(mps.row_types):
+            cols, vals = mps.row(row)
+            # rows without coefficients are skipped
+            if not cols:
+                continue
+
+            terms = [(self.var_table[col], w) for col, w in zip(cols, vals)]
+            # use 0 as default value if no value is given (according to the MPS specs)
+            b = mps.rhs.get(row, 0)
+
+            if row not in mps.ranges:
+                add[typ](terms, b)
+                continue
+
+            r = mps.ranges[row]
+            if typ == 'G' or typ == 'E' and r > 0:
+                lb, ub = b, b + abs(r)
             else:
-                raise Exception('undefined constraint relation: ' + relations[constraint_id])
+                lb, ub = b - abs(r), b
+            self.converter.add_range_constraint(terms, lb, ub)
 
-    def get_optimization_vector(self, weighted_vars):
-        for var, weight in weighted_vars.iteritems():
-            self.converter.add_to_opt_vector(self.var_table[var], weight)
+    def get_optimization_vector(self, objective):
+        for col, weight in objective:
+            self.converter.add_to_opt_vector(self.var_table[col], weight)
@@ -0,0 +1,327 @@
+import sys
+from array import array
+from itertools import izip
+
+
+class MPSStreamParser(object):
+    """
+    Line oriented single pass parser of (free) MPS files. Rows and columns are interned in dicts, the coefficients of
+    the COLUMNS section are kept in flat arrays and transposed into rows (CSR) once the section is complete, thus the
+    memory is linear in the number of nonzeros and the file is never held in memory.
+
+    Supported sections: NAME, OBJSENSE, ROWS, COLUMNS (integer markers are ignored, all columns are integers), RHS,
+    RANGES, BOUNDS and ENDATA. Bounds are kept per column id: lo/up map ids to values, free holds the ids with an
+    open lower bound (FR, MI).
+
+    :type row_names: list[str]
+    :type columns: list[str]
+    """
+    SECTIONS = ('NAME', 'OBJSENSE', 'ROWS', 'COLUMNS', 'RHS', 'RANGES', 'BOUNDS', 'ENDATA')
+
+    def __init__(self, convert_float=False):
+        self.convert_float = convert_float
+        self.reset()
+
+    def reset(self):
+        self.name = ''
+        self.maximize = False
+
+        self.objective_name = None
+        self.row_names = []
+        self.row_types = []
+        self.row_index = {}
+        self.rhs = {}
+        self.ranges = {}
+
+        self.columns = []
+        self.col_index = {}
+        self.objective = []
+        self.lo = {}
+        self.up = {}
+        self.free = set()
+
+        # coefficients of the COLUMNS section in file order
+        self._entry_rows = array('l')
+        self._entry_cols = array('l')
+        self._entry_vals = array('l')
+
+        # rows in CSR form, see finish
+        self.row_start = array('l', [0])
+        self.row_cols = array('l')
+        self.row_vals = array('l')
+
+        self._line_no = 0
+
+    def parse(self, f):
+        """
+        Parses the MPS file f line by line.
+        """
+        self.reset()
+        section = None
+        handlers = {
+            'OBJSENSE': self._parse_objsense,
+            'ROWS': self._parse_row,
+            'COLUMNS': self._parse_column,
+            'RHS': self._parse_rhs,
+            'RANGES': self._parse_range,
+            'BOUNDS': self._parse_bound
+        }
+        # rows of the current column, to detect double entries
+        self._column_rows = (None, set())
+
+        for line in f:
+            self._line_no += 1
+            if not line.strip() or line[0] == '*':
+                continue
+
+            fields = line.split()
+
+            if not line[0].isspace():
+                section = fields[0].upper()
+                if section not in MPSStreamParser.SECTIONS:
+                    self._error('unknown section %s' % fields[0])
+                elif section == 'NAME':
+                    self.name = fields[1] if len(fields) > 1 else ''
+                elif section == 'OBJSENSE' and len(fields) > 1:
+                    self._parse_objsense(fields[1:])
+                elif section == 'ENDATA':
+                    break
+                continue
+
+            if section not in handlers:
+                self._error('unexpected line outside of a section')
+            handlers[section](fields)
+
+        if self.objective_name is None:
+            self._error('missing objective function')
+
+        self._column_rows = None
+        self.finish()
+
+    def finish(self):
+        """
+        Transposes the coefficients into rows, lower bounds of free columns are dropped and the missing lower bounds are
+        set to 0.
+        """
+        n_rows = len(self.row_names)
+        counts = array('l', [0]) * (n_rows + 1)
+        for row in self._entry_rows:
+            counts[row + 1] += 1
+        for row in xrange(n_rows):
+            counts[row + 1] += counts[row]
+
+        self.row_start = array('l', counts)
+        self.row_cols = array('l', [0]) * len(self._entry_cols)
+        self.row_vals = array('l', [0]) * len(self._entry_vals)
+
+        # stable counting sort, the terms of a row keep the order of the columns
+        for row, col, val in izip(self._entry_rows, self._entry_cols, self._entry_vals):
+            pos = counts[row]
+            self.row_cols[pos] = col
+            self.row_vals[pos] = val
+            counts[row] += 1
+
+        self._entry_rows, self._entry_cols, self._entry_vals = array('l'), array('l'), array('l')
+
+        for col in xrange(len(self.columns)):
+            if col in self.lo:
+                self.free.discard(col)
+            elif col not in self.free:
+                self.lo[col] = 0
+
+    def row(self, row):
+        """
+        Returns the columns and the coefficients of a row.
+        """
+        start, end = self.row_start[row], self.row_start[row + 1]
+        return self.row_cols[start:end], self.row_vals[start:end]
+
+    def infer_upper_bounds(self):
+        """
+        Derives upper bounds of columns without one from the rows: the bounded columns of a row (as >= inequality) are
+        moved to the right hand side by their upper bound (positive coefficient) or lower bound (negative coefficient),
+        if only columns with negative coefficients remain, they are bounded by the right hand side.
+
+        The rows are processed in rounds with a worklist: a round only revisits the rows of the columns whose upper
+        bound changed in the previous round, thus the work is proportional to the nonzeros of the rows touched by a
+        bound change instead of all rows per round.
+        """
+        factors = {'E': (1, -1), 'G': (1,), 'L': (-1,)}
+        sums, rhs = {}, {}
+        # column -> keys of sums containing it
+        col_keys = {}
+
+        for row, typ in enumerate(self.row_types):
+            cols, vals = self.row(row)
+            for m in factors[typ]:
+                if any([m * val < 0 for col, val in izip(cols, vals) if col not in self.up]):
+                    key = row, m
+                    sums[key] = dict([(col, m * val) for col, val in izip(cols, vals)])
+                    rhs[key] = m * self.rhs.get(row, 0)
+                    for col in cols:
+                        col_keys.setdefault(col, []).append(key)
+
+        dirty = set(sums)
+        while dirty:
+            for key in dirty:
+                terms = sums[key]
+                for col, val in terms.items():
+                    if val == 0:
+                        del terms[col]
+                    elif col in self.up and val > 0:
+                        rhs[key] -= val * self.up[col]
+                        del terms[col]
+                    elif col in self.up and col in self.lo:
+                        rhs[key] -= val * self.lo[col]
+                        del terms[col]
+                if not terms:
+                    del sums[key]
+
+            changed = set()
+            for key in dirty:
+                terms = sums.get(key)
+                if terms and all([val < 0 for val in terms.itervalues()]):
+                    for col, val in terms.iteritems():
+                        if col not in self.up or rhs[key] / val < self.up[col]:
+                            self.up[col] = rhs[key] / val
+                            changed.add(col)
+
+            dirty = set([key for col in changed for key in col_keys[col] if key in sums])
+
+    def _parse_objsense(self, fields):
+        sense = fields[0].upper()
+        if sense in ('MAX', 'MAXIMIZE'):
+            self.maximize = True
+        elif sense in ('MIN', 'MINIMIZE'):
+            self.maximize = False
+        else:
+            self._error('unknown objective sense %s' % fields[0])
+
+    def _parse_row(self, fields):
+        if len(fields) < 2:
+            self._error('incomplete row')
+        typ, name = fields[0].upper(), fields[1]
+
+        if typ == 'N':
+            if self.objective_name is not None:
+                self._error('multiple objective functions %s and %s' % (self.objective_name, name))
+            self.objective_name = name
+        elif typ in ('E', 'G', 'L'):
+            if name in self.row_index:
+                self._error('double entry in ROWS: %s' % name)
+            self.row_index[name] = len(self.row_names)
+            self.row_names.append(name)
+            self.row_types.append(typ)
+        else:
+            self._error('unknown row type %s' % fields[0])
+
+    def _parse_column(self, fields):
+        if len(fields) > 2 and fields[1] == "'MARKER'":
+            return
+        elif len(fields) < 3 or len(fields) % 2 == 0:
+            self._error('malformed COLUMNS entry')
+
+        name = fields[0]
+        col = self.col_index.get(name)
+        if col is None:
+            col = self.col_index[name] = len(self.columns)
+            self.columns.append(name)
+
+        if self._column_rows[0] != col:
+            self._column_rows = (col, set())
+        seen = self._column_rows[1]
+
+        for i in xrange(1, len(fields), 2):
+            row_name, val = fields[i], self._to_int(fields[i + 1])
+
+            if row_name == self.objective_name:
+                row = -1
+            else:
+                row = self.row_index.get(row_name)
+                if row is None:
+                    self._error('%s in COLUMNS is not defined in ROWS' % row_name)
+
+            if row in seen:
+                self._error('double entry in COLUMNS: column %s, row %s' % (name, row_name))
+            seen.add(row)
+
+            if row < 0:
+                self.objective.append((col, val))
+            else:
+                self._entry_rows.append(row)
+                self._entry_cols.append(col)
+                self._entry_vals.append(val)
+
+    def _parse_rhs(self, fields):
+        self._parse_row_values(fields, self.rhs, 'RHS')
+
+    def _parse_range(self, fields):
+        self._parse_row_values(fields, self.ranges, 'RANGES')
+
+    def _parse_row_values(self, fields, values, section):
+        # the name of the vector is optional
+        start = 1 if len(fields) % 2 == 1 else 0
+        for i in xrange(start, len(fields) - 1, 2):
+            row_name = fields[i]
+            if row_name == self.objective_name:
+                sys.stderr.write('WARNING: %s of the objective function is ignored\n' % section)
+                continue
+
+            row = self.row_index.get(row_name)
+            if row is None:
+                self._error('%s in %s is not defined in ROWS' % (row_name, section))
+            elif row in values:
+                self._error('double entry in %s: %s' % (section, row_name))
+            values[row] = self._to_int(fields[i + 1])
+
+    def _parse_bound(self, fields):
+        typ = fields[0].upper()
+        has_value = typ not in ('FR', 'MI', 'PL', 'BV')
+        if len(fields) < 2 + has_value:
+            self._error('incomplete bound')
+
+        # the name of the bound vector is optional
+        name = fields[2] if len(fields) > 2 + has_value else fields[1]
+        col = self.col_index.get(name)
+        if col is None:
+            col = self.col_index[name] = len(self.columns)
+            self.columns.append(name)
+
+        if typ in ('UP', 'UI', 'SC'):
+            self._set_bound(self.up, col, fields)
+        elif typ in ('LO', 'LI'):
+            self._set_bound(self.lo, col, fields)
+        elif typ == 'BV':
+            self._set_bound(self.lo, col, fields, 0)
+            self._set_bound(self.up, col, fields, 1)
+        elif typ == 'FX':
+            self._set_bound(self.lo, col, fields)
+            self._set_bound(self.up, col, fields)
+        elif typ in ('FR', 'MI'):
+            self.free.add(col)
+        elif typ != 'PL':
+            self._error('unknown bound type %s' % fields[0])
+
+    def _set_bound(self, bounds, col, fields, value=None):
+        if col in bounds:
+            self._error('double entry in BOUNDS: %s %s' % (fields[0], self.columns[col]))
+        bounds[col] = value if value is not None else self._to_int(fields[-1])
+
+    def _to_int(self, s):
+        try:
+            return int(s)
+        except ValueError:
+            pass
+
+        try:
+            f = float(s)
+        except ValueError:
+            self._error('can not convert \'%s\' to integer' % s)
+
+        if f != int(f) and not self.convert_float:
+            self._error('\'%s\' has a floating value' % s)
+        return int(f)
+
+    def _error(self, error):
+        sys.stderr.write('ERROR: line %d: %s\n' % (self._line_no, error))
+        sys.exit(1)
@@ -1,8 +1,8 @@
-import gzip
 import re
 import sys
 
 from InputReader import InputReader
+from input_stream import open_input
 from ..domains.contiguous.contiguous_domain import ContiguousDomain
 
 
@@ -17,14 +17,11 @@ class PisingerReader(InputReader):
         self.EOF = False
 
     def parse(self, input_file, offset=0):
-        is_gzip = (input_file[-2:] == 'gz') if type(input_file) == str else False
+        f = open_input(input_file)
+        instance = self.parse_one_instance(f, offset=offset)
 
-        if input_file != sys.stdin and not is_gzip:
-            input_file = open(input_file, "r")
-        elif type(input_file) == str:
-            input_file = gzip.open(input_file, "r")
-
-        instance = self.parse_one_instance(input_file, offset=offset)
+        if input_file != sys.stdin:
+            f.close()
 
         if not instance:
             return None
@@ -36,9 +33,6 @@ class PisingerReader(InputReader):
         self.get_optimization_strategy()
         self.converter.set_instance_name(instance_name)
 
-        if input_file != sys.stdin:
-            input_file.close()
-
         return True
 
     def get_constraints(self, weights, capacity):
@@ -1,5 +1,9 @@
+import shutil
+import tempfile
 from abc import ABCMeta, abstractmethod
 
+from .. import pseudo_boolean
+
 
 class OutputWriter:
     """
@@ -8,14 +12,113 @@ class OutputWriter:
     """
     __metaclass__ = ABCMeta
 
+    # body sections which don't depend on global information and thus can be written while the input is still parsed
+    stream_sections = ('clauses', 'constraints', 'b2i')
+    streamable = True
+    # writers which express equalities and ranges (upper bound of write_constraint) directly, for all others they are
+    # split into two >= constraints
+    native_ranges = False
+    # writers which have a compact form for constraints over 0/1 variables, see write_row
+    native_pb = False
+
     def __init__(self, **options):
         self.converter = None
         self.output_file = None
         self.options = options
 
+        self.spools = None
+        self.streamed = dict.fromkeys(OutputWriter.stream_sections, 0)
+
     def set_converter(self, converter):
         self.converter = converter
 
     @abstractmethod
     def write(self, output, int_vars_with_bounds, bool_vars, opt_vector, constraints, clauses, b2i):
         pass
+
+    def write_clause(self, *literals):
+        raise NotImplementedError
+
+    def write_constraint(self, variables, weights, b, reified, upper=None):
+        raise NotImplementedError
+
+    def write_pb_constraint(self, kind, variables, weights, b, upper=None):
+        self.write_constraint(variables, weights, b, None, upper)
+
+    def write_b2i(self, b, i):
+        raise NotImplementedError
+
+    def write_row(self, variables, weights, b, reified, upper=None):
+        """
+        Writes a constraint of the ConstraintStore. If the writer has a native form for them, constraints over 0/1
+        variables which aren't reified are passed to write_pb_constraint along with their class (see
+        pseudo_boolean.classify). Streamed constraints are always written by write_constraint, since the domains may
+        still change while the input is parsed.
+        """
+        kind = None
+        if self.native_pb and reified is None:
+            kind = pseudo_boolean.classify(self.converter.variables, variables, weights, b, upper)
+
+        if kind is None:
+            self.write_constraint(variables, weights, b, reified, upper)
+        else:
+            self.write_pb_constraint(kind, variables, weights, b, upper)
+
+    def open_stream(self):
+        """
+        Switches the writer into streaming mode. Clauses, constraints and bool2int constraints passed to the stream_*
+        methods are formatted immediately into a temporary spool file per section. The following call of write()
+        outputs the header sections (domains, objective) followed by the spooled body sections.
+        """
+        self.close_stream()
+        self.spools = {section: tempfile.TemporaryFile('w+') for section in OutputWriter.stream_sections}
+        self.streamed = dict.fromkeys(OutputWriter.stream_sections, 0)
+
+    def close_stream(self):
+        if self.spools is not None:
+            for spool in self.spools.values():
+                spool.close()
+            self.spools = None
+
+    def stream_clause(self, *literals):
+        self._stream('clauses', self.write_clause, literals)
+
+    def stream_constraint(self, variables, weights, b, reified, upper=None):
+        if upper is None:
+            self._stream('constraints', self.write_constraint, (variables, weights, b, reified))
+        elif self.native_ranges:
+            self._stream('constraints', self.write_constraint, (variables, weights, b, reified, upper))
+        else:
+            self.stream_constraint(variables, weights, b, reified)
+            self.stream_constraint(variables, [-w for w in weights], -upper, reified)
+
+    def stream_b2i(self, b, i):
+        self._stream('b2i', self.write_b2i, (b, i))
+
+    def _stream(self, section, write_item, item):
+        output_file = self.output_file
+        self.output_file = self.spools[section]
+        write_item(*item)
+        self.output_file = output_file
+        self.streamed[section] += 1
+
+    def write_section(self, section, n, items, write_item, header='', footer='', always=False):
+        """
+        Writes the n given items of a body section followed by the items streamed into the section so far.
+        Header and footer are only written if the section is not empty, unless always is set.
+        """
+        n += self.streamed[section]
+
+        if n or always:
+            self.output_file.write(header)
+
+        for item in items:
+            write_item(*item)
+
+        if self.spools is not None:
+            spool = self.spools[section]
+            spool.seek(0)
+            shutil.copyfileobj(spool, self.output_file)
+
+        if n or always:
+            self.output_file.write(footer)
@@ -1,6 +1,6 @@
 from .. import OutputWriter
-from .. import ILPParser
 import sys
+from itertools import izip
 
 
 class TinoWriter(OutputWriter.OutputWriter):
@@ -22,22 +22,24 @@ class TinoWriter(OutputWriter.OutputWriter):
         self.output_file.write("% Optimization: COST\n")
 
         for x, w in opt_vector:
-            self.output_file.write("c(%s, %d). " % (x, w))
+            self.output_file.write("c(%s, %d). " % (self.converter.int_name(x), w))
 
         self.output_file.write("\n\n")
 
     def write_constraints(self, constraints):
         """
-        :type constraints: list
+        :type constraints: ConstraintStore
         """
         self.output_file.write("% Conditions\n")
         constraint_counter = 0
+        int_name = self.converter.int_symbols.name
 
-        for var_list, b, _ in constraints:
+        for variables, weights, b, _ in constraints.rows():
             constraint_counter += 1
             last_var = 'start'
 
-            for var, w in var_list:
+            for var, w in izip(variables, weights):
+                var = int_name(var)
                 self.output_file.write("order(%d, %s, (%d, %s)). " % (constraint_counter, last_var, w, var))
                 last_var = var
 
@@ -48,11 +50,10 @@ class TinoWriter(OutputWriter.OutputWriter):
 
     def write_bounds(self, bounds):
         """
-        :type bounds: dict
+        :type bounds: list
         """
         self.output_file.write("% Bounds\n")
 
-        for bound in sorted(bounds.iterkeys(), key=ILPParser.ILPParser.cmp_vars):
-            b = bounds[bound]
-
+        for bound, b in enumerate(bounds):
+            bound = self.converter.int_name(bound)
             self.output_file.write("l(%s, %s). u(%s, %s).\n" % (bound, b.lb(), bound, b.ub()))
\ No newline at end of file
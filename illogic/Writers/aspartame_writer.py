@@ -1,15 +1,20 @@
 import sys
+from itertools import imap, izip
 from OutputWriter import OutputWriter
 from .. import ILPParser
+from .. import pseudo_boolean
 from ..domains.contiguous.contiguous_domain import ContiguousDomain
 
 
 class AspartameWriter(OutputWriter):
     INF = float('inf')
+    native_ranges = True
+    native_pb = True
 
     def __init__(self, **options):
         super(AspartameWriter, self).__init__(**options)
         self.constraint_id = 1
+        self.b2i_counter = 1
 
     def write(self, output_filename, variables_with_bounds, bool_vars, opt_vector, constraints, clauses, b2i):
         if not output_filename:
@@ -19,7 +24,7 @@ class AspartameWriter(OutputWriter):
 
         self.output_file.write('%%% ' + self.converter.instance_name + ' %%%\n\n')
 
-        self.write_bool_variable(bool_vars, len(b2i) * 2)
+        self.write_bool_variable(bool_vars, (len(b2i) + self.streamed['b2i']) * 2)
         self.write_bounds(variables_with_bounds, opt_vector)
         self.write_clauses(clauses)
         self.write_constraints(constraints)
@@ -28,12 +33,15 @@ class AspartameWriter(OutputWriter):
         self.write_objective_fn(opt_vector)
         self.output_file.write('\n')
 
+        self.b2i_counter = 1
+
     def write_bool_variable(self, b_vars, helper_vars):
         if b_vars or helper_vars > 0:
             self.output_file.write('% BOOLEANS\n')
 
+            bool_name = self.converter.bool_symbols.name
             for var in b_vars:
-                self.output_file.write('var(bool, "%s").\n' % var)
+                self.output_file.write('var(bool, "%s").\n' % bool_name(var))
 
             for i in xrange(helper_vars):
                 self.output_file.write('var(bool, "$B%d").\n' % (i + 1))
@@ -44,12 +52,17 @@ class AspartameWriter(OutputWriter):
     def write_bounds(self, domains, opt_vector):
         self.output_file.write('% BOUNDS\n')
 
-        for var in sorted(domains.iterkeys(), key=ILPParser.ILPParser.cmp_vars):
-            lb, ub = domains[var].lb(), domains[var].ub()
+        int_name = self.converter.int_symbols.name
+
+        for var, dom in enumerate(domains):
+            if self.converter.is_eliminated(var):
+                continue
+
+            lb, ub = dom.lb(), dom.ub()
             ub = 'inf' if ub == AspartameWriter.INF else str(ub)
 
             try:
-                self.output_file.write('var(int, "%s", (range(%i, %s))).\n' % (var, lb, ub))
+                self.output_file.write('var(int, "%s", (range(%i, %s))).\n' % (int_name(var), lb, ub))
             except TypeError:
                 sys.stderr.write('Error: infinity bounds not supported\n')
                 sys.stderr.write('Error: translation canceled\n')
@@ -59,93 +72,88 @@ class AspartameWriter(OutputWriter):
             self.write_objective_dom(domains, opt_vector)
 
     def write_objective_dom(self, bounds, opt_vector):
-        lb = ub = 0
-        n_dom = 1
-
-        for var, w in opt_vector:
-            n_dom *= bounds[var].len()
-            if w < 0:
-                lb += w * bounds[var].ub()
-                ub += w * bounds[var].lb()
-            else:
-                lb += w * bounds[var].lb()
-                ub += w * bounds[var].ub()
-
-        if len(opt_vector) == 1:
-            var, w = opt_vector[0]
-            self._write_domain('opt', bounds[var].copy(multiplier=w))
-        if n_dom <= 10000:
-            var, w = opt_vector[0]
-            dom = bounds[var].copy(multiplier=w)
-            for var, w in opt_vector[1:]:
-                d = bounds[var].copy(multiplier=w)
-                dom = ILPParser.ILPParser.merge_dom(dom, d)
-            self._write_domain('opt', dom)
-        else:
-            self._write_domain('opt', ContiguousDomain(lb, ub))
+        runs = ILPParser.ILPParser.sumset_runs([bounds[var].copy(multiplier=w) for var, w in opt_vector])
+        for a, b in runs:
+            self.output_file.write('var(int, "opt", (range(%d, %d))).\n' % (a, b))
 
     def write_clauses(self, clauses):
-        if clauses:
-            self.output_file.write('\n% CLAUSES\n')
+        self.write_section('clauses', len(clauses), clauses, self.write_clause, header='\n% CLAUSES\n')
 
-            for clause in clauses:
-                literals = '; '.join(map(AspartameWriter._format_literal, clause))
-                self.output_file.write('constraint(%d, (%s)).\n' % (self.constraint_id, literals))
-                self.constraint_id += 1
+    def write_clause(self, *literals):
+        literals = '; '.join(map(self._format_literal, literals))
+        self.output_file.write('constraint(%d, (%s)).\n' % (self.constraint_id, literals))
+        self.constraint_id += 1
 
-    @staticmethod
-    def _format_literal(literal):
-        if literal[0] == '-':
-            return 'op(neg, "%s")' % literal[1:]
+    def _format_literal(self, literal):
+        if literal & 1:
+            return 'op(neg, "%s")' % self.converter.bool_name(literal >> 1)
         else:
-            return '"' + literal + '"'
+            return '"' + self.converter.bool_name(literal >> 1) + '"'
 
     def write_constraints(self, constraints):
-        self.output_file.write("\n% CONDITIONS\n")
-
-        rel = "ge"
-
-        for var_list, b, r in constraints:
-            if r is not None:
-                sys.stderr.write("Error: SugarWriter has no support for reified constraints implemented.\n")
-                sys.exit(1)
-            wsum = self.get_weighted_sum(var_list)
-
-            self.output_file.write('constraint(%i, (op(%s, %s, %i))).\n' % (self.constraint_id, rel, wsum, b))
+        self.write_section('constraints', len(constraints), constraints.ranged_rows(), self.write_row,
+                           header="\n% CONDITIONS\n", always=True)
+
+    def write_constraint(self, variables, weights, b, reified, upper=None):
+        if reified is not None:
+            sys.stderr.write("Error: SugarWriter has no support for reified constraints implemented.\n")
+            sys.exit(1)
+
+        wsum = self.get_weighted_sum(izip(imap(self.converter.int_symbols.name, variables), weights))
+        self._write_sum(wsum, b, upper)
+
+    def write_pb_constraint(self, kind, variables, weights, b, upper=None):
+        if kind == pseudo_boolean.PB:
+            return self.write_constraint(variables, weights, b, None, upper)
+
+        # the weights of the 0/1 variables are reduced to their signs
+        signs, b, upper = pseudo_boolean.unit_form(kind, weights, b, upper)
+        self._write_sum(self.get_weighted_sum(izip(imap(self.converter.int_symbols.name, variables), signs)), b, upper)
+
+    def _write_sum(self, wsum, b, upper):
+        if b is None:
+            relations = [("le", upper)]
+        elif upper is None:
+            relations = [("ge", b)]
+        elif upper == b:
+            relations = [("eq", b)]
+        else:
+            relations = [("ge", b), ("le", upper)]
 
+        for rel, c in relations:
+            self.output_file.write('constraint(%i, (op(%s, %s, %i))).\n' % (self.constraint_id, rel, wsum, c))
             self.constraint_id += 1
 
     def write_bool_to_int(self, b2i):
-        if b2i:
-            b2i_counter = 1
-            self.output_file.write('\n% BOOL TO INT')
-
-            c1 = 'constraint(%d,("$B%d";"$B%d")).\n'
-            c2 = 'constraint(%d,("%s";op(neg,"$B%d"))).\n'
-            c3 = 'constraint(%d,(op(le,op(mul,1,"%s"),1);op(neg,"$B%d"))).\n'
-            c4 = 'constraint(%d,(op(ge,op(mul,1,"%s"),1);op(neg,"$B%d"))).\n'
-            c5 = 'constraint(%d,(op(neg,"%s");op(neg,"$B%d"))).\n'
-            c6 = 'constraint(%d,(op(le,op(mul,1,"%s"),0);op(neg,"$B%d"))).\n'
-
-            for b, i in b2i:
-                self.output_file.write('\n%% b2i(%s, %s)\n' % (b, i))
-                self.output_file.write(c1 % (self.constraint_id, b2i_counter, b2i_counter + 1))
-                self.output_file.write(c2 % (self.constraint_id + 1, b, b2i_counter))
-                self.output_file.write(c3 % (self.constraint_id + 2, i, b2i_counter))
-                self.output_file.write(c4 % (self.constraint_id + 3, i, b2i_counter))
-                self.output_file.write(c5 % (self.constraint_id + 4, b, b2i_counter + 1))
-                self.output_file.write(c6 % (self.constraint_id + 5, i, b2i_counter + 1))
-
-                self.constraint_id += 6
-                b2i_counter += 2
+        self.write_section('b2i', len(b2i), b2i, self.write_b2i, header='\n% BOOL TO INT')
+
+    def write_b2i(self, b, i):
+        c1 = 'constraint(%d,("$B%d";"$B%d")).\n'
+        c2 = 'constraint(%d,("%s";op(neg,"$B%d"))).\n'
+        c3 = 'constraint(%d,(op(le,op(mul,1,"%s"),1);op(neg,"$B%d"))).\n'
+        c4 = 'constraint(%d,(op(ge,op(mul,1,"%s"),1);op(neg,"$B%d"))).\n'
+        c5 = 'constraint(%d,(op(neg,"%s");op(neg,"$B%d"))).\n'
+        c6 = 'constraint(%d,(op(le,op(mul,1,"%s"),0);op(neg,"$B%d"))).\n'
+
+        b, i = self.converter.literal_name(b), self.converter.int_name(i)
+        self.output_file.write('\n%% b2i(%s, %s)\n' % (b, i))
+        self.output_file.write(c1 % (self.constraint_id, self.b2i_counter, self.b2i_counter + 1))
+        self.output_file.write(c2 % (self.constraint_id + 1, b, self.b2i_counter))
+        self.output_file.write(c3 % (self.constraint_id + 2, i, self.b2i_counter))
+        self.output_file.write(c4 % (self.constraint_id + 3, i, self.b2i_counter))
+        self.output_file.write(c5 % (self.constraint_id + 4, b, self.b2i_counter + 1))
+        self.output_file.write(c6 % (self.constraint_id + 5, i, self.b2i_counter + 1))
+
+        self.constraint_id += 6
+        self.b2i_counter += 2
 
     @staticmethod
     def get_weighted_sum(var_list):
+        var_list = iter(var_list)
+        op1 = AspartameWriter.create_multiplication(next(var_list))
 
-        op1 = AspartameWriter.create_multiplication(var_list[0])
-
-        for i in xrange(1, len(var_list)):
-            op2 = AspartameWriter.create_multiplication(var_list[i])
+        for parts in var_list:
+            op2 = AspartameWriter.create_multiplication(parts)
             op1 = AspartameWriter.create_sum(op1, op2)
 
         return op1
@@ -161,8 +169,11 @@ class AspartameWriter(OutputWriter):
 
     def write_objective_fn(self, opt_vector):
         if opt_vector:
-            opt_sum = AspartameWriter.get_weighted_sum(opt_vector + [('opt', -1)])
+            int_name = self.converter.int_symbols.name
+            opt_sum = AspartameWriter.get_weighted_sum([(int_name(var), w) for var, w in opt_vector] + [('opt', -1)])
             self.output_file.write('\n% OPTIMIZATION\n')
+            if self.converter.objective_offset():
+                self.output_file.write('%% objective offset %d\n' % self.converter.objective_offset())
             self.output_file.write('constraint(%i, (op(ge, %s, 0))).\n' % (self.constraint_id, opt_sum))
             self.output_file.write('constraint(%i, (op(le, %s, 0))).\n' % (self.constraint_id + 1, opt_sum))
             self.output_file.write('objective(minimize, "opt").\n')
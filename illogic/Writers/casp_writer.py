@@ -1,11 +1,14 @@
 import sys
+from itertools import imap, izip
 from OutputWriter import OutputWriter
-from .. import ILPParser
+from .. import pseudo_boolean
 from ..domains.contiguous.contiguous_domain import ContiguousDomain
 
 
 class CASPWriter(OutputWriter):
     INF = float('inf')
+    native_ranges = True
+    native_pb = True
 
     def __init__(self, **options):
         super(CASPWriter, self).__init__(**options)
@@ -30,7 +33,7 @@ class CASPWriter(OutputWriter):
         self.write_domains(variables_with_bounds, bool_vars)
         self.write_clauses(clauses)
         self.write_constraints(constraints)
-        self.write_b2i(b2i)
+        self.write_bool_to_int(b2i)
 
         self.write_objective_fn(opt_vector)
         self.write_show(variables_with_bounds)
@@ -41,13 +44,18 @@ class CASPWriter(OutputWriter):
         if booleans:
             self.output_file.write('% BOOLS\n')
             for b in booleans:
-                self.write_bool_variable(b)
+                self.write_bool_variable(self.converter.bool_name(b))
             self.output_file.write('{ p(B) : bool(B) }.\n\n')
 
         self.output_file.write('% DOMAINS\n')
 
-        for var in sorted(bounds.iterkeys(), key=ILPParser.ILPParser.cmp_vars):
-            dom = bounds[var]
+        int_name = self.converter.int_symbols.name
+
+        for var, dom in enumerate(bounds):
+            if self.converter.is_eliminated(var):
+                continue
+
+            var = int_name(var)
             lb, ub = dom.lb(), dom.ub()
 
             if (not isinstance(dom, ContiguousDomain) or abs(
@@ -68,37 +76,55 @@ class CASPWriter(OutputWriter):
         self.output_file.write('bool("%s").\n' % var)
 
     def write_clauses(self, clauses):
-        if clauses:
-            self.output_file.write('\n% CLAUSES.\n')
-
-            for clause in clauses:
-                for lit in clause:
-                    if lit[0] == '-':
-                        signed = 1
-                        lit = lit[1:]
-                    else:
-                        signed = 0
-                    self.output_file.write('clause(%d, "%s", %d).\n' % (self.clause_counter, lit, signed))
-                self.clause_counter += 1
-
-            self.output_file.write('clause(ID) :- clause(ID, _, _).\n')
-            self.output_file.write(':- clause(ID), p(B0) : clause(ID, B0, 1); not p(B1) : clause(ID, B1, 0).\n')
+        self.write_section('clauses', len(clauses), clauses, self.write_clause, header='\n% CLAUSES.\n',
+                           footer='clause(ID) :- clause(ID, _, _).\n'
+                                  ':- clause(ID), p(B0) : clause(ID, B0, 1); not p(B1) : clause(ID, B1, 0).\n')
 
-    def write_constraints(self, constraints):
-        self.output_file.write("\n% CONSTRAINTS\n")
+    def write_clause(self, *literals):
+        bool_name = self.converter.bool_symbols.name
 
-        for var_list, b, rel in constraints:
-            w_sum = self.get_weighted_sum(var_list)
+        for lit in literals:
+            signed = lit & 1
+            self.output_file.write('clause(%d, "%s", %d).\n' % (self.clause_counter, bool_name(lit >> 1), signed))
+        self.clause_counter += 1
+
+    def write_constraints(self, constraints):
+        self.write_section('constraints', len(constraints), constraints.ranged_rows(), self.write_row,
+                           header="\n% CONSTRAINTS\n", always=True)
+
+    def write_constraint(self, variables, weights, b, reified, upper=None):
+        w_sum = "; ".join(self.get_weighted_sum(izip(imap(self.converter.int_symbols.name, variables), weights)))
+        self._write_sum(w_sum, b, upper)
+
+    def write_pb_constraint(self, kind, variables, weights, b, upper=None):
+        if kind == pseudo_boolean.PB:
+            return self.write_constraint(variables, weights, b, None, upper)
+
+        # sum of the 0/1 variables without unit weights
+        signs, b, upper = pseudo_boolean.unit_form(kind, weights, b, upper)
+        int_name = self.converter.int_symbols.name
+        w_sum = "; ".join([int_name(var) if sign > 0 else '-1 * ' + int_name(var)
+                           for var, sign in izip(variables, signs)])
+        self._write_sum(w_sum, b, upper)
+
+    def _write_sum(self, w_sum, b, upper):
+        if b is None:
+            self.output_file.write('&sum{ %s } <= %d.\n' % (w_sum, upper))
+        elif upper is None:
+            self.output_file.write('&sum{ %s } >= %d.\n' % (w_sum, b))
+        elif upper == b:
+            self.output_file.write('&sum{ %s } = %d.\n' % (w_sum, b))
+        else:
+            self.output_file.write('&sum{ %s } >= %d.\n' % (w_sum, b))
+            self.output_file.write('&sum{ %s } <= %d.\n' % (w_sum, upper))
 
-            self.output_file.write('&sum{ %s } >= %d.\n' % ("; ".join(w_sum), b))
+    def write_bool_to_int(self, b2i):
+        self.write_section('b2i', len(b2i), b2i, self.write_b2i, header='\n% BOOL TO INT\n',
+                           footer=':- b2i(B, X), p(B), not p(X, 1).\n'
+                                  ':- b2i(B, X), not p(B), p(X, 1).\n')
 
-    def write_b2i(self, b2i):
-        if b2i:
-            self.output_file.write('\n% BOOL TO INT\n')
-            for c in b2i:
-                self.output_file.write('b2i("%s", %s).\n' % c)
-            self.output_file.write(':- b2i(B, X), p(B), not p(X, 1).\n')
-            self.output_file.write(':- b2i(B, X), not p(B), p(X, 1).\n')
+    def write_b2i(self, b, i):
+        self.output_file.write('b2i("%s", %s).\n' % (self.converter.literal_name(b), self.converter.int_name(i)))
 
     @staticmethod
     def get_weighted_sum(var_list):
@@ -114,14 +140,18 @@ class CASPWriter(OutputWriter):
 
     def write_objective_fn(self, opt_vector):
         if len(opt_vector):
-            terms = ["%d * %s" % (w, x) for x, w in opt_vector]
+            terms = ["%d * %s" % (w, self.converter.int_name(x)) for x, w in opt_vector]
             opt_term = "; ".join(terms)
 
+            if self.converter.objective_offset():
+                self.output_file.write("\n%% objective offset %d" % self.converter.objective_offset())
             self.output_file.write("\n&minimize{ %s }." % opt_term)
 
     def write_show(self, variables):
         if "no-show" not in self.options or self.options["no-show"] is False:
-            self.output_file.write('\n&show{ %s }.\n' % "; ".join(variables.keys()))
+            self.output_file.write('\n&show{ %s }.\n' % "; ".join([self.converter.int_name(var)
+                                                                     for var in xrange(len(variables))
+                                                                     if not self.converter.is_eliminated(var)]))
             self.output_file.write('#show p/1.\n\n')
         else:
             self.output_file.write('\n#show.\n')
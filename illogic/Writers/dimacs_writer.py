@@ -0,0 +1,252 @@
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import chain, izip
+from OutputWriter import OutputWriter
+from ..constraint_store import ConstraintStore
+from ..domains.closed_domain import ClosedDomain
+from ..order_encoding.constraint import Constraint
+from ..order_encoding.early_exit_exception import EarlyExitException
+from ..order_encoding.order_encoding import OrderEncoding
+
+
+class DIMACSWriter(OutputWriter):
+    """
+    Translates the instance into propositional CNF in the DIMACS format using the order encoding.
+
+    Boolean variable b is numbered b + 1. An integer variable x with the domain values v_0 < ... < v_k-1 is represented
+    by the order variables first[x] + j - 1 <-> x >= v_j for j = 1, ..., k - 1, which are chained by the order axioms
+    (x >= v_j+1) -> (x >= v_j). Linear constraints are order encoded clause by clause, reified constraints are encoded
+    as r <-> constraint. A reified equality or range r <-> lb <= sum <= ub gets two auxiliary variables ge <-> sum >= lb
+    and le <-> sum <= ub, numbered after the order variables, with r <-> ge & le.
+
+    The clauses are never held in memory: a counting pass over all constraints determines the number of clauses for
+    the header line before a second pass writes them.
+
+    :type values: list[list[int]]
+    :type encoder: OrderEncoding
+    """
+
+    def __init__(self, **options):
+        super(DIMACSWriter, self).__init__(**options)
+        self.values = []
+        self.first = array('l')
+        self.n_vars = 0
+        self.n_aux = 0
+        self.encoder = None
+        self.literal_map = array('l')
+
+    def write(self, output_filename, variables_with_bounds, bool_vars, opt_vector, constraints, clauses, b2i):
+        if not output_filename:
+            raise Exception('no output filename specified')
+
+        self.output_file = file(output_filename + '.cnf', 'w') if output_filename != sys.stdout else sys.stdout
+
+        if type(self.converter.instance_name) == str:
+            self.output_file.write('c %s\n' % self.converter.instance_name)
+
+        self.number_variables(variables_with_bounds, bool_vars)
+
+        if "no-symbols" not in self.options or self.options["no-symbols"] is False:
+            self.write_symbols(bool_vars)
+        self.write_objective_fn(opt_vector)
+
+        n_clauses = sum(1 for _ in self.iter_clauses(constraints, clauses, b2i))
+        self.output_file.write('p cnf %d %d\n' % (self.n_vars + self.n_aux, n_clauses))
+
+        for clause in self.iter_clauses(constraints, clauses, b2i):
+            self.write_clause(*clause)
+
+        if self.output_file != sys.stdout:
+            self.output_file.close()
+
+        self.encoder = None
+        self.literal_map = array('l')
+
+    def number_variables(self, bounds, bool_vars):
+        self.values = []
+        self.first = array('l')
+        self.n_vars = len(bool_vars)
+
+        for var, dom in enumerate(bounds):
+            if dom.has_open_bound():
+                sys.stderr.write('Error: infinity bounds not supported\n')
+                sys.stderr.write('Error: translation canceled\n')
+                sys.exit(1)
+
+            # eliminated variables don't get order variables
+            values = sorted(dom.get_values_asc()) if not self.converter.is_eliminated(var) else [dom.lb()]
+            self.values.append(values)
+            self.first.append(self.n_vars + 1)
+            self.n_vars += len(values) - 1
+
+        self.encoder = OrderEncoding([ClosedDomain(values) for values in self.values],
+                                     [values[0] for values in self.values], [values[-1] for values in self.values],
+                                     literal_ids=True)
+
+    def write_symbols(self, bool_vars):
+        for var in bool_vars:
+            self.output_file.write('c bool %s %d\n' % (self.converter.bool_name(var), var + 1))
+
+        int_name = self.converter.int_symbols.name
+
+        for var, values in enumerate(self.values):
+            if self.converter.is_eliminated(var):
+                continue
+            self.output_file.write('c int %s %d %s\n' % (int_name(var), self.first[var], ' '.join(map(str, values))))
+
+    def write_objective_fn(self, opt_vector):
+        if len(opt_vector) > 0:
+            int_name = self.converter.int_symbols.name
+            self.output_file.write('c minimize %s\n' % ' '.join(['%d*%s' % (w, int_name(var))
+                                                                   for var, w in opt_vector]))
+            if self.converter.objective_offset():
+                self.output_file.write('c objective offset %d\n' % self.converter.objective_offset())
+
+    def write_clause(self, *literals):
+        self.output_file.write('%s0\n' % ''.join(['%d ' % lit for lit in literals]))
+
+    def iter_clauses(self, constraints, clauses, b2i):
+        """
+        Yields all clauses of the instance as lists of DIMACS literals. The auxiliary variables are numbered anew by
+        every call.
+        """
+        self.n_aux = 0
+
+        for var, values in enumerate(self.values):
+            first = self.first[var]
+            for j in xrange(first, first + len(values) - 2):
+                yield [-(j + 1), j]
+
+        for literals in chain(clauses, self._read_spool('clauses')):
+            yield map(self.bool_literal, literals)
+
+        for row in chain(constraints.ranged_rows(), self._read_spool('constraints')):
+            for clause in self.encode_constraint(*row):
+                yield clause
+
+        for b, i in chain(b2i, self._read_spool('b2i')):
+            for clause in self.encode_b2i(b, i):
+                yield clause
+
+    def encode_constraint(self, variables, weights, b, reified, upper=None):
+        """
+        Returns the clauses of b <= sum(w * v) <= upper (sum(w * v) >= b if upper is None), reified with the literal
+        reified if given.
+        """
+        negated = [-w for w in weights]
+
+        if reified is None:
+            if upper is None:
+                return self.encode_ge(variables, weights, b)
+            return chain(self.encode_ge(variables, weights, b), self.encode_ge(variables, negated, -upper))
+
+        r = self.bool_literal(reified)
+        if upper is None:
+            return self.encode_reified_ge(variables, weights, b, r)
+
+        # both halves of a range hold iff r holds, thus each half is reified with an auxiliary variable
+        ge, le = self.new_aux(), self.new_aux()
+        return chain([[-r, ge], [-r, le], [r, -ge, -le]], self.encode_reified_ge(variables, weights, b, ge),
+                     self.encode_reified_ge(variables, negated, -upper, le))
+
+    def encode_reified_ge(self, variables, weights, b, r):
+        """
+        Yields the clauses of r <-> sum(w * v) >= b for the DIMACS literal r.
+        """
+        return chain(self.encode_ge(variables, weights, b, guard=-r),
+                     self.encode_ge(variables, [-w for w in weights], 1 - b, guard=r))
+
+    def new_aux(self):
+        self.n_aux += 1
+        return self.n_vars + self.n_aux
+
+    def encode_b2i(self, b, i):
+        b = self.bool_literal(b)
+        return chain(self.encode_ge([i], [1], 1, guard=-b), self.encode_ge([i], [-1], -1, guard=-b),
+                     self.encode_ge([i], [-1], 0, guard=b), self.encode_ge([i], [1], 0, guard=b))
+
+    def encode_ge(self, variables, weights, b, guard=None):
+        """
+        Yields the clauses of the order encoding of sum(w * v) >= b. If a guard literal is given, it is added to every
+        clause.
+        """
+        tail = [] if guard is None else [guard]
+        terms = [(var, w) for var, w in izip(variables, weights) if w != 0]
+
+        if not terms:
+            if b > 0:
+                yield tail
+            return
+
+        try:
+            encoding = self.encoder.encode(Constraint(terms, b), lazy=True)
+        except EarlyExitException:
+            yield tail
+            return
+
+        for clause in encoding:
+            literals = []
+            for lit in clause:
+                if type(lit) is tuple:
+                    # literal with a constant truth value
+                    if lit[1]:
+                        break
+                else:
+                    literals.append(self.order_literal(lit))
+            else:
+                yield literals + tail
+
+    def order_literal(self, lit):
+        """
+        Maps the id of an order literal of the encoder onto its DIMACS literal.
+        """
+        literal_map = self.literal_map
+        if lit >= len(literal_map):
+            literal_map.extend([0] * (lit + 1 - len(literal_map)))
+
+        if not literal_map[lit]:
+            view = self.encoder.literals[lit]
+            var = self.first[view.x] + bisect_left(self.values[view.x], view.c) - 1
+            literal_map[lit] = -var if view.signed else var
+
+        return literal_map[lit]
+
+    @staticmethod
+    def bool_literal(lit):
+        return -((lit >> 1) + 1) if lit & 1 else (lit >> 1) + 1
+
+    def stream_clause(self, *literals):
+        self._stream('clauses', self._spool_record, literals)
+
+    def stream_constraint(self, variables, weights, b, reified, upper=None):
+        record = [b, -1 if reified is None else reified, ConstraintStore.GE if upper is None else ConstraintStore.RANGE,
+                  0 if upper is None else upper]
+        for var, w in izip(variables, weights):
+            record.extend((var, w))
+        self._stream('constraints', self._spool_record, record)
+
+    def stream_b2i(self, b, i):
+        self._stream('b2i', self._spool_record, (b, i))
+
+    def _spool_record(self, *record):
+        self.output_file.write('%s\n' % ' '.join(map(str, record)))
+
+    def _read_spool(self, section):
+        """
+        Yields the items streamed into a section in the representation they have been passed in. The order encoding
+        requires the final domains, so streamed items are spooled unencoded and translated by write().
+        """
+        if self.spools is None:
+            return
+
+        spool = self.spools[section]
+        spool.seek(0)
+
+        for line in spool:
+            record = map(int, line.split())
+            if section == 'constraints':
+                yield record[4::2], record[5::2], record[0], (record[1] if record[1] >= 0 else None), \
+                    (record[3] if record[2] != ConstraintStore.GE else None)
+            else:
+                yield record
@@ -1,9 +1,12 @@
 import json
 import sys
+from itertools import izip
 from OutputWriter import OutputWriter
 
 
 class JSONWriter(OutputWriter):
+    streamable = False
+
     def __init__(self, **options):
         super(JSONWriter, self).__init__(**options)
         self.instance = {}
@@ -27,28 +30,51 @@ class JSONWriter(OutputWriter):
 
     def write_opt_vector(self, opt_vector):
         """
-        :type opt_vector: list[(str, int)]
+        :type opt_vector: list[(int, int)]
         """
-        self.instance['opt_vector'] = opt_vector
+        self.instance['opt_vector'] = [(self.converter.int_name(var), w) for var, w in opt_vector]
+        if self.converter.objective_offset():
+            self.instance['opt_offset'] = self.converter.objective_offset()
 
     def write_constraints(self, constraints):
         """
-        :type constraints: list[(list[(str, int)], int)]
+        Writes the constraints as (terms, b, reified) of terms >= b. Reified equalities and ranges are kept as
+        (terms, b, reified, upper), since r <-> b <= terms <= upper can't be split into two reified constraints.
+
+        :type constraints: ConstraintStore
         """
-        self.instance['constraints'] = constraints
+        int_name = self.converter.int_symbols.name
+        rows = []
+
+        for variables, weights, b, r, upper in constraints.ranged_rows():
+            terms = [(int_name(var), w) for var, w in izip(variables, weights)]
+            r = self._export_literal(r) if r is not None else None
+            if upper is None:
+                rows.append((terms, b, r))
+            elif r is not None:
+                rows.append((terms, b, r, upper))
+            else:
+                rows.append((terms, b, None))
+                rows.append(([(var, -w) for var, w in terms], -upper, None))
+
+        self.instance['constraints'] = rows
 
     def write_bounds(self, bounds):
         """
-        :type bounds: dict[str, ContiguousDomain]
+        :type bounds: list[Domain]
         """
         # TODO all domain classes!!!
-        self.instance['bounds'] = {var: dom.export_self() for var, dom in bounds.items()}
+        self.instance['bounds'] = {self.converter.int_name(var): dom.export_self() for var, dom in enumerate(bounds)
+                                   if not self.converter.is_eliminated(var)}
 
     def write_bool_variables(self, variables):
-        self.instance['booleans'] = [var for var in variables]
+        self.instance['booleans'] = [self.converter.bool_name(var) for var in variables]
 
     def write_clauses(self, clauses):
-        self.instance['clauses'] = clauses
+        self.instance['clauses'] = [map(self.converter.literal_name, clause) for clause in clauses]
 
     def write_b2i(self, b2i):
-        self.instance['bool_to_int'] = b2i
+        self.instance['bool_to_int'] = [(self.converter.literal_name(b), self.converter.int_name(i)) for b, i in b2i]
+
+    def _export_literal(self, lit):
+        return self.converter.bool_name(lit >> 1), not lit & 1
@@ -0,0 +1,236 @@
+import shutil
+import sys
+import tempfile
+from itertools import izip
+from OutputWriter import OutputWriter
+from .. import pseudo_boolean
+from ..domains.contiguous.contiguous_domain import ContiguousDomain
+
+
+class OPBWriter(OutputWriter):
+    """
+    Translates the instance into a linear pseudo-Boolean problem in the OPB format of the PB competitions.
+
+    Boolean variable b is x(b + 1). Integer variables with the domain {0, 1} are represented by a single OPB variable,
+    thus constraints over 0/1 variables are written as they are. All other integer variables x are linearized: a
+    contiguous domain lb..ub by the binary encoding x = lb + sum(2^j * y_j) with sum(2^j * y_j) <= ub - lb, any other
+    domain with the values v_0 < ... < v_k-1 by the order encoding x = v_0 + sum((v_j - v_j-1) * o_j) with
+    o_j <-> x >= v_j and the chain o_j >= o_j+1. The shorter encoding is chosen for contiguous domains.
+
+    Negative literals are written as 1 - x, reified constraints r <-> C are linearized as the implications r -> C and
+    -r -> not C. The OPB header requires the number of constraints, thus the body is written into a temporary file
+    first.
+
+    :type encodings: list[(int, list[(int, int)])]
+    """
+    streamable = False
+
+    def __init__(self, **options):
+        super(OPBWriter, self).__init__(**options)
+        self.encodings = []
+        self.n_vars = 0
+        self.n_constraints = 0
+        self.body = None
+
+    def write(self, output_filename, variables_with_bounds, bool_vars, opt_vector, constraints, clauses, b2i):
+        if not output_filename:
+            raise Exception('no output filename specified')
+
+        self.output_file = file(output_filename + '.opb', 'w') if output_filename != sys.stdout else sys.stdout
+        self.body = tempfile.TemporaryFile('w+')
+        self.n_constraints = 0
+
+        self.encode_variables(variables_with_bounds, bool_vars)
+
+        for literals in clauses:
+            self.write_clause(*literals)
+        for row in constraints.ranged_rows():
+            self.write_row(*row)
+        for b, i in b2i:
+            self.write_b2i(b, i)
+
+        self.output_file.write('* #variable= %d #constraint= %d\n' % (self.n_vars, self.n_constraints))
+        if type(self.converter.instance_name) == str:
+            self.output_file.write('* %s\n' % self.converter.instance_name)
+        if "no-symbols" not in self.options or self.options["no-symbols"] is False:
+            self.write_symbols(bool_vars)
+
+        self.write_objective_fn(opt_vector)
+
+        self.body.seek(0)
+        shutil.copyfileobj(self.body, self.output_file)
+        self.body.close()
+        self.body = None
+
+        if self.output_file != sys.stdout:
+            self.output_file.close()
+
+    def encode_variables(self, bounds, bool_vars):
+        self.encodings = []
+        self.n_vars = len(bool_vars)
+
+        for var, dom in enumerate(bounds):
+            if self.converter.is_eliminated(var):
+                self.encodings.append((0, []))
+                continue
+
+            if dom.has_open_bound():
+                sys.stderr.write('Error: infinity bounds not supported\n')
+                sys.stderr.write('Error: translation canceled\n')
+                sys.exit(1)
+
+            if pseudo_boolean.is_boolean(dom):
+                self.encodings.append((0, [(self.new_var(), 1)]))
+                continue
+
+            if isinstance(dom, ContiguousDomain) and abs(dom.multiplier) == 1:
+                span = dom.ub() - dom.lb()
+                if span.bit_length() < span:
+                    terms = [(self.new_var(), 1 << j) for j in xrange(span.bit_length())]
+                    self.encodings.append((dom.lb(), terms))
+                    if span != (1 << span.bit_length()) - 1:
+                        self.write_ge([(v, -w) for v, w in terms], -span)
+                    continue
+
+            values = sorted(set(dom.get_values_asc()))
+            terms = [(self.new_var(), values[j] - values[j - 1]) for j in xrange(1, len(values))]
+            self.encodings.append((values[0], terms))
+            for (o1, _), (o2, _) in izip(terms, terms[1:]):
+                self.write_ge([(o1, 1), (o2, -1)], 0)
+
+    def new_var(self):
+        self.n_vars += 1
+        return self.n_vars
+
+    def write_symbols(self, bool_vars):
+        for var in bool_vars:
+            self.output_file.write('* bool %s x%d\n' % (self.converter.bool_name(var), var + 1))
+
+        int_name = self.converter.int_symbols.name
+
+        for var, (offset, terms) in enumerate(self.encodings):
+            if self.converter.is_eliminated(var):
+                continue
+            self.output_file.write('* int %s = %d%s\n' % (int_name(var), offset, self.format_terms(terms)))
+
+    def write_objective_fn(self, opt_vector):
+        terms, offset = self.expand([var for var, _ in opt_vector], [w for _, w in opt_vector])
+        terms = self.merge_terms(terms)
+        offset += self.converter.objective_offset()
+        if terms:
+            if offset:
+                self.output_file.write('* objective offset %d\n' % offset)
+            self.output_file.write('min:%s ;\n' % self.format_terms(terms))
+
+    def write_clause(self, *literals):
+        terms, offset = self.literal_terms([self.bool_literal(lit) for lit in literals])
+        self.write_ge(terms, 1 - offset)
+
+    def write_constraint(self, variables, weights, b, reified, upper=None):
+        terms, offset = self.expand(variables, weights)
+        b -= offset
+        upper = upper - offset if upper is not None else None
+
+        if reified is None:
+            if upper is None:
+                self.write_ge(terms, b)
+            elif upper == b:
+                self.write_ge(terms, b, relation='=')
+            else:
+                self.write_ge(terms, b)
+                self.write_ge([(v, -w) for v, w in terms], -upper)
+        elif upper is None:
+            self.write_reified(terms, b, self.bool_literal(reified))
+        else:
+            # r <-> (r1 and r2) with r1 <-> terms >= b and r2 <-> terms <= upper
+            r, r1, r2 = self.bool_literal(reified), self.new_var(), self.new_var()
+            self.write_reified(terms, b, r1)
+            self.write_reified([(v, -w) for v, w in terms], -upper, r2)
+            self.write_ge(*self.clause_terms(-r, r1))
+            self.write_ge(*self.clause_terms(-r, r2))
+            self.write_ge(*self.clause_terms(r, -r1, -r2))
+
+    def write_b2i(self, b, i):
+        b = self.bool_literal(b)
+        offset, terms = self.encodings[i]
+
+        if offset == 0 and len(terms) == 1 and terms[0][1] == 1:
+            # b <-> i for 0/1 variables
+            lit_terms, lit_offset = self.literal_terms([b])
+            self.write_ge(lit_terms + [(terms[0][0], -1)], -lit_offset, relation='=')
+            return
+
+        self.write_implied(terms, 1 - offset, b)
+        self.write_implied([(v, -w) for v, w in terms], offset - 1, b)
+        self.write_implied(terms, -offset, -b)
+        self.write_implied([(v, -w) for v, w in terms], offset, -b)
+
+    def write_reified(self, terms, b, lit):
+        self.write_implied(terms, b, lit)
+        self.write_implied([(v, -w) for v, w in terms], 1 - b, -lit)
+
+    def write_implied(self, terms, b, lit):
+        """
+        Writes lit -> sum(w * v) >= b as sum(w * v) + (min - b) * lit >= min, min the minimal value of the sum.
+        """
+        minimum = sum([w for _, w in terms if w < 0])
+        if minimum >= b:
+            return
+
+        lit_terms, lit_offset = self.literal_terms([lit], minimum - b)
+        self.write_ge(terms + lit_terms, minimum - lit_offset)
+
+    def write_ge(self, terms, b, relation='>='):
+        """
+        Writes the constraint sum(w * v) >= b (or = b) over OPB variables v.
+        """
+        terms = self.merge_terms(terms)
+
+        if not terms:
+            if b <= 0 and (relation == '>=' or b == 0):
+                return
+            # the constant of variable x1 is true
+            terms, b, relation = [(1, 1)], 2, '>='
+
+        self.body.write('%s %s %d ;\n' % (self.format_terms(terms)[1:], relation, b))
+        self.n_constraints += 1
+
+    def expand(self, variables, weights):
+        """
+        Returns the terms over OPB variables and the constant of sum(w * v) over integer variables v.
+        """
+        terms, offset = [], 0
+
+        for var, w in izip(variables, weights):
+            var_offset, var_terms = self.encodings[var]
+            offset += w * var_offset
+            terms.extend([(v, w * c) for v, c in var_terms])
+
+        return terms, offset
+
+    def clause_terms(self, *literals):
+        terms, offset = self.literal_terms(literals)
+        return terms, 1 - offset
+
+    @staticmethod
+    def literal_terms(literals, w=1):
+        """
+        Returns the terms and the constant of sum(w * lit) over signed OPB literals, with -v read as 1 - v.
+        """
+        terms = [(lit, w) if lit > 0 else (-lit, -w) for lit in literals]
+        return terms, w * sum([1 for lit in literals if lit < 0])
+
+    @staticmethod
+    def merge_terms(terms):
+        merged = {}
+        for v, w in terms:
+            merged[v] = merged.get(v, 0) + w
+        return sorted([(v, w) for v, w in merged.iteritems() if w != 0])
+
+    @staticmethod
+    def bool_literal(lit):
+        return -((lit >> 1) + 1) if lit & 1 else (lit >> 1) + 1
+
+    @staticmethod
+    def format_terms(terms):
+        return ''.join([' %+d x%d' % (w, v) for v, w in terms])
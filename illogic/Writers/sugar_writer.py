@@ -1,10 +1,15 @@
 import sys
+from itertools import izip
 from OutputWriter import OutputWriter
 from .. import ILPParser
+from .. import pseudo_boolean
 from ..domains.contiguous.contiguous_domain import ContiguousDomain
 
 
 class SugarWriter(OutputWriter):
+    native_ranges = True
+    native_pb = True
+
     def write(self, output_filename, variables_with_bounds, bool_vars, opt_vector, constraints, clauses, b2i):
         if not output_filename:
             raise Exception('no output filename specified')
@@ -19,23 +24,29 @@ class SugarWriter(OutputWriter):
 
         self.write_objective_fn(opt_vector)
 
-        self.output_file.close()
+        if self.output_file != sys.stdout:
+            self.output_file.close()
 
     def write_bool_vars(self, variables):
         if len(variables) > 0:
             self.output_file.write(';; BOOLEANS\n')
 
             for var in variables:
-                self.output_file.write('(bool b%s)\n' % var)
+                self.output_file.write('(bool b%s)\n' % self.converter.bool_name(var))
 
             self.output_file.write('\n')
 
     def write_bounds(self, bounds, opt_vector):
         self.output_file.write(';; BOUNDS\n')
 
-        for var in sorted(bounds.iterkeys(), key=ILPParser.ILPParser.cmp_vars):
+        int_name = self.converter.int_symbols.name
+
+        for var, dom in enumerate(bounds):
+            if self.converter.is_eliminated(var):
+                continue
+
             try:
-                self._write_domain(var, bounds[var])
+                self._write_domain(int_name(var), dom)
             except TypeError:
                 sys.stderr.write('Error: infinity bounds not supported\n')
                 sys.stderr.write('Error: translation canceled\n')
@@ -46,71 +57,79 @@ class SugarWriter(OutputWriter):
             self.write_objective_dom(bounds, opt_vector)
 
     def write_clauses(self, clauses):
-        if len(clauses):
-            self.output_file.write("\n;; CLAUSES\n")
+        self.write_section('clauses', len(clauses), clauses, self.write_clause, header="\n;; CLAUSES\n")
 
-            for clause in clauses:
-                self.output_file.write('(or %s)\n' % ' '.join(map(SugarWriter._format_literal, clause)))
+    def write_clause(self, *literals):
+        self.output_file.write('(or %s)\n' % ' '.join(map(self._format_literal, literals)))
 
-    @staticmethod
-    def _format_literal(literal):
-        if literal[0] == '-':
-            return '(not b%s)' % literal[1:]
+    def _format_literal(self, literal):
+        if literal & 1:
+            return '(not b%s)' % self.converter.bool_name(literal >> 1)
         else:
-            return 'b' + literal
+            return 'b' + self.converter.bool_name(literal >> 1)
 
     def write_constraints(self, constraints):
-        self.output_file.write("\n;; CONDITIONS\n")
-
-        rel = ">="
-
-        for var_list, b, r in constraints:
-            if r is not None:
-                sys.stderr.write("Error: SugarWriter has no support for reified constraints implemented.\n")
-                sys.exit(1)
-            add_list = []
-            for var, w in var_list:
-                add_list.append('(* %d %s)' % (w, var))
+        self.write_section('constraints', len(constraints), constraints.ranged_rows(), self.write_row,
+                           header="\n;; CONDITIONS\n", always=True)
+
+    def write_constraint(self, variables, weights, b, reified, upper=None):
+        if reified is not None:
+            sys.stderr.write("Error: SugarWriter has no support for reified constraints implemented.\n")
+            sys.exit(1)
+
+        int_name = self.converter.int_symbols.name
+
+        add_list = []
+        for var, w in izip(variables, weights):
+            add_list.append('(* %d %s)' % (w, int_name(var)))
+
+        self._write_sum(add_list, b, upper)
+
+    def write_pb_constraint(self, kind, variables, weights, b, upper=None):
+        if kind == pseudo_boolean.PB:
+            return self.write_constraint(variables, weights, b, None, upper)
+
+        # sum of the 0/1 variables without unit weights
+        signs, b, upper = pseudo_boolean.unit_form(kind, weights, b, upper)
+        int_name = self.converter.int_symbols.name
+        self._write_sum([int_name(var) if sign > 0 else '(* -1 %s)' % int_name(var)
+                         for var, sign in izip(variables, signs)], b, upper)
+
+    def _write_sum(self, add_list, b, upper):
+        if b is None:
+            relations = [("<=", upper)]
+        elif upper is None:
+            relations = [(">=", b)]
+        elif upper == b:
+            relations = [("eq", b)]
+        else:
+            relations = [(">=", b), ("<=", upper)]
 
-            self.output_file.write('(%s (+ %s) %d)\n' % (rel, ' '.join(add_list), b))
+        for rel, c in relations:
+            self.output_file.write('(%s (+ %s) %d)\n' % (rel, ' '.join(add_list), c))
 
     def write_bool_to_int(self, b2i):
-        if len(b2i):
-            self.output_file.write('\n;; BOOL TO INT\n')
+        self.write_section('b2i', len(b2i), b2i, self.write_b2i, header='\n;; BOOL TO INT\n')
 
-            for b, i in b2i:
-                self.output_file.write('(or (and b{b} (eq {i} 1)) (and (not b{b}) (eq {i} 0)))\n'.format(b=b, i=i))
+    def write_b2i(self, b, i):
+        b, i = self.converter.literal_name(b), self.converter.int_name(i)
+        self.output_file.write('(or (and b{b} (eq {i} 1)) (and (not b{b}) (eq {i} 0)))\n'.format(b=b, i=i))
 
     def write_objective_dom(self, bounds, opt_vector):
-        lb = ub = 0
-        n_dom = 1
-
-        for var, w in opt_vector:
-            n_dom *= bounds[var].len()
-            if w < 0:
-                lb += w * bounds[var].ub()
-                ub += w * bounds[var].lb()
-            else:
-                lb += w * bounds[var].lb()
-                ub += w * bounds[var].ub()
-
-        if len(opt_vector) == 1:
-            var, w = opt_vector[0]
-            self._write_domain('opt', bounds[var].copy(multiplier=w))
-        if n_dom <= 10000:
-            var, w = opt_vector[0]
-            dom = bounds[var].copy(multiplier=w)
-            for var, w in opt_vector[1:]:
-                d = bounds[var].copy(multiplier=w)
-                dom = ILPParser.ILPParser.merge_dom(dom, d)
-            self._write_domain('opt', dom)
+        runs = ILPParser.ILPParser.sumset_runs([bounds[var].copy(multiplier=w) for var, w in opt_vector])
+        if len(runs) == 1:
+            self.output_file.write('(int opt %d %d)\n' % runs[0])
         else:
-            self._write_domain('opt', ContiguousDomain(lb, ub))
+            self.output_file.write('(int opt (%s))\n' % ' '.join([('%d' % a) if a == b else ('(%d %d)' % (a, b))
+                                                                   for a, b in runs]))
 
     def write_objective_fn(self, opt_vector):
         if len(opt_vector) > 0:
-            w_sum = ' '.join(map(lambda (var, w): '(%d %s)' % (w, var), opt_vector))
+            int_name = self.converter.int_symbols.name
+            w_sum = ' '.join(map(lambda (var, w): '(%d %s)' % (w, int_name(var)), opt_vector))
             self.output_file.write('\n;; OPTIMIZATION\n')
+            if self.converter.objective_offset():
+                self.output_file.write('; objective offset %d\n' % self.converter.objective_offset())
             self.output_file.write('(weightedsum (%s) eq opt)\n' % w_sum)
             self.output_file.write('(objective minimize opt)\n')
 
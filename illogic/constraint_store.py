@@ -0,0 +1,113 @@
+from array import array
+
+
+class ConstraintStore(object):
+    """
+    Column-oriented (CSR) storage of linear integer constraints ``sum(w * v) >= b``, ``sum(w * v) = b`` and
+    ``b <= sum(w * v) <= upper``.
+
+    The terms of row ``i`` are located at ``offsets[i]:offsets[i + 1]`` of ``variables`` and ``weights``. Variables
+    are the integer ids handed out by ILPParser.new_int_variable. A reified row stores the boolean literal it is
+    reified with in ``reified`` (-1 otherwise). ``relation`` tells the kind of a row, the upper bound of equalities and
+    ranges is stored in ``upper`` (0 for GE rows).
+    """
+    GE = 0
+    EQ = 1
+    RANGE = 2
+
+    def __init__(self):
+        self.offsets = array('l', [0])
+        self.variables = array('l')
+        self.weights = array('l')
+        self.b = array('l')
+        self.reified = array('l')
+        self.relation = array('b')
+        self.upper = array('l')
+
+    def append(self, terms, b, reified=None, upper=None):
+        """
+        Appends the row ``terms >= b`` (``b <= terms <= upper`` if upper is given) and returns its index.
+
+        :type terms: list[(int, int)]
+        :type reified: int | None
+        :type upper: int | None
+        """
+        for var, w in terms:
+            self.variables.append(var)
+            self.weights.append(w)
+
+        self.offsets.append(len(self.variables))
+        self.b.append(b)
+        self.reified.append(-1 if reified is None else reified)
+
+        if upper is None:
+            self.relation.append(ConstraintStore.GE)
+            self.upper.append(0)
+        else:
+            self.relation.append(ConstraintStore.EQ if upper == b else ConstraintStore.RANGE)
+            self.upper.append(upper)
+
+        return len(self.b) - 1
+
+    def rows(self):
+        """
+        Iterates all rows as ``(variables, weights, b, reified)`` of ``sum(w * v) >= b``. Equalities and ranges are
+        expanded into two rows, the second one with negated weights. ``variables`` and ``weights`` are array slices,
+        no tuple is built per term. ``reified`` is either None or a boolean literal.
+        """
+        for variables, weights, b, reified, upper in self.ranged_rows():
+            yield variables, weights, b, reified
+            if upper is not None:
+                yield variables, array('l', [-w for w in weights]), -upper, reified
+
+    def ranged_rows(self):
+        """
+        Iterates all rows as stored as ``(variables, weights, b, reified, upper)``, upper is None for GE rows.
+        """
+        offsets = self.offsets
+
+        for i in xrange(len(self.b)):
+            start, end = offsets[i], offsets[i + 1]
+            yield self.variables[start:end], self.weights[start:end], self.b[i], self.get_reified(i), self.get_upper(i)
+
+    def get_reified(self, row):
+        r = self.reified[row]
+        return None if r < 0 else r
+
+    def get_upper(self, row):
+        return None if self.relation[row] == ConstraintStore.GE else self.upper[row]
+
+    def get_terms(self, row):
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return zip(self.variables[start:end], self.weights[start:end])
+
+    def row_len(self, row):
+        return self.offsets[row + 1] - self.offsets[row]
+
+    def row_lengths(self):
+        offsets = self.offsets
+        return [offsets[i + 1] - offsets[i] for i in xrange(len(self.b))]
+
+    def nnz(self):
+        return len(self.variables)
+
+    def __len__(self):
+        return len(self.b)
+
+    def __getitem__(self, row):
+        """
+        Returns the row in the legacy ``(terms, b, reified)`` representation, ignoring the upper bound of equalities
+        and ranges.
+        """
+        if row < 0:
+            row += len(self.b)
+        if not 0 <= row < len(self.b):
+            raise IndexError('constraint index out of range')
+        return self.get_terms(row), self.b[row], self.get_reified(row)
+
+    def __iter__(self):
+        """
+        Iterates all rows in the legacy ``(terms, b, reified)`` representation, expanded like rows().
+        """
+        for variables, weights, b, reified in self.rows():
+            yield zip(variables, weights), b, reified
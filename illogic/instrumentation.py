@@ -0,0 +1,147 @@
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# the instrumentation is off unless enable() is called. Phases and counters are only recorded while it is enabled, the
+# call sites check enabled (or wrap their hot methods on creation, see counted), thus it costs nothing otherwise
+enabled = False
+
+# phase name -> [calls, wall time, cpu time, peak RSS in KiB], phase_order keeps the order of their first entry
+phases = {}
+phase_order = []
+# counter name -> count
+counters = {}
+
+# the counters of the hot paths, the converter measures the phases read, presolve, split (nested in read, since
+# constraints are split while they are parsed) and write
+ENCODE_CALLS = 'encode calls'
+LITERALS_TRANSLATED = 'literals translated'
+DOMAIN_MERGES = 'domain merges'
+
+
+def enable():
+    global enabled
+    enabled = True
+    reset()
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    phases.clear()
+    del phase_order[:]
+    counters.clear()
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of the process in KiB, None if it isn't available on this platform.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on Mac OS
+    return rss / 1024 if sys.platform == 'darwin' else rss
+
+
+class _Phase(object):
+    """
+    Context manager which adds the wall and cpu time of its block to the phase name.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.wall = self.cpu = 0
+
+    def __enter__(self):
+        if self.name not in phases:
+            phases[self.name] = [0, 0.0, 0.0, None]
+            phase_order.append(self.name)
+        self.wall, self.cpu = time.time(), time.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall, cpu = time.time() - self.wall, time.clock() - self.cpu
+
+        record = phases[self.name]
+        record[0] += 1
+        record[1] += wall
+        record[2] += cpu
+        record[3] = peak_rss()
+        return False
+
+
+class _NoPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_no_phase = _NoPhase()
+
+
+def phase(name):
+    """
+    Returns a context manager measuring its block as part of the phase name, a shared no-op if disabled.
+    """
+    return _Phase(name) if enabled else _no_phase
+
+
+def count(name, n=1):
+    counters[name] = counters.get(name, 0) + n
+
+
+def counted(name, method):
+    """
+    Returns method itself if disabled, otherwise a wrapper which counts its calls in counter name. Meant for hot
+    methods which are rebound on the instance once, e.g. self.translate = counted(..., self.translate).
+    """
+    if not enabled:
+        return method
+
+    def wrapper(*args, **kwargs):
+        counters[name] = counters.get(name, 0) + 1
+        return method(*args, **kwargs)
+
+    return wrapper
+
+
+def report(fmt, output=sys.stderr):
+    """
+    Writes the recorded phases and counters as a table ('table') or as a JSON object ('json').
+    """
+    if fmt == 'json':
+        report_json(output)
+    else:
+        report_table(output)
+
+
+def report_table(output=sys.stderr):
+    output.write('%-22s %7s %10s %10s %14s\n' % ('phase', 'calls', 'wall [s]', 'cpu [s]', 'peak RSS [KiB]'))
+    for name in phase_order:
+        calls, wall, cpu, rss = phases[name]
+        output.write('%-22s %7d %10.3f %10.3f %14s\n' % (name, calls, wall, cpu, rss if rss is not None else '-'))
+
+    if counters:
+        output.write('%-22s %7s\n' % ('counter', 'count'))
+        for name in sorted(counters):
+            output.write('%-22s %7d\n' % (name, counters[name]))
+
+
+def report_json(output=sys.stderr):
+    output.write(json.dumps({
+        'phases': [{'name': name, 'calls': phases[name][0], 'wall': phases[name][1], 'cpu': phases[name][2],
+                    'peak_rss': phases[name][3]} for name in phase_order],
+        'counters': counters
+    }, sort_keys=True))
+    output.write('\n')
@@ -1,7 +1,7 @@
 import json
-import gzip
 import sys
 from time import time
+from illogic.Readers.input_stream import open_input
 from illogic.order_encoding.constraint import Constraint
 from illogic.domains.contiguous.contiguous_domain import ContiguousDomain
 from illogic.domains.contiguous.contiguous_domain import ContiguousDomain as ContinuousDomain
@@ -13,15 +13,12 @@ def read(file_path, logger, t_start=None):
     if t_start is None:
         t_start = time()
 
-    if file_path != sys.stdin:
-        if file_path[-3:] == '.gz':
-            with gzip.open(file_path, 'r') as inst:
-                instance = json.load(inst)
-        else:
-            with open(file_path, "r") as inst:
-                instance = json.load(inst)
-    else:
-        instance = json.loads(file_path.read())
+    inst = open_input(file_path)
+    try:
+        instance = json.load(inst)
+    finally:
+        if file_path != sys.stdin:
+            inst.close()
 
     logger("json read", type="time")
 
@@ -51,10 +48,12 @@ def read(file_path, logger, t_start=None):
     instance['constraints'] = map(lambda c: tuple(c), instance['constraints'])
     raw_constraints = []
     for cc in instance['constraints']:
-        c = (map(lambda x: (str(x[0]), x[1]), cc[0]), cc[1], (str(cc[2][0]), cc[2][1]) if cc[2] is not None else None)
+        # reified equalities and ranges carry their upper bound as fourth element
+        c = (map(lambda x: (str(x[0]), x[1]), cc[0]), cc[1], (str(cc[2][0]), cc[2][1]) if cc[2] is not None else None,
+             cc[3] if len(cc) > 3 else None)
         raw_constraints.append(c)
-    for terms, b, r in raw_constraints:
-        constraints.append(Constraint([tuple(term) for term in terms], b, reified=r))
+    for terms, b, r, upper in raw_constraints:
+        constraints.append(Constraint([tuple(term) for term in terms], b, reified=r, upper=upper))
 
     logger("constraints parsed", type="time")
 
@@ -63,6 +62,8 @@ def read(file_path, logger, t_start=None):
     for var, o in instance["opt_vector"]:
         opt[str(var)] = o
 
+    opt_offset = instance.get('opt_offset', 0)
+
     logger("opt vector parsed", type="time")
 
-    return booleans, clauses, bool2int, domains, constraints, opt
+    return booleans, clauses, bool2int, domains, constraints, opt, opt_offset
@@ -2,9 +2,11 @@ from functools import partial
 
 
 class Constraint:
-    def __init__(self, terms, b, reified=None):
+    def __init__(self, terms, b, reified=None, upper=None):
         self.terms = terms
         self.b = b
+        # b <= terms <= upper if given, only used by the JSON dump
+        self.upper = upper
         self.touched = False
         self.is_reified_copy = False
         self.vars = {t[0] for t in self.terms}
@@ -16,7 +18,7 @@ class Constraint:
     def reorder(self, variables):
         fn = partial(Constraint._sort, variables)
         terms = sorted(self.terms, key=fn)
-        return Constraint(terms, self.b, reified=self.reified)
+        return Constraint(terms, self.b, reified=self.reified, upper=self.upper)
 
     def get_terms(self):
         return {var: weight for var, weight in self.terms}
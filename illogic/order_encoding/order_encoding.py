@@ -1,23 +1,19 @@
 import math
+from array import array
+from bisect import bisect_left
 
-from ..incremental_grounding.domain_chunk import DomainChunk
 from early_exit_exception import EarlyExitException
 from view import SignedView
-from datetime import datetime
-
-stats = {
-    "call": 0,
-    "a>0": 0,
-    "a<0": 0,
-    "for": 0,
-    "trans": 0,
-    "trans_count": 0
-}
+from .. import instrumentation
 
 
 class OrderEncoding:
     def __init__(self, dom, lb_g, ub_g, do_translate=True, no_extrema=False, raw_output=False,
-                 debugging=False, logger=None, infeasible_detection=True):
+                 debugging=False, logger=None, infeasible_detection=True, memo_limit=100000, literal_ids=False):
+        """
+        :param memo_limit: maximal number of clauses kept in the sub-encoding cache of a single encode() call
+        :param literal_ids: translate order literals into their interned ids (see literal_id) instead of SignedViews
+        """
         self.lb_g = lb_g
         self.ub_g = ub_g
         self.dom = dom
@@ -26,12 +22,27 @@ class OrderEncoding:
         self.no_extrema = no_extrema
         self.debugging = debugging
         self.raw_output = raw_output
+        self.literal_ids = literal_ids
+
+        self.memo_limit = memo_limit
+        self._memo = {}
+        self._memo_size = 0
+
+        self._views = self._build_views([])
+
+        # interned order literals: literals[i] is the literal with id i, _literal_table[var] maps the domain position
+        # of a literal's bound (and its sign) to its id
+        self.literals = []
+        self._literal_table = {}
 
         self.log = logger if logger is not None else self._nop
 
         if not infeasible_detection:
             self.detect_infeasibility = self._nop
 
+        self.encode = instrumentation.counted(instrumentation.ENCODE_CALLS, self.encode)
+        self.translate = instrumentation.counted(instrumentation.LITERALS_TRANSLATED, self.translate)
+
     def ub(self, view):
         var, w = view
         return self.ub_g[var] * w if w > 0 else self.lb_g[var] * w
@@ -51,109 +62,135 @@ class OrderEncoding:
             # self.log("early exit", constraint, type="OE")
             raise EarlyExitException
 
-    def encode(self, constraint, dom_override=None):
+    def encode(self, constraint, dom_override=None, lazy=False):
+        """
+        Encodes the constraint into a list of clauses. In lazy mode a generator is returned instead, which yields the
+        clauses one at a time without holding them in memory. To avoid copying common prefixes, the generator yields
+        the same list object over and over again, so a clause has to be copied if it is kept beyond the next step.
+        """
         # self.log("encode", constraint, type="OE", lvl=2)
 
         self.detect_infeasibility(constraint, dom_override=dom_override)
 
-        # if len(constraint.terms) in stats:
-        #     stats[len(constraint.terms)] += 1
-        # else:
-        #     stats[len(constraint.terms)] = 1
-        return self._encode((constraint.terms, constraint.b), dom_override=dom_override, reified=constraint.reified)
+        if dom_override is None:
+            dom_override = {}
 
-    def _encode(self, constraint, dom_override=None, reified=None):
-        """
-        Applies the order encoding to a given constraint in the context of the domains stored in the current instance.
-        Domains can be temporary overridden.
-        :type constraint: (list[(str, int)], int)
-        :type dom_override: dict[str, DomainChunk] | None
-        """
-        views, c = constraint
+        if lazy:
+            return self._iter_encode(self._build_views(constraint.terms), 0, constraint.b, dom_override,
+                                     constraint.reified, [])
 
-        current_view = views[0]
-        var, a = current_view
+        # sub-encodings only depend on the suffix and the residual bound within a single constraint
+        self._memo, self._memo_size = {}, 0
+        self._views = self._build_views(constraint.terms)
+        try:
+            return self._encode(0, constraint.b, dom_override, constraint.reified)
+        finally:
+            self._memo, self._memo_size = {}, 0
+            self._views = self._build_views([])
 
-        if dom_override is None:
-            dom_override = {}
+    def _build_views(self, views):
+        """
+        Returns the views of a constraint as parallel variable and weight arrays, together with the sums of the lower
+        and upper bounds of every suffix views[i:].
+        :type views: list[(str, int)]
+        """
+        n = len(views)
+        lb_sums, ub_sums = [0] * (n + 1), [0] * (n + 1)
+        for i in xrange(n - 1, -1, -1):
+            lb_sums[i] = lb_sums[i + 1] + self.lb(views[i])
+            ub_sums[i] = ub_sums[i + 1] + self.ub(views[i])
 
-        # skip_counter = 0
+        return [var for var, _ in views], array('l', [a for _, a in views]), lb_sums, ub_sums
 
-        # stats["call"] += 1
+    def _encode(self, i, c, dom_override, reified):
+        """
+        Applies the order encoding to the suffix i of the current constraint (views[i:] >= c) in the context of the
+        domains stored in the current instance. Domains can be temporary overridden. The encodings of suffixes are
+        cached by (i, c), so identical sub-encodings are shared as long as the cache holds less than memo_limit clauses.
+        :type dom_override: dict[str, ClosedDomain]
+        """
+        key = i, c
+        if key in self._memo:
+            return self._memo[key]
 
-        if len(views) == 1 and a > 0:
-            # d_pre_trans = datetime.now()
-            clause = [self.translate((False, var, int(math.ceil(float(c) / a))))]
-            # d_trans = datetime.now() - d_pre_trans
-            # stats["trans"] += d_trans.total_seconds()
-            # stats["trans_count"] += 1
+        if i + 1 == len(self._views[1]):
+            clause = [self._last_literal(self._views, i, c)]
             if reified is not None:
                 clause.append(reified)
-            return [clause]
-        elif len(views) == 1 and a < 0:
-            # d_pre_trans = datetime.now()
-            clause = [self.translate((True, var, c / a + 1))]
-            # d_trans = datetime.now() - d_pre_trans
-            # stats["trans"] += d_trans.total_seconds()
-            # stats["trans_count"] += 1
+            conjunction = [clause]
+        else:
+            conjunction = []
+            for l, residual in self._branches(self._views, i, c, dom_override):
+                conjunction.extend([[l] + se for se in self._encode(i + 1, residual, dom_override, reified)])
+
+        if self._memo_size + len(conjunction) <= self.memo_limit:
+            self._memo[key] = conjunction
+            self._memo_size += len(conjunction)
+
+        return conjunction
+
+    def _iter_encode(self, views, i, c, dom_override, reified, clause):
+        """
+        Lazy counterpart of _encode, which extends the shared clause prefix by the literals of views[i:].
+        """
+        if i + 1 == len(views[1]):
+            n = len(clause)
+            clause.append(self._last_literal(views, i, c))
             if reified is not None:
                 clause.append(reified)
-            return [clause]
-        elif a > 0:
-            # stats["a>0"] += 1
-            # n >= 2, a > 0
-            conjunction = []
-            dom = (self.dom[var] if var not in dom_override else dom_override[var])
+            yield clause
+            del clause[n:]
+        else:
+            for l, residual in self._branches(views, i, c, dom_override):
+                clause.append(l)
+                for _ in self._iter_encode(views, i + 1, residual, dom_override, reified, clause):
+                    yield clause
+                clause.pop()
+
+    def _last_literal(self, views, i, c):
+        """
+        Returns the literal encoding a * var >= c for the last view of a constraint.
+        """
+        var, a = views[0][i], views[1][i]
+
+        if a > 0:
+            return self.translate((False, var, int(math.ceil(float(c) / a))))
+        else:
+            return self.translate((True, var, c / a + 1))
 
+    def _branches(self, views, i, c, dom_override):
+        """
+        Yields the literal and the residual bound of the suffix views[i + 1:] for every value d of the i-th view, for
+        which a * d does not satisfy the constraint together with the lower bounds of the remaining views.
+        """
+        variables, weights, lb_sums, ub_sums = views
+        var, a = variables[i], weights[i]
+        dom = (self.dom[var] if var not in dom_override else dom_override[var])
+        lb_rest = lb_sums[i + 1]
+
+        if a > 0:
             # compute the starting point in Dom(var)
-            t = (c - sum([self.ub(v) for v in views[1:]])) / a  # minimum value required to satisfy the constraint
+            t = (c - ub_sums[i + 1]) / a  # minimum value required to satisfy the constraint
             d_start = max(dom.index(t) - 1, 0)
 
             for d in dom.get_values_asc(start=d_start):
-                # stats["for"] += 1
-                sub_sum = (views[1:], c - a * d)
-
                 # check whether to exit the loop earlier
-                ubs = [self.lb(v) for v in views[1:]]
-                if a * d + sum(ubs) >= c:
+                if a * d + lb_rest >= c:
                     break
-                # skip_counter += 1
 
-                sub_enc = self._encode(sub_sum, dom_override=dom_override, reified=reified)
-
-                l, ll = self.translate((False, var, d + 1)), []
-                for se in sub_enc:
-                    ll.append([l] + se)
-                conjunction.extend(ll)
-            return conjunction
+                yield self.translate((False, var, d + 1)), c - a * d
         else:
-            # stats["a<0"] += 1
-            # n >= 2, a < 0
-            conjunction = []
-            dom = (self.dom[var] if var not in dom_override else dom_override[var])
-
             # compute the starting point in Dom(var)
-            t = int((c - sum([self.ub(v) for v in views[1:]])) / a)  # truncate
+            t = int((c - ub_sums[i + 1]) / a)  # truncate
             idx = -1 if t < dom.lb() else dom.index(t)
             d_start = max(0, len(dom) - (idx + 1) - 1)
 
             for d in dom.get_values_desc(start=d_start):
-                # stats["for"] += 1
-                sub_sum = (views[1:], c - a * d)
-
                 # check whether to exit the loop earlier
-                ubs = [self.lb(v) for v in views[1:]]
-                if a * d + sum(ubs) >= c:
+                if a * d + lb_rest >= c:
                     break
-                # skip_counter += 1
-
-                sub_enc = self._encode(sub_sum, dom_override=dom_override, reified=reified)
 
-                l, ll = self.translate((True, var, d)), []
-                for se in sub_enc:
-                    ll.append([l] + se)
-                conjunction.extend(ll)
-            return conjunction
+                yield self.translate((True, var, d)), c - a * d
 
     def translate(self, view):
         if not self.do_translate:
@@ -165,21 +202,51 @@ class OrderEncoding:
             return var, int(not signed)
         elif c > self.ub_g[var]:
             return var, int(signed)
-        else:
+        elif self.raw_output:
             cc, vol = self.next_equal(var, c)
+            return signed, var, (cc if not self.no_extrema else c), c
+        else:
+            lit = self.literal_id(signed, var, c)
+            return lit if self.literal_ids else self.literals[lit]
+
+    def literal_id(self, signed, var, c):
+        """
+        Returns the interned id of the order literal var >= c (negated if signed) for lb_g[var] < c <= ub_g[var].
+        All bounds c mapping to the same domain position share one literal. The table of a variable is built on first
+        use, thus its domain must not change afterwards.
+        """
+        values = self.dom[var].values
+        table = self._literal_table.get(var)
+        if table is None:
+            table = self._literal_table[var] = array('l', [-1]) * (2 * (len(values) + 2))
 
-            if self.raw_output:
-                return signed, var, (cc if not self.no_extrema else c), c
-            else:
-                return SignedView(signed, 1, var, '>=', cc, annotation='^' if vol else None)
+        slot = 2 * self._position(var, values, c) + signed
+        lit = table[slot]
+        if lit < 0:
+            cc, vol = self._position_value(values, slot >> 1)
+            lit = table[slot] = len(self.literals)
+            self.literals.append(SignedView(signed, 1, var, '>=', cc, annotation='^' if vol else None))
+
+        return lit
+
+    def _position(self, var, values, d):
+        """
+        Returns 1 + the index of the minimal domain value greater equal to d, len(values) + 1 if there is none and 0 if
+        d lies between the global lower bound and the minimal domain value.
+        """
+        if d < values[0] and self.lb_g[var] < values[0]:
+            return 0
+        return bisect_left(values, d) + 1 if d >= values[0] else len(values) + 1
+
+    @staticmethod
+    def _position_value(values, position):
+        if position == 0:
+            return -float('inf'), True
+        elif position > len(values):
+            return float('inf'), True
+        else:
+            return values[position - 1], False
 
     def next_equal(self, var, d):
-        try:
-            v = self.dom[var].search(d)
-            return v, False
-        except IndexError:
-            v = self.dom[var].values[0]
-            if v > d and self.lb_g[var] < v and self.dom[var].values[0] > d:
-                return -float('inf'), True
-            else:
-                return float('inf'), True
+        values = self.dom[var].values
+        return self._position_value(values, self._position(var, values, d))
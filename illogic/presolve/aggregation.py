@@ -0,0 +1,173 @@
+from ..constraint_store import ConstraintStore
+from ..domains.contiguous.contiguous_domain import ContiguousDomain
+from ..domains.domain_by_enum import DomainByEnum
+
+
+class VariableAggregator(object):
+    """
+    Eliminates integer variables by the equalities a1 * x + a2 * y = b of two variables with |a1| = 1 which aren't
+    reified. x is substituted by a * y + c (a = -a1 * a2, c = a1 * b) in all constraints, the objective and bool to int
+    constraints, the domain of y is restricted to the values v with a * v + c in the domain of x. If both weights are
+    units, the variable with the larger domain is eliminated. Variables of bool to int constraints are only eliminated
+    by equalities x = y.
+
+    The eliminated variables keep their ids and domains, mapping tells x -> (a, y, c) for every eliminated variable x
+    with y not eliminated, see map_solution.
+
+    :type domains: list[Domain]
+    :type store: ConstraintStore
+    :type opt_vector: list[(int, int)]
+    :type bool_to_int: list[(int, int)]
+    """
+    # maximal number of values of domains which are restricted by enumeration
+    MAX_VALUES = 1 << 16
+
+    def __init__(self, domains, store, opt_vector, bool_to_int):
+        self.domains = list(domains)
+        self.store = store
+        self.opt_vector = opt_vector
+        self.bool_to_int = bool_to_int
+
+        self.mapping = {}
+        self.objective_offset = 0
+
+        self.n_eliminated = 0
+        self.n_rows_removed = 0
+
+    def aggregate(self):
+        """
+        Eliminates variables and returns the new ConstraintStore. opt_vector and bool_to_int are replaced by their
+        rewritten versions, the constant of the objective is added up in objective_offset.
+        """
+        b2i_vars = set([i for _, i in self.bool_to_int])
+        eliminating = set()
+
+        for row, (variables, weights, b, reified, upper) in enumerate(self.store.ranged_rows()):
+            if reified is not None or upper != b or len(variables) != 2:
+                continue
+
+            terms, b = self.substitute(variables, weights, b)
+            if len(terms) != 2:
+                continue
+
+            (x, a1), (y, a2) = terms
+            candidates = [(x, a1, y, a2), (y, a2, x, a1)]
+            # prefer to eliminate the variable with the larger domain
+            if self.domains[x].len() < self.domains[y].len():
+                candidates.reverse()
+
+            for x, a1, y, a2 in candidates:
+                a, c = -a1 * a2, a1 * b
+                if abs(a1) != 1 or x in b2i_vars and (a, c) != (1, 0):
+                    continue
+
+                dom = self._restrict(y, a, c, x)
+                if dom is not None:
+                    self.domains[y] = dom
+                    self.mapping[x] = (a, y, c)
+                    eliminating.add(row)
+                    if x in b2i_vars:
+                        b2i_vars.add(y)
+                    break
+
+        self.mapping = dict([(x, self.resolve(x)) for x in self.mapping])
+        self.n_eliminated = len(self.mapping)
+
+        store = ConstraintStore()
+        for row, (variables, weights, b, reified, upper) in enumerate(self.store.ranged_rows()):
+            if row in eliminating:
+                self.n_rows_removed += 1
+                continue
+
+            terms, shift = self.substitute(variables, weights, 0)
+            b += shift
+            upper = upper + shift if upper is not None else None
+
+            if not terms:
+                if reified is None and b <= 0 and (upper is None or upper >= 0):
+                    self.n_rows_removed += 1
+                    continue
+                # the constraint is constant, the first variable is kept with weight zero
+                terms = [(self.resolve(variables[0])[1], 0)]
+
+            store.append(terms, b, reified, upper=upper)
+
+        opt_terms, self.objective_offset = self.substitute([var for var, _ in self.opt_vector],
+                                                           [w for _, w in self.opt_vector], 0)
+        self.objective_offset = -self.objective_offset
+        self.opt_vector = opt_terms
+        self.bool_to_int = [(lit, self.resolve(i)[1]) for lit, i in self.bool_to_int]
+
+        return store
+
+    def resolve(self, var):
+        """
+        Returns (a, y, c) with var = a * y + c and y not eliminated.
+        """
+        a, c = 1, 0
+        while var in self.mapping:
+            a2, var, c2 = self.mapping[var]
+            a, c = a * a2, a * c2 + c
+        return a, var, c
+
+    def substitute(self, variables, weights, b):
+        """
+        Returns the terms of sum(w * v) >= b over variables which aren't eliminated and the shifted b. Terms of the same
+        variable are merged in the order of their first occurrence, zero weights are dropped.
+        """
+        merged = {}
+        order = []
+
+        for var, w in zip(variables, weights):
+            a, y, c = self.resolve(var)
+            b -= w * c
+            if y not in merged:
+                merged[y] = 0
+                order.append(y)
+            merged[y] += w * a
+
+        return [(y, merged[y]) for y in order if merged[y] != 0], b
+
+    def _restrict(self, y, a, c, x):
+        """
+        Returns the domain of y restricted to the values v with a * v + c in the domain of x, None if it is empty or
+        can't be computed.
+        """
+        dom_x, dom_y = self.domains[x], self.domains[y]
+        if dom_x.has_open_bound() or dom_y.has_open_bound():
+            return None
+
+        if isinstance(dom_x, ContiguousDomain) and dom_x.multiplier == 1 and \
+                isinstance(dom_y, ContiguousDomain) and dom_y.multiplier == 1:
+            # the values of a * y + c within the bounds of x
+            scaled = dom_y.copy(multiplier=a)
+            lb, ub = max(scaled.lb() + c, dom_x.lb()), min(scaled.ub() + c, dom_x.ub())
+            if a > 0:
+                lb, ub = -(-(lb - c) // a), (ub - c) // a
+            else:
+                lb, ub = -(-(ub - c) // a), (lb - c) // a
+
+            if lb > ub:
+                return None
+            return dom_y if (lb, ub) == (dom_y.lb(), dom_y.ub()) else ContiguousDomain(lb, ub)
+
+        if dom_x.len() > VariableAggregator.MAX_VALUES or dom_y.len() > VariableAggregator.MAX_VALUES:
+            return None
+
+        values_x = set(dom_x.get_values_asc())
+        values = [v for v in sorted(set(dom_y.get_values_asc())) if a * v + c in values_x]
+
+        if not values:
+            return None
+        return dom_y if len(values) == dom_y.len() else DomainByEnum(values)
+
+    def map_solution(self, values):
+        """
+        Returns the values of all variables given the values of the variables which aren't eliminated.
+
+        :type values: dict[int, int]
+        """
+        solution = dict(values)
+        for x, (a, y, c) in self.mapping.iteritems():
+            solution[x] = a * values[y] + c
+        return solution
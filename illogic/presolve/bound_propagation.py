@@ -0,0 +1,228 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+from ..constraint_store import ConstraintStore
+from ..domains.contiguous.contiguous_domain import ContiguousDomain
+from ..domains.domain_by_enum import DomainByEnum
+
+
+class InfeasibleException(Exception):
+    pass
+
+
+class BoundPropagator(object):
+    """
+    Tightens the bounds of integer variables by propagating the rows sum(w * x) >= b of a ConstraintStore until a
+    fixed point is reached. Equalities and ranges are propagated in both directions. Rows are processed from a
+    worklist: whenever a bound of a variable changes, only the rows the variable occurs in are queued again. Reified
+    rows don't take part in the propagation.
+
+    Only contiguous domains (without multiplier) and enumerated domains are tightened, the bounds of all other domains
+    are used as they are.
+
+    :type domains: list[Domain]
+    :type store: ConstraintStore
+    """
+    INF = float('inf')
+
+    def __init__(self, domains, store, max_steps=None):
+        self.domains = domains
+        self.store = store
+        self.max_steps = max_steps if max_steps is not None else 100 * (store.nnz() + len(store))
+
+        self.lb = [dom.lb() for dom in domains]
+        self.ub = [dom.ub() for dom in domains]
+        self.values = [sorted(dom.get_values()) if isinstance(dom, DomainByEnum) else None for dom in domains]
+        self.tightenable = [isinstance(dom, DomainByEnum) or isinstance(dom, ContiguousDomain) and dom.multiplier == 1
+                            for dom in domains]
+
+        # rows the variables occur in
+        self.occurrences = [array('l') for _ in domains]
+        for row in xrange(len(store)):
+            if store.reified[row] < 0:
+                for var in store.variables[store.offsets[row]:store.offsets[row + 1]]:
+                    self.occurrences[var].append(row)
+
+        self.n_tightened = 0
+        self.n_fixed = 0
+        self.n_rows_removed = 0
+        self.n_nonzeros_removed = 0
+
+    def propagate(self):
+        """
+        Propagates all rows to a fixed point or until max_steps rows have been processed. Returns False if a row can't
+        be satisfied within the bounds, the bounds are meaningless in this case.
+        """
+        store = self.store
+        queue = deque([row for row in xrange(len(store)) if store.reified[row] < 0])
+        queued = bytearray(len(store))
+        for row in queue:
+            queued[row] = 1
+
+        steps = 0
+        try:
+            while queue and steps < self.max_steps:
+                row = queue.popleft()
+                queued[row] = 0
+                steps += 1
+
+                for var in self._propagate_row(row):
+                    for r in self.occurrences[var]:
+                        if not queued[r]:
+                            queued[r] = 1
+                            queue.append(r)
+        except InfeasibleException:
+            return False
+
+        return True
+
+    def _propagate_row(self, row):
+        """
+        Returns the variables whose bounds changed by propagating the row.
+        """
+        store = self.store
+        start, end = store.offsets[row], store.offsets[row + 1]
+        variables, weights = store.variables[start:end], store.weights[start:end]
+
+        changed = self._propagate(variables, weights, store.b[row])
+
+        upper = store.get_upper(row)
+        if upper is not None:
+            changed.extend(self._propagate(variables, [-w for w in weights], -upper))
+
+        return changed
+
+    def _propagate(self, variables, weights, b):
+        """
+        Derives the bounds w * x >= b - (maximal activity of the other terms) of sum(w * x) >= b and returns the
+        variables whose bounds changed.
+        """
+        contributions = [self._max_contribution(var, w) for var, w in zip(variables, weights)]
+        n_inf = sum([1 for c in contributions if c == BoundPropagator.INF])
+        finite = sum([c for c in contributions if c != BoundPropagator.INF])
+
+        if n_inf > 1:
+            return []
+        elif n_inf == 0 and finite < b:
+            raise InfeasibleException
+
+        changed = []
+        for k, (var, w) in enumerate(zip(variables, weights)):
+
+            if n_inf == 0:
+                rest = finite - contributions[k]
+            elif contributions[k] == BoundPropagator.INF:
+                rest = finite
+            else:
+                continue
+
+            if w > 0 and self._set_lb(var, -((rest - b) // w)):
+                changed.append(var)
+            elif w < 0 and self._set_ub(var, (b - rest) // w):
+                changed.append(var)
+
+        return changed
+
+    def _max_contribution(self, var, w):
+        if w > 0:
+            return w * self.ub[var]
+        return w * self.lb[var] if w < 0 else 0
+
+    def _min_contribution(self, var, w):
+        if w > 0:
+            return w * self.lb[var]
+        return w * self.ub[var] if w < 0 else 0
+
+    def _set_lb(self, var, lb):
+        if lb <= self.lb[var] or not self.tightenable[var]:
+            return False
+
+        values = self.values[var]
+        if values is not None:
+            i = bisect_left(values, lb)
+            if i == len(values):
+                raise InfeasibleException
+            lb = values[i]
+
+        if lb > self.ub[var]:
+            raise InfeasibleException
+
+        self.lb[var] = lb
+        return True
+
+    def _set_ub(self, var, ub):
+        if ub >= self.ub[var] or not self.tightenable[var]:
+            return False
+
+        values = self.values[var]
+        if values is not None:
+            i = bisect_right(values, ub)
+            if i == 0:
+                raise InfeasibleException
+            ub = values[i - 1]
+
+        if ub < self.lb[var]:
+            raise InfeasibleException
+
+        self.ub[var] = ub
+        return True
+
+    def tightened_domains(self):
+        """
+        Returns the list of domains restricted to the propagated bounds.
+        """
+        domains = []
+
+        for var, dom in enumerate(self.domains):
+            lb, ub = self.lb[var], self.ub[var]
+
+            if lb != dom.lb() or ub != dom.ub():
+                self.n_tightened += 1
+                if self.values[var] is not None:
+                    dom = DomainByEnum([v for v in self.values[var] if lb <= v <= ub])
+                else:
+                    dom = ContiguousDomain(lb, ub)
+
+            if lb == ub:
+                self.n_fixed += 1
+
+            domains.append(dom)
+
+        return domains
+
+    def reduced_store(self):
+        """
+        Returns a new ConstraintStore without the rows that are satisfied by the propagated bounds. Equalities and
+        ranges with a satisfied side are reduced to the other side. Fixed variables are substituted into the remaining
+        rows which aren't reified.
+        """
+        reduced = ConstraintStore()
+
+        for variables, weights, b, reified, upper in self.store.ranged_rows():
+            terms = zip(variables, weights)
+
+            if reified is None:
+                fixed = [(var, w) for var, w in terms if self.lb[var] == self.ub[var]]
+                lower_implied = sum([self._min_contribution(var, w) for var, w in terms]) >= b
+                upper_implied = upper is None or sum([self._max_contribution(var, w) for var, w in terms]) <= upper
+
+                if lower_implied and upper_implied:
+                    self.n_rows_removed += 1
+                    self.n_nonzeros_removed += len(terms)
+                    continue
+                elif lower_implied:
+                    terms, b, upper = [(var, -w) for var, w in terms], -upper, None
+                elif upper_implied:
+                    upper = None
+
+                if fixed and len(fixed) < len(terms):
+                    shift = sum([w * self.lb[var] for var, w in terms if self.lb[var] == self.ub[var]])
+                    b -= shift
+                    upper = upper - shift if upper is not None else None
+                    terms = [(var, w) for var, w in terms if self.lb[var] != self.ub[var]]
+                    self.n_nonzeros_removed += len(fixed)
+
+            reduced.append(terms, b, reified, upper=upper)
+
+        return reduced
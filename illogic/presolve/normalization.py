@@ -0,0 +1,110 @@
+from fractions import gcd
+
+from ..constraint_store import ConstraintStore
+
+
+class RowNormalizer(object):
+    """
+    Brings the rows of a ConstraintStore into a canonical form and removes duplicates:
+
+    * terms of the same variable are merged, zero weights are dropped and the terms are sorted by variable. Rows whose
+      weights cancel out are dropped if they are trivially satisfied.
+    * the weights are divided by their GCD, the bounds are rounded towards the feasible side
+    * rows which aren't reified are hash-consed by their terms up to the sign. All bounds of the same weighted sum are
+      combined into a single row (the tightest lower and upper bound), thus exact duplicates and dominated rows are
+      dropped and opposite inequalities become a range or an equality.
+    * reified rows are only dropped if they are exact duplicates
+
+    :type store: ConstraintStore
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+        self.n_rows_removed = 0
+        self.n_nonzeros_removed = 0
+
+    def normalize(self):
+        """
+        Returns a new ConstraintStore containing the normalized rows in the order of their first occurrence.
+        """
+        # canonical sum -> [lower, upper], unbounded sides are None
+        bounds = {}
+        reified_rows = set()
+        # rows to output, either (terms, b, reified, upper) or (canonical sum, None) to look up its bounds
+        rows = []
+
+        for variables, weights, b, reified, upper in self.store.ranged_rows():
+            terms = RowNormalizer.merge_terms(variables, weights)
+
+            if not terms:
+                # the weights cancel out, rows which aren't trivially satisfied are kept as they are
+                if reified is not None or b > 0 or upper is not None and upper < 0:
+                    rows.append((zip(variables, weights), b, reified, upper))
+                continue
+
+            terms, b, upper = RowNormalizer.divide_gcd(terms, b, upper)
+
+            if reified is not None:
+                key = tuple(terms), b, reified, upper
+                if key not in reified_rows:
+                    reified_rows.add(key)
+                    rows.append(key)
+                continue
+
+            # every row bounds the sum with a positive leading weight from below and/or above
+            if terms[0][1] < 0:
+                terms = [(var, -w) for var, w in terms]
+                lower, upper = (None if upper is None else -upper), -b
+            else:
+                lower = b
+
+            key = tuple(terms)
+            if key not in bounds:
+                bounds[key] = [lower, upper]
+                rows.append((key, None))
+            else:
+                old = bounds[key]
+                old[0] = lower if old[0] is None else old[0] if lower is None else max(old[0], lower)
+                old[1] = upper if old[1] is None else old[1] if upper is None else min(old[1], upper)
+
+        normalized = ConstraintStore()
+        for row in rows:
+            if len(row) == 2:
+                key = row[0]
+                lower, upper = bounds[key]
+                if lower is None:
+                    normalized.append([(var, -w) for var, w in key], -upper)
+                else:
+                    normalized.append(list(key), lower, upper=upper)
+            else:
+                terms, b, reified, upper = row
+                normalized.append(list(terms), b, reified, upper=upper)
+
+        self.n_rows_removed = len(self.store) - len(normalized)
+        self.n_nonzeros_removed = self.store.nnz() - normalized.nnz()
+
+        return normalized
+
+    @staticmethod
+    def merge_terms(variables, weights):
+        """
+        Returns the terms with merged weights per variable, sorted by variable and without zero weights.
+        """
+        merged = {}
+        for var, w in zip(variables, weights):
+            merged[var] = merged.get(var, 0) + w
+
+        return sorted([(var, w) for var, w in merged.iteritems() if w != 0])
+
+    @staticmethod
+    def divide_gcd(terms, b, upper=None):
+        """
+        Divides the weights by their GCD. The lower bound b is rounded up and the upper bound is rounded down, which
+        keeps the set of integer solutions.
+        """
+        g = reduce(gcd, [abs(w) for _, w in terms])
+        if g == 1:
+            return terms, b, upper
+
+        return [(var, w / g) for var, w in terms], -(-b // g), (upper // g if upper is not None else None)
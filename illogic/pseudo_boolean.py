@@ -0,0 +1,75 @@
+from domains.closed_domain import ClosedDomain
+from domains.contiguous.contiguous_domain import ContiguousDomain
+from domains.domain_by_enum import DomainByEnum
+
+# classes of linear constraints over 0/1 variables, see classify
+CLAUSE = 'clause'
+AT_MOST = 'at-most-k'
+CARDINALITY = 'cardinality'
+PB = 'pb'
+
+KINDS = (CLAUSE, AT_MOST, CARDINALITY, PB)
+
+
+def is_boolean(domain):
+    """
+    Returns True if the domain consists of the values 0 and 1.
+    """
+    if domain.has_open_bound() or domain.lb() != 0 or domain.ub() != 1:
+        return False
+    elif isinstance(domain, ContiguousDomain):
+        return abs(domain.multiplier) == 1
+    elif isinstance(domain, ClosedDomain):
+        # the values of a ClosedDomain aren't scaled by its multiplier
+        return domain.multiplier == 1 and domain.len() == 2
+    return isinstance(domain, DomainByEnum) and domain.len() == 2
+
+
+def classify(domains, variables, weights, b, upper=None):
+    """
+    Returns the class of the constraint b <= sum(w * v) (<= upper) if all variables have a 0/1 domain, None otherwise.
+    A variable with a negative weight w is read as the literal not v, as w * v = -w * (1 - v) + w.
+
+    * CLAUSE: the constraint holds iff at least one of the literals is true
+    * AT_MOST: sum(a * v) <= a * k with the same weight a for all variables
+    * CARDINALITY: the weights of all literals are the same, e.g. at least k or exactly k literals are true
+    * PB: any other constraint over 0/1 variables
+
+    :type domains: list[Domain]
+    """
+    if not variables or not all([is_boolean(domains[var]) for var in variables]):
+        return None
+
+    magnitudes = set([abs(w) for w in weights])
+    if 0 in magnitudes:
+        return PB
+
+    if upper is None:
+        # the degree of the constraint over literals with positive weights
+        degree = b - sum([w for w in weights if w < 0])
+        if degree > 0 and min(magnitudes) >= degree:
+            return CLAUSE
+
+    if len(magnitudes) > 1:
+        return PB
+    elif upper is None and all([w < 0 for w in weights]):
+        return AT_MOST
+
+    return CARDINALITY
+
+
+def unit_form(kind, weights, b, upper=None):
+    """
+    Returns the constraint b <= sum(w * v) (<= upper) of the class kind (CLAUSE, AT_MOST or CARDINALITY) as
+    (signs, b', upper') of the equivalent constraint b' <= sum(s * v) (<= upper') with the signs s of the weights.
+    At-most-k constraints are returned as sum(v) <= k with b' = None.
+    """
+    signs = [1 if w > 0 else -1 for w in weights]
+    a = abs(weights[0])
+
+    if kind == CLAUSE:
+        return signs, 1 - signs.count(-1), None
+    elif kind == AT_MOST:
+        return [1] * len(weights), None, -b // a
+
+    return signs, -(-b // a), (upper // a if upper is not None else None)
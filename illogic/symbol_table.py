@@ -0,0 +1,43 @@
+from array import array
+
+
+class SymbolTable(object):
+    """
+    Interns variables as dense integer ids starting at 0. Names are only rendered on demand (e.g. by the writers) as
+    prefix + (id + first), unless an explicit name was given on creation.
+
+    :type names: dict[int, str]
+    """
+
+    def __init__(self, prefix, internal_prefix, first=1):
+        self.prefix = prefix
+        self.internal_prefix = internal_prefix
+        self.first = first
+        self.internal = array('b')
+        self.names = {}
+
+    def add(self, internal=False, name=None):
+        var = len(self.internal)
+        self.internal.append(1 if internal else 0)
+
+        if name is not None:
+            self.names[var] = name
+
+        return var
+
+    def name(self, var):
+        if self.names and var in self.names:
+            return self.names[var]
+        return '%s%d' % (self.internal_prefix if self.internal[var] else self.prefix, var + self.first)
+
+    def is_internal(self, var):
+        return bool(self.internal[var])
+
+    def __contains__(self, var):
+        return type(var) in (int, long) and 0 <= var < len(self.internal)
+
+    def __len__(self):
+        return len(self.internal)
+
+    def __iter__(self):
+        return iter(xrange(len(self.internal)))
@@ -0,0 +1,110 @@
+"""
+Model counts of DIMACS encodings of reified constraints, every CNF model corresponds to exactly one assignment of the
+instance since the order and auxiliary variables are defined by their clauses.
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from itertools import product
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+from illogic.ILPParser import ILPParser
+from illogic.Readers.InputReader import InputReader
+from illogic.Readers.json_reader import JSONReader
+from illogic.Writers.dimacs_writer import DIMACSWriter
+from illogic.Writers.json_writer import JSONWriter
+from illogic.domains.contiguous.contiguous_domain import ContiguousDomain
+
+
+class NullReader(InputReader):
+    def parse(self, input_file, **kwargs):
+        return True
+
+
+def count_models(build, reader=None, **options):
+    """
+    Builds an instance by build(converter), writes it as DIMACS and returns the number of models of the CNF.
+    """
+    converter = ILPParser(reader or NullReader(), DIMACSWriter(), **options)
+    converter.reset()
+    converter.set_instance_name('test')
+    build(converter)
+
+    output = tempfile.mkdtemp()
+    try:
+        converter.write_output(output, name='test')
+        with open(os.path.join(output, 'test.cnf')) as f:
+            lines = [line.split() for line in f if not line.startswith('c')]
+    finally:
+        shutil.rmtree(output)
+
+    n_vars = int(lines[0][2])
+    clauses = [map(int, line[:-1]) for line in lines[1:]]
+
+    n = 0
+    for assignment in product((False, True), repeat=n_vars):
+        if all(any(assignment[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in clauses):
+            n += 1
+    return n
+
+
+def reified_eq(converter):
+    x = converter.new_int_variable(ContiguousDomain(0, 2))
+    y = converter.new_int_variable(ContiguousDomain(0, 2))
+    r = converter.new_bool_variable()
+    converter.add_eq_constraint([(x, 1), (y, 1)], 2, reified_var=ILPParser.literal(r))
+
+
+def reified_range(converter):
+    x = converter.new_int_variable(ContiguousDomain(0, 2))
+    y = converter.new_int_variable(ContiguousDomain(0, 2))
+    r = converter.new_bool_variable()
+    converter.add_range_constraint([(x, 1), (y, -1)], -1, 1, reified_var=ILPParser.literal(r, False))
+
+
+def json_dump(build):
+    """
+    Returns a function which reads the JSON dump of the instance built by build(converter).
+    """
+    converter = ILPParser(NullReader(), JSONWriter())
+    converter.reset()
+    converter.set_instance_name('test')
+    build(converter)
+
+    output = tempfile.mkdtemp()
+    converter.write_output(output)
+    path = os.path.join(output, 'test.json')
+
+    def read(converter):
+        try:
+            converter.reader.parse(path)
+        finally:
+            shutil.rmtree(output)
+
+    return read
+
+
+class TestReifiedRanges(unittest.TestCase):
+    def test_reified_eq(self):
+        self.assertEqual(count_models(reified_eq), 9)
+
+    def test_reified_eq_streamed(self):
+        self.assertEqual(count_models(reified_eq, stream=True), 9)
+
+    def test_reified_range(self):
+        self.assertEqual(count_models(reified_range), 9)
+
+    def test_reified_range_streamed(self):
+        self.assertEqual(count_models(reified_range, stream=True), 9)
+
+    def test_reified_eq_json(self):
+        self.assertEqual(count_models(json_dump(reified_eq), reader=JSONReader()), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()